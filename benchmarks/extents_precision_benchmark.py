@@ -0,0 +1,68 @@
+"""
+Compares the cost and tightness of the Extents precision tiers on a few representative parts.
+
+Run with: python benchmarks/extents_precision_benchmark.py
+"""
+
+import time
+
+import OCC.Core.BRepMesh
+import OCC.Core.gp
+
+import pythonoccutils.occutils_python as op
+from pythonoccutils.part_manager import PartFactory
+from pythonoccutils.stock_parts import StockParts
+
+
+def make_parts():
+    return {
+        "box": PartFactory.box(10, 20, 30),
+        "cylinder": PartFactory.cylinder(5, 20),
+        "sphere": PartFactory.sphere(7),
+        "rotated_cylinder": PartFactory.cylinder(5, 20).transform.rotate(
+            OCC.Core.gp.gp_Ax1(OCC.Core.gp.gp_Origin(), OCC.Core.gp.gp_DX()), 0.7),
+        "hex_lattice": PartFactory.hex_lattice(6, 6),
+        "screw_m3": StockParts.screw_m3(10)
+    }
+
+
+def time_extents(shapes, precision: op.Extents.Precision, repeats: int = 5) -> float:
+    best = None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        op.Extents.bulk(shapes, precision)
+        elapsed = time.perf_counter() - t0
+
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def main():
+    print(f"{'part':>18} {'precision':>14} {'faces':>6} {'ms':>10} {'volume ratio':>13}")
+
+    for name, part in make_parts().items():
+        # the triangulation tier only differs from FAST once the shape has been meshed
+        OCC.Core.BRepMesh.BRepMesh_IncrementalMesh(part.shape, 0.1, False, 0.5, True)
+
+        faces = op.Explorer.face_explorer(part.shape).get()
+
+        optimal_volume = None
+        for precision in [op.Extents.Precision.OPTIMAL,
+                          op.Extents.Precision.FAST,
+                          op.Extents.Precision.TRIANGULATION,
+                          op.Extents.Precision.OBB]:
+            extents = op.Extents(part.shape, precision)
+            volume = extents.x_span * extents.y_span * extents.z_span
+
+            if optimal_volume is None:
+                optimal_volume = volume
+
+            elapsed = time_extents(faces, precision)
+
+            print(f"{name:>18} {precision.name:>14} {len(faces):>6} {elapsed * 1000:>10.3f} "
+                  f"{volume / optimal_volume:>13.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Times Part.map_subshape_changes against the number of faces in the shape and the number of labels in the
+subshape map.
+
+Run with: python benchmarks/map_subshape_changes_benchmark.py
+"""
+
+import time
+
+import OCC.Core.BRepPrimAPI
+import OCC.Core.ShapeUpgrade
+import OCC.Core.gp as gp
+
+import pythonoccutils.occutils_python as op
+from pythonoccutils.part_manager import Part
+
+
+def make_boxes(count: int):
+    boxes = [OCC.Core.BRepPrimAPI.BRepPrimAPI_MakeBox(gp.gp_Pnt(2 * i, 0, 0), 1, 1, 1).Shape() for i in range(count)]
+    return op.GeomUtils.make_compound(*boxes)
+
+
+def make_labels(shape, label_count: int):
+    faces = op.Explorer.face_explorer(shape).get()
+    return {f"label_{i}": [faces[j] for j in range(i % 6, len(faces), 6)] for i in range(label_count)}
+
+
+def time_mapping(box_count: int, label_count: int, repeats: int = 3) -> float:
+    shape = make_boxes(box_count)
+    subshapes = make_labels(shape, label_count)
+
+    unif = OCC.Core.ShapeUpgrade.ShapeUpgrade_UnifySameDomain()
+    unif.Initialize(shape, True, True, False)
+    unif.Build()
+
+    best = None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        Part.map_subshape_changes(unif.Shape(), subshapes, unif.History(), map_is_partner=True, map_is_same=True)
+        elapsed = time.perf_counter() - t0
+
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def main():
+    print(f"{'boxes':>8} {'faces':>8} {'labels':>8} {'seconds':>10}")
+    for box_count in [10, 50, 200]:
+        for label_count in [6, 60, 600]:
+            elapsed = time_mapping(box_count, label_count)
+            print(f"{box_count:>8} {6 * box_count:>8} {label_count:>8} {elapsed:>10.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Compares the number of vtk points and the time taken to build the viewer actors of a few parts, against the
+previous edge rendering, which pushed the whole face triangulation again for every edge.
+
+Run with: python benchmarks/vtk_edge_points_benchmark.py
+"""
+
+import time
+
+from vtkmodules.vtkCommonDataModel import vtkPolyLine
+
+import pythonoccutils.occutils_python as op
+import vtk_occ_bridge_swig
+from pythonoccutils.cad.gui.render_spec import EntityRenderingColorSpec, RenderingColorSpec, RenderSpec
+from pythonoccutils.cad.gui.vtk.vtk_occ_bridging import VtkActorBuilder, VtkActorsBuilder, VtkOccActorMap
+from pythonoccutils.part_manager import PartFactory
+from pythonoccutils.stock_parts import StockParts
+
+
+def make_parts():
+    return {
+        "box": PartFactory.box(10, 20, 30),
+        "cylinder": PartFactory.cylinder(5, 20),
+        "sphere": PartFactory.sphere(7),
+        "hex_lattice": PartFactory.hex_lattice(6, 6),
+        "screw_m3": StockParts.screw_m3(10)
+    }
+
+
+class LegacyVtkActorsBuilder(VtkActorsBuilder):
+    """
+    Draws edges the way they were drawn before edges reused the face points: for each edge, every node of the
+    triangulation its polygon lies on is pushed again.
+    """
+
+    def _process_triangulated_edge_pot(self, actor_builder: VtkActorBuilder, edge, label):
+        pot_result = vtk_occ_bridge_swig.Visualization.processEdgeTest(edge)
+
+        if not pot_result.hasValue():
+            return
+
+        pot = pot_result.pot()
+        pt = pot_result.pt()
+        loc = pot_result.loc()
+
+        pt_ids_to_vtk_ids = {}
+        for i in range(1, pt.NbNodes() + 1):
+            pnt = pt.Nodes().Value(i).Transformed(loc.Transformation())
+            pt_ids_to_vtk_ids[i] = actor_builder.push_point(pnt.X(), pnt.Y(), pnt.Z())
+
+        poly_line = vtkPolyLine()
+        poly_line.GetPointIds().SetNumberOfIds(pot.NbNodes())
+        for i in range(1, pot.NbNodes() + 1):
+            poly_line.GetPointIds().SetId(i - 1, pt_ids_to_vtk_ids[pot.Nodes().Value(i)])
+
+        actor_builder.push_line(poly_line, self._color_spec.edges_spec.base_color, shape=edge)
+
+
+def make_builder(part, builder_type=VtkActorsBuilder) -> VtkActorsBuilder:
+    ercs = EntityRenderingColorSpec((255, 255, 255), (255, 255, 255))
+    rcs = RenderingColorSpec(ercs, ercs, ercs, ercs, ercs, ercs)
+
+    return builder_type({part}, rcs, RenderSpec(False, False, False))
+
+
+def point_count(assembly) -> int:
+    # the solid and edge actors share their points
+    parts = assembly.GetParts()
+    parts.InitTraversal()
+    return parts.GetNextProp().GetMapper().GetInput().GetNumberOfPoints()
+
+
+def time_build(part, builder_type, repeats: int = 3):
+    best = None
+    assembly = None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        assembly = next(iter(make_builder(part, builder_type).get_vtk_actors(VtkOccActorMap())))
+        elapsed = time.perf_counter() - t0
+
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best, assembly
+
+
+def main():
+    print(f"{'part':>12} {'edges':>6} {'points before':>14} {'points after':>13} {'ms before':>10} {'ms after':>10}")
+
+    for name, part in make_parts().items():
+        # the mesh is cached after the first build, so neither timing includes meshing
+        time_build(part, VtkActorsBuilder, repeats=1)
+
+        legacy_elapsed, legacy_assembly = time_build(part, LegacyVtkActorsBuilder)
+        elapsed, assembly = time_build(part, VtkActorsBuilder)
+
+        edges = len(op.Explorer.edge_explorer(part.shape, unique=True).get())
+
+        print(f"{name:>12} {edges:>6} {point_count(legacy_assembly):>14} {point_count(assembly):>13} "
+              f"{1000 * legacy_elapsed:>10.2f} {1000 * elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Compares building the triangle mesh vtk data of a large assembly from the bulk arrays of the bridge library
+against the previous per-node and per-triangle loops over the OCC triangulation in Python.
+
+Run with: python benchmarks/vtk_face_arrays_benchmark.py
+"""
+
+import time
+
+import OCC.Core.BRep
+import OCC.Core.TopLoc
+from vtkmodules.util import numpy_support
+from vtkmodules.vtkCommonCore import vtkPoints, vtkUnsignedCharArray
+from vtkmodules.vtkCommonDataModel import vtkCellArray, vtkTriangle
+
+import pythonoccutils.occutils_python as op
+import vtk_occ_bridge_swig
+from pythonoccutils.cad.gui.render_spec import EntityRenderingColorSpec, RenderingColorSpec
+from pythonoccutils.cad.gui.vtk.vtk_occ_bridging import VtkActorBuilder
+from pythonoccutils.part_manager import Part, PartFactory
+from pythonoccutils.stock_parts import StockParts
+
+COLOR = (255, 255, 255)
+
+
+def make_assemblies():
+    return {
+        "hex_lattice_30": PartFactory.hex_lattice(30, 30),
+        "screws_8x8": PartFactory.compound(*[StockParts.screw_m3(10).transform.translate(dx=6 * i, dy=6 * j)
+                                             for i in range(8) for j in range(8)])
+    }
+
+
+def legacy_face_data(faces):
+    """
+    The per-element construction used before the bridge returned bulk arrays.
+    """
+    points = vtkPoints()
+    cells = vtkCellArray()
+    colors = vtkUnsignedCharArray()
+    colors.SetNumberOfComponents(3)
+
+    for face in faces:
+        loc = OCC.Core.TopLoc.TopLoc_Location()
+        tri = OCC.Core.BRep.BRep_Tool_Triangulation(face, loc)
+
+        if tri is None:
+            continue
+
+        pnt_ids = {}
+        for i in range(1, tri.NbNodes() + 1):
+            pnt = tri.Nodes().Value(i).Transformed(loc.Transformation())
+            pnt_ids[i] = points.InsertNextPoint(pnt.X(), pnt.Y(), pnt.Z())
+
+        triangles = tri.Triangles()
+        for i in range(1, tri.NbTriangles() + 1):
+            ia, ib, ic = triangles.Value(i).Get()
+
+            t = vtkTriangle()
+            t.GetPointIds().SetId(0, pnt_ids[ia])
+            t.GetPointIds().SetId(1, pnt_ids[ib])
+            t.GetPointIds().SetId(2, pnt_ids[ic])
+
+            cells.InsertNextCell(t)
+            colors.InsertNextTypedTuple(COLOR)
+
+    return points, cells
+
+
+def bulk_face_data(part: Part, faces):
+    ercs = EntityRenderingColorSpec(COLOR, COLOR)
+    actor_builder = VtkActorBuilder(RenderingColorSpec(ercs, ercs, ercs, ercs, ercs, ercs), part)
+
+    for face in faces:
+        nodes = numpy_support.vtk_to_numpy(vtk_occ_bridge_swig.Visualization.triangulationNodes(face))
+        if len(nodes) == 0:
+            continue
+
+        tris = numpy_support.vtk_to_numpy(vtk_occ_bridge_swig.Visualization.triangulationTriangles(face))
+
+        first_point_id = actor_builder.push_points(nodes)
+        actor_builder.push_tris(tris.reshape(-1, 3) + first_point_id, COLOR, shape=face)
+
+    # also runs the normals filter, which legacy_face_data leaves out, so the comparison favours the legacy path
+    actor_builder.build_data()
+
+    return actor_builder
+
+
+def best_time(fn, repeats: int = 3) -> float:
+    best = None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - t0
+
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def main():
+    print(f"{'assembly':>16} {'faces':>6} {'triangles':>10} {'ms per element':>15} {'ms bulk':>10}")
+
+    for name, part in make_assemblies().items():
+        op.MeshCache.instance().mesh(part.shape, 0.2, 0.5)
+
+        faces = op.Explorer.face_explorer(part.shape, unique=True).get()
+
+        _, cells = legacy_face_data(faces)
+
+        legacy_elapsed = best_time(lambda: legacy_face_data(faces))
+        bulk_elapsed = best_time(lambda: bulk_face_data(part, faces))
+
+        print(f"{name:>16} {len(faces):>6} {cells.GetNumberOfCells():>10} "
+              f"{1000 * legacy_elapsed:>15.2f} {1000 * bulk_elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,10 +5,16 @@
 #include <IVtkOCC_Shape.hxx>
 #include <vtkPolyDataMapper.h>
 #include <vtkPolyDataAlgorithm.h>
+#include <vtkDoubleArray.h>
+#include <vtkIdTypeArray.h>
+#include <vtkSmartPointer.h>
 #include <Poly_PolygonOnTriangulation.hxx>
 #include <Poly_Triangulation.hxx>
 #include <TopLoc_Location.hxx>
 #include <BRep_Tool.hxx>
+#include <BRepMesh_IncrementalMesh.hxx>
+#include <TopoDS_Edge.hxx>
+#include <TopoDS_Face.hxx>
 
 #include <iostream>
 
@@ -75,6 +81,96 @@ public:
         //return PotResult { aPolyOnTriangulation, aTriangulation, aLocation, !aPolyOnTriangulation.IsNull() };
     }
 
+    // Meshes the shape like BRepMesh_IncrementalMesh(shape, linDeflection, false, angDeflection). The module is
+    // wrapped with threads enabled, so unlike the pythonocc call the GIL is released while meshing.
+    static void mesh(const TopoDS_Shape& shape, double linDeflection, double angDeflection) {
+        BRepMesh_IncrementalMesh(shape, linDeflection, Standard_False, angDeflection);
+    }
+
+    // The nodes of the face triangulation as a 3-component array, with the face location applied. The data is
+    // written straight into the array, which Python can view without copying (numpy_support.vtk_to_numpy).
+    // Empty if the face has not been triangulated.
+    static vtkSmartPointer<vtkDoubleArray> triangulationNodes(const TopoDS_Face& face) {
+        vtkSmartPointer<vtkDoubleArray> result = vtkSmartPointer<vtkDoubleArray>::New();
+        result->SetNumberOfComponents(3);
+
+        TopLoc_Location loc;
+        Handle(Poly_Triangulation) tri = BRep_Tool::Triangulation(face, loc);
+        if (tri.IsNull()) {
+            return result;
+        }
+
+        const gp_Trsf& trsf = loc.Transformation();
+        const TColgp_Array1OfPnt& nodes = tri->Nodes();
+
+        result->SetNumberOfTuples(nodes.Length());
+        double* data = result->GetPointer(0);
+
+        for (Standard_Integer i = nodes.Lower(); i <= nodes.Upper(); ++i) {
+            gp_Pnt pnt = nodes(i).Transformed(trsf);
+            *data++ = pnt.X();
+            *data++ = pnt.Y();
+            *data++ = pnt.Z();
+        }
+
+        return result;
+    }
+
+    // The node indices of the face triangles, three per triangle, converted to 0-based indices into
+    // triangulationNodes. Empty if the face has not been triangulated.
+    static vtkSmartPointer<vtkIdTypeArray> triangulationTriangles(const TopoDS_Face& face) {
+        vtkSmartPointer<vtkIdTypeArray> result = vtkSmartPointer<vtkIdTypeArray>::New();
+
+        TopLoc_Location loc;
+        Handle(Poly_Triangulation) tri = BRep_Tool::Triangulation(face, loc);
+        if (tri.IsNull()) {
+            return result;
+        }
+
+        const Poly_Array1OfTriangle& triangles = tri->Triangles();
+
+        result->SetNumberOfValues(3 * triangles.Length());
+        vtkIdType* data = result->GetPointer(0);
+
+        for (Standard_Integer i = triangles.Lower(); i <= triangles.Upper(); ++i) {
+            Standard_Integer a, b, c;
+            triangles(i).Get(a, b, c);
+            *data++ = a - 1;
+            *data++ = b - 1;
+            *data++ = c - 1;
+        }
+
+        return result;
+    }
+
+    // 0-based indices into triangulationNodes(face) of the polygon the edge has on the face triangulation.
+    // Empty if either the face or the edge on it has not been triangulated.
+    static vtkSmartPointer<vtkIdTypeArray> polygonOnTriangulationNodes(const TopoDS_Edge& edge, const TopoDS_Face& face) {
+        vtkSmartPointer<vtkIdTypeArray> result = vtkSmartPointer<vtkIdTypeArray>::New();
+
+        TopLoc_Location loc;
+        Handle(Poly_Triangulation) tri = BRep_Tool::Triangulation(face, loc);
+        if (tri.IsNull()) {
+            return result;
+        }
+
+        Handle(Poly_PolygonOnTriangulation) polOnTri = BRep_Tool::PolygonOnTriangulation(edge, tri, loc);
+        if (polOnTri.IsNull()) {
+            return result;
+        }
+
+        const TColStd_Array1OfInteger& nodes = polOnTri->Nodes();
+
+        result->SetNumberOfValues(nodes.Length());
+        vtkIdType* data = result->GetPointer(0);
+
+        for (Standard_Integer i = nodes.Lower(); i <= nodes.Upper(); ++i) {
+            *data++ = nodes(i) - 1;
+        }
+
+        return result;
+    }
+
     static vtkSmartPointer<vtkPolyDataMapper> getDataMapper(const TopoDS_Shape& sh) {
         std::cout << "Creating vtk occ shape" << std::endl;
 
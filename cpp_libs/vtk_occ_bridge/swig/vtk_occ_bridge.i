@@ -2,7 +2,9 @@
 %include "std_string.i"
 %include "/third_party/pythonocc-core/src/SWIG_files/common/OccHandle.i"
 
-%module(package="vtk_occ_bridge") vtk_occ_bridge
+// threads: the wrapped C++ calls run with the GIL released, so they can be used from worker threads without
+// blocking the Qt GUI thread
+%module(package="vtk_occ_bridge", threads="1") vtk_occ_bridge
 %feature("flatnested", "1");
 %feature("autodoc", "1");
 %{
@@ -30,6 +32,8 @@
 
 VTK_SMARTPOINTER(vtkPolyDataMapper)
 VTK_SMARTPOINTER(vtkOpenGLPolyDataMapper)
+VTK_SMARTPOINTER(vtkDoubleArray)
+VTK_SMARTPOINTER(vtkIdTypeArray)
 
 %wrap_handle(Poly_PolygonOnTriangulation)
 %wrap_handle(Poly_Triangulation)
@@ -53,5 +57,13 @@ public:
 
     static PotResult processEdgeTest(TopoDS_Edge& edge);
 
+    static void mesh(TopoDS_Shape& shape, double linDeflection, double angDeflection);
+
+    static vtkSmartPointer<vtkDoubleArray> triangulationNodes(TopoDS_Face& face);
+
+    static vtkSmartPointer<vtkIdTypeArray> triangulationTriangles(TopoDS_Face& face);
+
+    static vtkSmartPointer<vtkIdTypeArray> polygonOnTriangulationNodes(TopoDS_Edge& edge, TopoDS_Face& face);
+
     static vtkSmartPointer<vtkPolyDataMapper> getDataMapper(TopoDS_Shape& sh);
 };
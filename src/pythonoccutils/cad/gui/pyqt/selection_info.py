@@ -1,3 +1,4 @@
+import itertools
 import typing
 
 import OCC
@@ -11,6 +12,9 @@ from pythonoccutils.part_manager import PartSelectionResolver
 
 class InfoFrame(QtWidgets.QFrame):
 
+    # box selections can contain thousands of shapes, only list this many per part
+    MAX_SHAPE_ENTRIES = 20
+
     class ShapeEntry(QtWidgets.QGroupBox):
 
         def __init__(self, parent, part, shape):
@@ -40,9 +44,12 @@ class InfoFrame(QtWidgets.QFrame):
         for vtk_occ_actor, shapes in selection.items():
             layout.addWidget(QLabel(vtk_occ_actor.name))
 
-            for s in shapes:
+            for s in itertools.islice(shapes, InfoFrame.MAX_SHAPE_ENTRIES):
                 layout.addWidget(InfoFrame.ShapeEntry(self, vtk_occ_actor.part, s))
 
+            if len(shapes) > InfoFrame.MAX_SHAPE_ENTRIES:
+                layout.addWidget(QLabel(f"... and {len(shapes) - InfoFrame.MAX_SHAPE_ENTRIES} more"))
+
             layout.addWidget(QLabel("Part query suggestions"))
 
             for suggestion in PartSelectionResolver(vtk_occ_actor.part, *shapes).get_suggested_selections():
@@ -1,7 +1,9 @@
+import concurrent.futures
+import logging
 import typing
 
 import vtkmodules
-from PyQt5 import QtWidgets
+from PyQt5 import QtCore, QtWidgets
 from vtkmodules.qt.QVTKRenderWindowInteractor import QVTKRenderWindowInteractor
 from vtkmodules.vtkCommonColor import vtkNamedColors
 import vtkmodules.vtkRenderingAnnotation
@@ -13,18 +15,32 @@ from vtkmodules.vtkRenderingCore import vtkActor, vtkCamera
 from pythonoccutils.cad.gui.pyqt.widgets.widget_toolbar import WidgetToolbar
 from pythonoccutils.cad.gui.render_spec import RenderSpec, RenderingColorSpec, EntityRenderingColorSpec
 from pythonoccutils.cad.gui.vtk.interaction import MousePickingInteractorStyle
-from pythonoccutils.cad.gui.vtk.vtk_occ_bridging import VtkActorsBuilder, VtkOccActorMap
+from pythonoccutils.cad.gui.vtk.vtk_occ_bridging import VtkActorBuilder, VtkOccActorMap, VtkOccScene
 from pythonoccutils.cad.model.session import Session
 from pythonoccutils.part_manager import Part
 
+logger = logging.getLogger(__name__)
+
+
+class PartBuiltEmitter(QtCore.QObject):
+
+    # name, ticket, VtkActorBuilder
+    partBuiltSignal = QtCore.pyqtSignal(str, int, object)
+
+    # name, ticket, error message
+    partFailedSignal = QtCore.pyqtSignal(str, int, str)
+
 
 class DisplayFrame(QtWidgets.QFrame):
 
+    # parts are meshed by this many worker threads, and shown as they finish. Builds hold the MeshCache lock while
+    # meshing and reading triangulations, so more workers would mostly queue on it.
+    BUILD_WORKERS = 1
+
     def __init__(self, session: Session, parent=None):
         super().__init__(parent)
 
         self._session = session
-        self._scene_actors: typing.List[vtkActor] = []
         self._workspace = None
         self._actor_map: VtkOccActorMap = VtkOccActorMap()
 
@@ -69,6 +85,20 @@ class DisplayFrame(QtWidgets.QFrame):
             face_annotations_spec=EntityRenderingColorSpec("red", "pink"),
             edge_annotations_spec=EntityRenderingColorSpec("green", "lime"))
 
+        self._scene = VtkOccScene(self._actor_map, self._color_spec, self._render_spec)
+
+        # frame the camera on parts as they arrive, only done while nothing else is shown
+        self._frame_arrivals = True
+
+        self._build_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=DisplayFrame.BUILD_WORKERS, thread_name_prefix="part-builder")
+        self._build_futures: typing.Dict[int, typing.Tuple[str, concurrent.futures.Future]] = {}
+
+        # created on the GUI thread, so emissions from the workers are queued to it
+        self._part_built_emitter = PartBuiltEmitter()
+        self._part_built_emitter.partBuiltSignal.connect(self._part_built)
+        self._part_built_emitter.partFailedSignal.connect(self._part_failed)
+
         axes_actor = vtkmodules.vtkRenderingAnnotation.vtkAxesActor()
         self._marker_widget = vtkmodules.vtkInteractionWidgets.vtkOrientationMarkerWidget()
         self._marker_widget.SetOrientationMarker(axes_actor)
@@ -115,24 +145,89 @@ class DisplayFrame(QtWidgets.QFrame):
 
         self._widgets.append(widget)
 
+    def closeEvent(self, event):
+        self._session.listener_manager.remove_listener(self.session_changed)
+
+        # queued builds are dropped, a running one finishes in the background and its result is not delivered
+        for name, future in self._build_futures.values():
+            future.cancel()
+        self._build_futures.clear()
+
+        self._part_built_emitter.partBuiltSignal.disconnect(self._part_built)
+        self._part_built_emitter.partFailedSignal.disconnect(self._part_failed)
+
+        # the futures were cancelled above, cancel_futures needs python 3.9
+        self._build_executor.shutdown(wait=False)
+
+        super().closeEvent(event)
+
     def session_changed(self, session: Session):
         self._widget_toolbar.detach()
 
-        for sa in self._scene_actors:
-            self._renderer.RemoveActor(sa)
+        parts = self._session.workspace.parts if self._session.workspace is not None else {}
 
-        self._actor_map.clear()
-        self._interactor_style.clear()
+        # frame the camera on arrivals only if nothing was shown, the diff below may empty the scene of parts
+        # that are merely being rebuilt
+        self._frame_arrivals = self._scene.is_empty()
 
-        if self._session.workspace is not None:
-            parts = self._session.workspace.parts
+        to_build, removed = self._scene.diff(parts)
 
-            self._scene_actors = VtkActorsBuilder({*parts.values()}, self._color_spec, self._render_spec) \
-                .get_vtk_actors(self._actor_map)
+        for assembly in removed:
+            self._renderer.RemoveActor(assembly)
 
-            for actor in self._scene_actors:
-                self._renderer.AddActor(actor)
+        # builds superseded by this change are not needed any more
+        for ticket, (name, future) in [*self._build_futures.items()]:
+            if not self._scene.is_pending(name, ticket):
+                future.cancel()
+                del self._build_futures[ticket]
+
+        for name, (ticket, part) in to_build.items():
+            future = self._build_executor.submit(self._build_part, name, ticket, part)
+            self._build_futures[ticket] = (name, future)
+
+        self._interactor_style.selection_tracker.retain_selection(self._actor_map.get_vtk_occ_actors())
+
+        self._interactor.update()
+
+    def _build_part(self, name: str, ticket: int, part: Part):
+        """
+        Runs on a worker thread.
+        """
+        if not self._scene.is_pending(name, ticket):
+            return
+
+        try:
+            actor_builder = self._scene.build(part)
+        except Exception as e:
+            logger.exception(f"Building part \"{name}\" failed")
+            self._part_built_emitter.partFailedSignal.emit(name, ticket, str(e))
+            return
+
+        self._part_built_emitter.partBuiltSignal.emit(name, ticket, actor_builder)
+
+    def _part_failed(self, name: str, ticket: int, message: str):
+        self._build_futures.pop(ticket, None)
+
+        if not self._scene.is_pending(name, ticket):
+            # superseded while building
+            return
+
+        self._scene.fail(name, ticket)
+
+        QtWidgets.QMessageBox.warning(self, "Display failed", f"Part \"{name}\" could not be displayed: {message}")
+
+    def _part_built(self, name: str, ticket: int, actor_builder: VtkActorBuilder):
+        self._build_futures.pop(ticket, None)
+
+        assembly = self._scene.add(name, ticket, actor_builder)
+
+        if assembly is None:
+            # superseded while building
+            return
+
+        self._renderer.AddActor(assembly)
+
+        if self._frame_arrivals:
+            self._renderer.ResetCamera()
 
-        self.selection_changed_signal.emit({})
-        self._renderer.ResetCamera()
         self._interactor.update()
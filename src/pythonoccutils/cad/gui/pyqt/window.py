@@ -30,6 +30,11 @@ class DisplayWindow(QtWidgets.QMainWindow):
 
         self.setCentralWidget(split_pane)
 
+    def closeEvent(self, event):
+        # the display frame is not a window, so only gets a close event from this
+        self._display_frame.close()
+        super().closeEvent(event)
+
     def deleteLater(self) -> None:
         self._session.listener_manager.remove_listener(self._session_changed)
         super().deleteLater()
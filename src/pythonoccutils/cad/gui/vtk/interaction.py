@@ -56,6 +56,22 @@ class MousePickingInteractorStyle(vtkmodules.vtkInteractionStyle.vtkInteractorSt
 
             self.mousePickingEmitter.selectionChangedSignal.emit(self._selected_elements)
 
+        def retain_selection(self, vtk_occ_actors: typing.Set[VtkOccActor]):
+            """
+            Drops the selection made on actors no longer displayed, and re-applies the remaining selection to the
+            current session workspace.
+            """
+            self._selected_elements = {a: subshapes for a, subshapes in self._selected_elements.items()
+                                       if a in vtk_occ_actors}
+
+            wsp = self._session.workspace
+            if wsp is not None:
+                for subshapes in self._selected_elements.values():
+                    for subshape in subshapes:
+                        wsp.select(subshape)
+
+            self.mousePickingEmitter.selectionChangedSignal.emit(self._selected_elements)
+
         def clear_selection(self):
             if self._locked:
                 return
@@ -120,6 +136,6 @@ class MousePickingInteractorStyle(vtkmodules.vtkInteractionStyle.vtkInteractorSt
 
         vtk_occ_actor = self._actor_map.get_vtk_occ_actor(actor)
 
-        subshape = vtk_occ_actor.cell_ids_to_subshapes.get(self._cell_picker.GetCellId(), None)
+        subshape = vtk_occ_actor.cell_shapes.shape_of(self._cell_picker.GetCellId())
 
         self.selection_tracker.append_selection(vtk_occ_actor, subshape)
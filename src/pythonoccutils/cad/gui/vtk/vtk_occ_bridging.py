@@ -1,17 +1,20 @@
 from __future__ import annotations
 
+import bisect
 import logging
 import math
 import typing
 
+import numpy
+from vtkmodules.util import numpy_support
 from vtkmodules.vtkCommonColor import vtkNamedColors
 from vtkmodules.vtkCommonCore import vtkUnsignedCharArray, vtkPoints
-from vtkmodules.vtkCommonDataModel import vtkCellArray, vtkPolyLine, vtkTriangle, vtkPolyData
+from vtkmodules.vtkCommonDataModel import vtkCellArray, vtkPolyLine, vtkPolyData
 from vtkmodules.vtkFiltersCore import vtkPolyDataNormals
 from vtkmodules.vtkRenderingCore import vtkActor, vtkPolyDataMapper, vtkAssembly
 
 from pythonoccutils.cad.gui.render_spec import RenderingColorSpec, RenderSpec
-from pythonoccutils.occutils_python import InterrogateUtils, Explorer, SetPlaceableShape
+from pythonoccutils.occutils_python import InterrogateUtils, Explorer, MeshCache, SetPlaceableShape, ShapeIndex
 from pythonoccutils.part_manager import Part
 
 import vtk_occ_bridge_swig
@@ -24,6 +27,52 @@ import OCC
 logger = logging.getLogger(__name__)
 
 
+class CellShapeRanges:
+    """
+    Maps the cells of a vtkPolyData back to the shapes they were generated from. The cells of a shape are pushed
+    consecutively, so each shape only needs a (start, end) range of cell ids, and cell lookups are a bisect over
+    the range starts.
+    """
+
+    def __init__(self):
+        self._starts: typing.List[int] = []
+        self._ends: typing.List[int] = []
+        self._shapes: typing.List[OCC.Core.TopoDS.TopoDS_Shape] = []
+        self._ranges_by_shape: typing.Dict[SetPlaceableShape, typing.List[typing.Tuple[int, int]]] = {}
+        self._cell_count = 0
+
+    def append(self, shape: typing.Optional[OCC.Core.TopoDS.TopoDS_Shape], cell_count: int) -> int:
+        """
+        Records the next cell_count cells as belonging to shape (if not None).
+        :return: the id of the first of the cells.
+        """
+        start = self._cell_count
+        self._cell_count += cell_count
+
+        if shape is not None and cell_count > 0:
+            self._starts.append(start)
+            self._ends.append(start + cell_count)
+            self._shapes.append(shape)
+            self._ranges_by_shape.setdefault(SetPlaceableShape(shape), []).append((start, start + cell_count))
+
+        return start
+
+    def shape_of(self, cell_id: int) -> typing.Optional[OCC.Core.TopoDS.TopoDS_Shape]:
+        i = bisect.bisect_right(self._starts, cell_id) - 1
+
+        if i < 0 or cell_id >= self._ends[i]:
+            return None
+
+        return self._shapes[i]
+
+    def cell_ids_of(self, shape: OCC.Core.TopoDS.TopoDS_Shape) -> typing.Generator[int, None, None]:
+        for start, end in self._ranges_by_shape.get(SetPlaceableShape(shape), []):
+            yield from range(start, end)
+
+    def __len__(self):
+        return self._cell_count
+
+
 class VtkOccActor:
 
     def __init__(self,
@@ -31,14 +80,12 @@ class VtkOccActor:
                  color_spec: RenderingColorSpec,
                  actor: vtkActor,
                  part: Part,
-                 cell_ids_to_subshapes: typing.Dict[int, OCC.Core.TopoDS.TopoDS_Shape],
-                 subshapes_to_cell_ids: typing.Dict[OCC.Core.TopoDS.TopoDS_Shape, typing.Set[int]]):
+                 cell_shapes: CellShapeRanges):
         self.name = name
         self.color_spec = color_spec
         self.actor = actor
         self.part = part
-        self.cell_ids_to_subshapes = cell_ids_to_subshapes
-        self.subshapes_to_cell_ids = subshapes_to_cell_ids
+        self.cell_shapes = cell_shapes
 
         self._saved_cell_states: typing.Dict[int, typing.Tuple[float, float, float]] = {}
 
@@ -54,25 +101,20 @@ class VtkOccActor:
         self.actor.GetMapper().GetInput().Modified()
 
     def highlight_subshape(self, subshape: OCC.Core.TopoDS.TopoDS_Shape):
-        cell_ids = self.subshapes_to_cell_ids.get(subshape)
+        cell_ids = self.cell_shapes.cell_ids_of(subshape)
 
         if subshape.ShapeType() == OCC.Core.TopoDS.TopoDS_Face:
             entity_colorspec = self.color_spec.faces_spec
         else:
             entity_colorspec = self.color_spec.edges_spec
 
-        is_highlight = False
-        # TODO: this is inefficient, SetPlaceableShape should be used in future
-        for subshapes in self.part.subshapes.values():
-            if subshape in subshapes:
-                is_highlight = True
-                break
+        is_highlight = len(self.part.labels_of(subshape)) > 0
 
         rgb = entity_colorspec.highlight_color if is_highlight else entity_colorspec.base_color
 
         self._highlight_cells(rgb, cell_ids)
 
-    def _highlight_cells(self, rgb, ids_to_highlight: typing.Set[int]):
+    def _highlight_cells(self, rgb, ids_to_highlight: typing.Iterable[int]):
         cell_scalars: vtkUnsignedCharArray = \
             self.actor.GetMapper().GetInput().GetCellData().GetScalars()
 
@@ -116,9 +158,20 @@ class VtkOccActorMap:
 
         self._part_map[vtk_occ_actor.part].add(vtk_actor)
 
+    def remove_entry(self, vtk_actor: vtkActor):
+        vtk_occ_actor = self._actor_map.pop(vtk_actor)
+
+        part_actors = self._part_map[vtk_occ_actor.part]
+        part_actors.discard(vtk_actor)
+        if len(part_actors) == 0:
+            del self._part_map[vtk_occ_actor.part]
+
     def get_vtk_occ_actor(self, vtk_actor: vtkActor) -> VtkOccActor:
         return self._actor_map[vtk_actor]
 
+    def get_vtk_occ_actors(self) -> typing.Set[VtkOccActor]:
+        return {*self._actor_map.values()}
+
     def get_vtk_actors(self, part: Part) -> typing.Set[vtkActor]:
         return self._part_map[part].copy()
 
@@ -130,65 +183,141 @@ class VtkActorBuilder:
         self._part = part
         self._named_colors = vtkNamedColors()
 
-        self.points = vtkPoints()
+        # points are collected as arrays, and only handed to vtk once all have been pushed
+        self._point_chunks: typing.List[numpy.ndarray] = []
+        self._pending_points: typing.List[typing.Tuple[float, float, float]] = []
         self._current_point_id = 0
+        self._points: typing.Optional[vtkPoints] = None
 
-        self._tris_cell_array = vtkCellArray()
-        self._tris_cell_array_colors = vtkUnsignedCharArray()
-        self._tris_cell_array_colors.SetNumberOfComponents(3)
-        self._tris_cell_ids_to_shapes = {}
-        self._tris_shapes_to_cell_ids = {}
+        self._tris_chunks: typing.List[numpy.ndarray] = []
+        self._tris_colors: typing.List[typing.Tuple[float, float, float]] = []
+        self._tris_shapes = CellShapeRanges()
 
         self._lines_cell_array = vtkCellArray()
         self._lines_cell_array_colors = vtkUnsignedCharArray()
         self._lines_cell_array_colors.SetNumberOfComponents(3)
-        self._lines_cell_ids_to_shapes = {}
-        self._lines_shapes_to_cell_ids = {}
+        self._lines_shapes = CellShapeRanges()
+
+        # point ids of edge polygons on face triangulations, filled in as faces are pushed
+        self._edge_point_ids: typing.Dict[SetPlaceableShape, numpy.ndarray] = {}
+
+        self._solid_data: typing.Optional[vtkPolyData] = None
+        self._edges_data: typing.Optional[vtkPolyData] = None
 
     def current_point_id(self):
         return self._current_point_id
 
     def push_point(self, x: float, y: float, z: float) -> int:
-        self.points.InsertNextPoint([x, y, z])
+        self._pending_points.append((x, y, z))
 
         result = self._current_point_id
 
         self._current_point_id += 1
         return result
 
+    def push_points(self, points: numpy.ndarray) -> int:
+        """
+        :param points: an (N, 3) array
+        :return: the id of the first point, the others follow consecutively.
+        """
+        self._flush_pending_points()
+        self._point_chunks.append(numpy.asarray(points, dtype=float).reshape(-1, 3))
+
+        result = self._current_point_id
+
+        self._current_point_id += len(self._point_chunks[-1])
+        return result
+
+    def register_edge_points(self, edge: OCC.Core.TopoDS.TopoDS_Edge, point_ids: numpy.ndarray):
+        """
+        Records the already pushed points an edge runs through, so the edge can be drawn without pushing them again.
+        The first registration of an edge wins.
+        """
+        self._edge_point_ids.setdefault(SetPlaceableShape(edge), point_ids)
+
+    def edge_point_ids(self, edge: OCC.Core.TopoDS.TopoDS_Edge) -> typing.Optional[numpy.ndarray]:
+        return self._edge_point_ids.get(SetPlaceableShape(edge), None)
+
+    def _flush_pending_points(self):
+        if len(self._pending_points) > 0:
+            self._point_chunks.append(numpy.array(self._pending_points, dtype=float))
+            self._pending_points = []
+
+    @property
+    def points(self) -> vtkPoints:
+        if self._points is None:
+            self._flush_pending_points()
+
+            all_points = numpy.concatenate(self._point_chunks) if len(self._point_chunks) > 0 else numpy.empty((0, 3))
+
+            self._points = vtkPoints()
+            self._points.SetData(numpy_support.numpy_to_vtk(all_points, deep=True))
+
+        return self._points
+
     def push_line(self,
                   poly_line: vtkPolyLine,
                   rgb: typing.Tuple[float, float, float],
                   shape: OCC.Core.TopoDS.TopoDS_Shape = None):
 
-        lcid = self._lines_cell_array.InsertNextCell(poly_line)
-        if shape is not None:
-            self._lines_cell_ids_to_shapes[lcid] = shape
-            self._lines_shapes_to_cell_ids[shape] = self._lines_shapes_to_cell_ids.get(shape, set())
-            self._lines_shapes_to_cell_ids[shape].add(lcid)
+        self._lines_cell_array.InsertNextCell(poly_line)
+        self._lines_shapes.append(shape, 1)
 
         self._lines_cell_array_colors.InsertNextTypedTuple(rgb)
 
-    def push_tri(self,
-                 tri: vtkTriangle,
-                 rgb: typing.Tuple[float, float, float],
-                 shape: OCC.Core.TopoDS.TopoDS_Shape = None):
+    def push_tris(self,
+                  tris: numpy.ndarray,
+                  rgb: typing.Tuple[float, float, float],
+                  shape: OCC.Core.TopoDS.TopoDS_Shape = None):
+        """
+        :param tris: an (N, 3) array of point ids
+        """
+        tris = numpy.asarray(tris).reshape(-1, 3)
 
-        tcid = self._tris_cell_array.InsertNextCell(tri)
-        if shape is not None:
-            self._tris_cell_ids_to_shapes[tcid] = shape
+        self._tris_chunks.append(tris)
+        self._tris_colors.append(rgb)
+        self._tris_shapes.append(shape, len(tris))
 
-            self._tris_shapes_to_cell_ids[shape] = self._tris_shapes_to_cell_ids.get(shape, set())
-            self._tris_shapes_to_cell_ids[shape].add(tcid)
+    def _build_tris_cell_array(self) -> typing.Tuple[vtkCellArray, vtkUnsignedCharArray]:
+        id_type = numpy_support.ID_TYPE_CODE
 
-        self._tris_cell_array_colors.InsertNextTypedTuple(rgb)
+        if len(self._tris_chunks) > 0:
+            connectivity = numpy.concatenate(self._tris_chunks).astype(id_type).ravel()
+        else:
+            connectivity = numpy.empty(0, dtype=id_type)
+
+        offsets = numpy.arange(0, len(connectivity) + 1, 3, dtype=id_type)
+
+        cell_array = vtkCellArray()
+        cell_array.SetData(
+            numpy_support.numpy_to_vtkIdTypeArray(offsets, deep=True),
+            numpy_support.numpy_to_vtkIdTypeArray(connectivity, deep=True))
+
+        # one colour per pushed chunk, repeated for each of its triangles
+        colors = numpy.repeat(
+            numpy.array(self._tris_colors, dtype=numpy.uint8).reshape(-1, 3),
+            [len(c) for c in self._tris_chunks],
+            axis=0)
+
+        cell_colors = numpy_support.numpy_to_vtk(colors, deep=True, array_type=numpy_support.get_vtk_array_type(numpy.uint8))
+
+        return cell_array, cell_colors
+
+    def build_data(self):
+        """
+        Builds the vtkPolyData of the solid and edge actors from everything pushed so far. This does not create any
+        rendering objects, so may be done off the GUI thread, see VtkOccScene.
+        """
+        if self._solid_data is not None:
+            return
+
+        tris_cell_array, tris_cell_array_colors = self._build_tris_cell_array()
 
-    def build_actor_solid(self) -> VtkOccActor:
         data = vtkPolyData()
         data.SetPoints(self.points)
 
-        data.SetPolys(self._tris_cell_array)
-        data.GetCellData().SetScalars(self._tris_cell_array_colors)
+        data.SetPolys(tris_cell_array)
+        data.GetCellData().SetScalars(tris_cell_array_colors)
 
         poly_data_normals = vtkPolyDataNormals()
         poly_data_normals.SetInputData(data)
@@ -196,10 +325,21 @@ class VtkActorBuilder:
         poly_data_normals.ComputePointNormalsOn()
         poly_data_normals.Update()
 
-        data = poly_data_normals.GetOutput()
+        self._solid_data = poly_data_normals.GetOutput()
+
+        data = vtkPolyData()
+        data.SetPoints(self.points)
+
+        data.SetLines(self._lines_cell_array)
+        data.GetCellData().SetScalars(self._lines_cell_array_colors)
+
+        self._edges_data = data
+
+    def build_actor_solid(self) -> VtkOccActor:
+        self.build_data()
 
         data_mapper = vtkPolyDataMapper()
-        data_mapper.SetInputData(data)
+        data_mapper.SetInputData(self._solid_data)
 
         result = vtkActor()
         result.SetMapper(data_mapper)
@@ -212,18 +352,13 @@ class VtkActorBuilder:
                            self._color_spec,
                            result,
                            self._part,
-                           self._tris_cell_ids_to_shapes,
-                           self._tris_shapes_to_cell_ids)
+                           self._tris_shapes)
 
     def build_actor_edges(self) -> VtkOccActor:
-        data = vtkPolyData()
-        data.SetPoints(self.points)
-
-        data.SetLines(self._lines_cell_array)
-        data.GetCellData().SetScalars(self._lines_cell_array_colors)
+        self.build_data()
 
         data_mapper = vtkPolyDataMapper()
-        data_mapper.SetInputData(data)
+        data_mapper.SetInputData(self._edges_data)
 
         result = vtkActor()
         result.SetMapper(data_mapper)
@@ -238,8 +373,7 @@ class VtkActorBuilder:
                            self._color_spec,
                            result,
                            self._part,
-                           self._lines_cell_ids_to_shapes,
-                           self._lines_shapes_to_cell_ids)
+                           self._lines_shapes)
 
     def build_assembly(self, actor_map: VtkOccActorMap) -> vtkAssembly:
         solid_actor = self.build_actor_solid()
@@ -257,6 +391,9 @@ class VtkActorBuilder:
 
 class VtkActorsBuilder:
 
+    LINEAR_DEFLECTION = 0.2
+    ANGULAR_DEFLECTION = 30 * 2 * math.pi / 360
+
     def __init__(self,
                  parts: typing.Set[Part],
                  color_spec: RenderingColorSpec,
@@ -269,10 +406,13 @@ class VtkActorsBuilder:
     @staticmethod
     def _triangulate_shape(shape):
         logger.debug(f"Triangulating shape: {shape}")
-        OCC.Core.BRepTools.breptools.Clean(shape)
 
-        tri_algo = OCC.Core.BRepMesh.BRepMesh_DiscretFactory_Get().Discret(shape, 0.2, 30 * 2 * math.pi / 360)
-        tri_algo.Perform()
+        # unchanged parts keep their mesh between session changes. The bridge mesher releases the GIL, so meshing on a
+        # worker thread does not stall the GUI thread
+        MeshCache.instance().mesh(shape,
+                                  VtkActorsBuilder.LINEAR_DEFLECTION,
+                                  VtkActorsBuilder.ANGULAR_DEFLECTION,
+                                  mesher=vtk_occ_bridge_swig.Visualization.mesh)
 
         logger.debug("Triangulation finished")
 
@@ -286,24 +426,23 @@ class VtkActorsBuilder:
             # nothing to do
             return
 
-        pot: OCC.Core.Poly.Poly_PolygonOnTriangulation = pot_result.pot()
-        pt: OCC.Core.Poly.Poly_Triangulation = pot_result.pt()
-        loc: OCC.Core.TopLoc.TopLoc_Location = pot_result.loc()
+        point_ids = actor_builder.edge_point_ids(edge)
 
-        # push points to the builder
-        pt_ids_to_vtk_ids = {}
-        for i in range(1, pt.NbNodes() + 1):
-            pnt = pt.Nodes().Value(i)
-            pnt = pnt.Transformed(loc.Transformation())
-            pt_ids_to_vtk_ids[i] = actor_builder.push_point(pnt.X(), pnt.Y(), pnt.Z())
+        if point_ids is None:
+            # the owning face was not pushed, only push the nodes the polygon refers to
+            pot: OCC.Core.Poly.Poly_PolygonOnTriangulation = pot_result.pot()
+            pt: OCC.Core.Poly.Poly_Triangulation = pot_result.pt()
+            loc: OCC.Core.TopLoc.TopLoc_Location = pot_result.loc()
+
+            point_ids = []
+            for i in range(1, pot.NbNodes() + 1):
+                pnt = pt.Nodes().Value(pot.Nodes().Value(i)).Transformed(loc.Transformation())
+                point_ids.append(actor_builder.push_point(pnt.X(), pnt.Y(), pnt.Z()))
 
-        # now iterate through polygon, converting pt_ids to vtk ids
         poly_line = vtkPolyLine()
-        poly_line.GetPointIds().SetNumberOfIds(pot.NbNodes())
-        for i in range(1, pot.NbNodes() + 1):
-            point_id = pot.Nodes().Value(i)
-            vtk_point_id = pt_ids_to_vtk_ids[point_id]
-            poly_line.GetPointIds().SetId(i - 1, vtk_point_id)
+        poly_line.GetPointIds().SetNumberOfIds(len(point_ids))
+        for i, point_id in enumerate(point_ids):
+            poly_line.GetPointIds().SetId(i, int(point_id))
 
         actor_builder.push_line(
             poly_line,
@@ -370,38 +509,32 @@ class VtkActorsBuilder:
                                    actor_builder: VtkActorBuilder,
                                    face: OCC.Core.TopoDS.TopoDS_Face,
                                    label: typing.Optional[str]):
-        loc = OCC.Core.TopLoc.TopLoc_Location()
-        tri = OCC.Core.BRep.BRep_Tool_Triangulation(face, loc)
+        # the bridge fills vtk arrays in C++, vtk_to_numpy views them without copying
+        nodes = numpy_support.vtk_to_numpy(vtk_occ_bridge_swig.Visualization.triangulationNodes(face))
 
-        if tri is None:
+        if len(nodes) == 0:
+            # not triangulated
             return
 
-        point_array = tri.Nodes()
-        pnt_ids = {}
-        for i in range(1, tri.NbNodes() + 1):
-            pnt = point_array.Value(i)
-            pnt = pnt.Transformed(loc.Transformation())
+        tris = numpy_support.vtk_to_numpy(vtk_occ_bridge_swig.Visualization.triangulationTriangles(face))
 
-            vtk_id = actor_builder.push_point(pnt.X(), pnt.Y(), pnt.Z())
-            pnt_ids[i] = vtk_id
+        first_point_id = actor_builder.push_points(nodes.reshape(-1, 3))
 
-        tris = tri.Triangles()
-        for i in range(1, tri.NbTriangles() + 1):
-            ia, ib, ic = tris.Value(i).Get()
-            vtk_ia = pnt_ids[ia]
-            vtk_ib = pnt_ids[ib]
-            vtk_ic = pnt_ids[ic]
+        actor_builder.push_tris(tris.reshape(-1, 3) + first_point_id,
+                                self._color_spec.faces_spec.base_color \
+                                    if label is None \
+                                    else self._color_spec.faces_labelled_spec.base_color,
+                                shape=face)
 
-            t = vtkTriangle()
-            t.GetPointIds().SetId(0, vtk_ia)
-            t.GetPointIds().SetId(1, vtk_ib)
-            t.GetPointIds().SetId(2, vtk_ic)
+        # edges of the face are drawn through the points just pushed, rather than through copies of them
+        for edge in Explorer.edge_explorer(face, unique=True).get():
+            if actor_builder.edge_point_ids(edge) is not None:
+                continue
 
-            actor_builder.push_tri(t,
-                                   self._color_spec.faces_spec.base_color \
-                                   if label is None \
-                                   else self._color_spec.faces_labelled_spec.base_color,
-                                   shape=face)
+            edge_nodes = numpy_support.vtk_to_numpy(
+                vtk_occ_bridge_swig.Visualization.polygonOnTriangulationNodes(edge, face))
+            if len(edge_nodes) > 0:
+                actor_builder.register_edge_points(edge, edge_nodes + first_point_id)
 
         if self._render_spec.visualize_face_normals:
             try:
@@ -413,37 +546,204 @@ class VtkActorsBuilder:
         result = set()
 
         for part in self._parts:
-            result.add(self._get_vtk_actor(part, actor_map))
+            result.add(self.get_vtk_actor(part, actor_map))
 
 
         return result
 
-    def _get_vtk_actor(self, part: Part, actor_map: VtkOccActorMap) -> vtkAssembly:
+    def get_vtk_actor(self, part: Part, actor_map: VtkOccActorMap) -> vtkAssembly:
+        return self.build_part(part).build_assembly(actor_map)
+
+    def build_part(self, part: Part) -> VtkActorBuilder:
+        """
+        Meshes the part and builds its vtkPolyData, leaving only the creation of the actors to
+        VtkActorBuilder#build_assembly. Safe to call off the GUI thread.
+        """
+        # the triangulations are copied out of OCC under the lock, as they may otherwise be cleaned by a concurrent
+        # MeshCache#mesh of a shape sharing faces with the part, or by Session#build_workspace. Building the
+        # vtkPolyData from the copies needs no lock.
+        with MeshCache.instance().lock:
+            actor_builder = self._collect_part(part)
+
+        actor_builder.build_data()
 
+        return actor_builder
+
+    def _collect_part(self, part: Part) -> VtkActorBuilder:
         VtkActorsBuilder._triangulate_shape(part.shape)
 
         actor_builder = VtkActorBuilder(self._color_spec, part)
-        added_shapes = set()
+        added_shapes = ShapeIndex()
 
-        for label, shapelist in part.subshapes.items():
+        # faces go first, so that edges can reuse the points of the face triangulations
+        labelled_edges = []
+        for label, shapelist in part.subshape_map.items():
             for s in shapelist:
                 if s.ShapeType() == OCC.Core.TopAbs.TopAbs_EDGE:
-                    self._process_triangulated_edge(actor_builder, s, label)
-                    added_shapes.add(SetPlaceableShape(s))
+                    labelled_edges.append((s, label))
+                    added_shapes.add(s)
                 elif s.ShapeType() == OCC.Core.TopAbs.TopAbs_FACE:
                     self._process_triangulated_face(actor_builder, s, label)
-                    added_shapes.add(SetPlaceableShape(s))
+                    added_shapes.add(s)
 
-        for f in Explorer.face_explorer(part.shape).get():
-            if SetPlaceableShape(f) in added_shapes:
+        for f in Explorer.face_explorer(part.shape, unique=True).get():
+            if f in added_shapes:
                 continue
 
             self._process_triangulated_face(actor_builder, f, None)
 
-        for e in Explorer.edge_explorer(part.shape).get():
-            if SetPlaceableShape(e) in added_shapes:
+        for e, label in labelled_edges:
+            self._process_triangulated_edge(actor_builder, e, label)
+
+        for e in Explorer.edge_explorer(part.shape, unique=True).get():
+            if e in added_shapes:
                 continue
 
             self._process_triangulated_edge(actor_builder, e, None)
 
-        return actor_builder.build_assembly(actor_map)
+        return actor_builder
+
+
+class VtkOccScene:
+    """
+    Tracks the assemblies displayed for a set of named parts. Parts are compared with the displayed ones by name and
+    shape identity, and actors are only built for the parts that changed: editing one part of a large workspace
+    rebuilds one assembly rather than all of them.
+
+    Building is split in three steps so that meshing can be moved off the GUI thread: #diff determines what needs
+    building and hands out a ticket per part, #build (thread safe) meshes the part, and #add creates the actors.
+    Each diff supersedes the tickets of parts that changed again, so #add discards results that went stale in the
+    meantime, and failed builds are reported through #fail. #update performs all three synchronously.
+    """
+
+    class Entry:
+
+        def __init__(self, key: typing.Tuple, assembly: vtkAssembly, vtk_actors: typing.List[vtkActor]):
+            self.key = key
+            self.assembly = assembly
+            self.vtk_actors = vtk_actors
+
+    def __init__(self,
+                 actor_map: VtkOccActorMap,
+                 color_spec: RenderingColorSpec,
+                 render_spec: RenderSpec):
+        self._actor_map = actor_map
+        self._color_spec = color_spec
+        self._render_spec = render_spec
+        self._entries: typing.Dict[str, VtkOccScene.Entry] = {}
+
+        # parts waiting for #add, by name: (key, ticket)
+        self._pending: typing.Dict[str, typing.Tuple[typing.Tuple, int]] = {}
+        self._next_ticket = 0
+
+    @staticmethod
+    def part_key(part: Part) -> typing.Tuple:
+        """
+        :return: a key that is equal for two parts iff they display the same, i.e. share the shape (IsSame and
+            orientation) and label the same subshapes.
+        """
+        labels = frozenset((label, tuple(SetPlaceableShape(s) for s in shapes))
+                           for label, shapes in part.subshape_map.items())
+
+        return SetPlaceableShape(part.shape), part.shape.Orientation(), labels
+
+    def is_empty(self) -> bool:
+        return len(self._entries) == 0
+
+    def is_pending(self, name: str, ticket: int) -> bool:
+        pending = self._pending.get(name, None)
+        return pending is not None and pending[1] == ticket
+
+    def update(self, parts: typing.Dict[str, Part]) -> typing.Tuple[typing.Set[vtkAssembly], typing.Set[vtkAssembly]]:
+        """
+        Brings the scene in line with parts, updating the actor map accordingly.
+
+        :return: the assemblies to add to, and to remove from, the renderer.
+        """
+        to_build, removed = self.diff(parts)
+
+        added = {self.add(name, ticket, self.build(part)) for name, (ticket, part) in to_build.items()}
+
+        logger.debug(f"Scene updated, {len(added)} assemblies built, {len(removed)} removed")
+
+        return added, removed
+
+    def diff(self, parts: typing.Dict[str, Part]) \
+            -> typing.Tuple[typing.Dict[str, typing.Tuple[int, Part]], typing.Set[vtkAssembly]]:
+        """
+        Removes the displayed parts that are no longer in parts or have changed.
+
+        :return: the parts that need building, by name, with the ticket to #add them with; and the assemblies to
+            remove from the renderer.
+        """
+        removed = set()
+
+        for name in [n for n in self._entries.keys() if n not in parts]:
+            removed.add(self._remove(name))
+
+        for name in [n for n in self._pending.keys() if n not in parts]:
+            del self._pending[name]
+
+        to_build = {}
+        for name, part in parts.items():
+            key = VtkOccScene.part_key(part)
+
+            entry = self._entries.get(name, None)
+            if entry is not None and entry.key == key:
+                continue
+
+            pending = self._pending.get(name, None)
+            if pending is not None and pending[0] == key:
+                # still being built
+                continue
+
+            if entry is not None:
+                removed.add(self._remove(name))
+
+            ticket = self._next_ticket
+            self._next_ticket += 1
+
+            self._pending[name] = (key, ticket)
+            to_build[name] = (ticket, part)
+
+        return to_build, removed
+
+    def build(self, part: Part) -> VtkActorBuilder:
+        return VtkActorsBuilder({part}, self._color_spec, self._render_spec).build_part(part)
+
+    def add(self, name: str, ticket: int, actor_builder: VtkActorBuilder) -> typing.Optional[vtkAssembly]:
+        """
+        :return: the assembly to add to the renderer, or None if the ticket has been superseded.
+        """
+        if not self.is_pending(name, ticket):
+            return None
+
+        key, _ = self._pending.pop(name)
+
+        assembly = actor_builder.build_assembly(self._actor_map)
+        self._entries[name] = VtkOccScene.Entry(key, assembly, [a for a in assembly.GetParts()])
+
+        return assembly
+
+    def fail(self, name: str, ticket: int):
+        """
+        Drops a pending part whose build failed, so that the next #diff builds it again.
+        """
+        if self.is_pending(name, ticket):
+            del self._pending[name]
+
+    def clear(self) -> typing.Set[vtkAssembly]:
+        """
+        :return: the assemblies to remove from the renderer.
+        """
+        self._pending.clear()
+
+        return {self._remove(name) for name in [*self._entries.keys()]}
+
+    def _remove(self, name: str) -> vtkAssembly:
+        entry = self._entries.pop(name)
+
+        for vtk_actor in entry.vtk_actors:
+            self._actor_map.remove_entry(vtk_actor)
+
+        return entry.assembly
@@ -1,5 +1,6 @@
 import typing
 
+import pythonoccutils.occutils_python as op
 from pythonoccutils.cad.model.event import Listenable, SessionEvent, SessionEventType
 from pythonoccutils.cad.model.work_unit import WorkUnit
 from pythonoccutils.cad.model.work_unit_factory import WorkUnitCommandFactory
@@ -79,7 +80,10 @@ class Session(Listenable):
             return None
 
         try:
-            self._workspace = self._selected_unit.perform()
+            # the viewer meshes parts of the previous workspace on worker threads, which writes to the TShapes the
+            # work units model on, so wait for an in-flight mesh and keep new ones out until done
+            with op.MeshCache.instance().lock:
+                self._workspace = self._selected_unit.perform()
         except BaseException as e:
             self._workspace = None
             self._error_state = e
@@ -1,5 +1,6 @@
 import typing
 
+import pythonoccutils.occutils_python as op
 from pythonoccutils.cad.model.work_unit import WorkUnitCommand
 from pythonoccutils.cad.model.workspace.workspace import Workspace
 from pythonoccutils.part_manager import PartFactory, PartQuery, Part
@@ -81,7 +82,7 @@ class FilletWorkUnitCommand(WorkUnitCommand):
             self._perform)
 
     def _perform(self, part: Part) -> Part:
-        shape_list = PartQuery(part, False)(self._cmd_args['edge_query'].value)
+        shape_list = op.ShapeIndex(PartQuery.compile(self._cmd_args['edge_query'].value).get_shapes(part))
 
         return part.fillet.fillet_edges(self._cmd_args['radius'].value, lambda e: e in shape_list)
 
@@ -2,7 +2,6 @@ import typing
 
 from pythonoccutils.cad.gui.vtk.vtk_occ_bridging import SetPlaceableShape
 from pythonoccutils.cad.model.event import Listenable, SessionEvent, SessionEventType
-from pythonoccutils.occutils_python import InterrogateUtils
 from pythonoccutils.part_manager import Part
 
 
@@ -39,7 +38,7 @@ class Workspace(Listenable):
         result = set()
 
         for name, part in self._parts.items():
-            if any(InterrogateUtils.is_parent_shape(part.shape, s) for s in self._selection):
+            if any(part.topology.contains(s) for s in self._selection):
                 result.add(name)
 
         return result
@@ -107,7 +107,7 @@ class InvoluteGearFactory:
         logger.info("Building wire")
         wire = SVGPathParser.parse_wire(svg_path)
 
-        result = Part(wire).explore.wire.get()[0]
+        result = Part(wire).explore.wire.first()
 
         return self.profile_modifier_hook(result)
 
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
+import bisect
+import collections
+import itertools
 import logging
 import math
 import re
+import threading
 import typing
 from enum import Enum
 from enum import unique
 
+import numpy
+
 import OCC
 import OCC.Core as oc
 import OCC.Core.BRep
@@ -32,6 +38,7 @@ import OCC.Core.Geom2d
 import OCC.Core.GeomAPI
 import OCC.Core.GeomAbs
 import OCC.Core.GeomLProp
+import OCC.Core.Precision
 import OCC.Core.STEPControl
 import OCC.Core.ShapeAnalysis
 import OCC.Core.ShapeFix
@@ -40,6 +47,7 @@ import OCC.Core.StdFail
 import OCC.Core.StlAPI
 import OCC.Core.TColgp
 import OCC.Core.TopAbs
+import OCC.Core.TopLoc
 import OCC.Core.TopExp
 import OCC.Core.TopTools
 import OCC.Core.TopTools
@@ -57,14 +65,37 @@ LOGGER = logging.getLogger("occutils_python")
 
 class Extents:
 
+    @unique
+    class Precision(Enum):
+        """
+        How the bounding box of a shape is computed, from cheapest to most precise.
+        """
+
+        # BRepBndLib.Add on the geometry. Never smaller than the shape, may be noticeably larger, e.g. for curved faces
+        FAST = 0
+
+        # BRepBndLib.Add using the triangulation where the shape has been meshed, falling back to FAST otherwise
+        TRIANGULATION = 1
+
+        # BRepBndLib.AddOptimal, the tightest axis aligned box
+        OPTIMAL = 2
+
+        # axis aligned box surrounding the optimal oriented bounding box. Also exposes Extents#oriented_box
+        OBB = 3
+
+    _default_precision: Extents.Precision = Precision.OPTIMAL
+
     swizzle_property_name = re.compile("[xyz]+_(mid|min|max|span)")
 
-    def __init__(self, shape=None):
+    def __init__(self, shape=None, precision: Extents.Precision = None):
+        self.oriented_box = None
+
         if shape is not None:
-            bnd_box = OCC.Core.Bnd.Bnd_Box()
-            OCC.Core.BRepBndLib.brepbndlib_AddOptimal(shape, bnd_box, False, False)
+            precision = Extents.resolve_precision(precision)
 
-            self._cache_bndbox_fields(bnd_box)
+            bounds, self.oriented_box = Extents._cached_bounds(shape, precision)
+
+            self.x_min, self.y_min, self.z_min, self.x_max, self.y_max, self.z_max = bounds
         else:
             self.x_min = 0
             self.y_min = 0
@@ -143,15 +174,241 @@ class Extents:
         result.z_max = self.z_max + amount_z_plus
         return result
 
+    @staticmethod
+    def get_default_precision() -> Extents.Precision:
+        return Extents._default_precision
+
+    @staticmethod
+    def set_default_precision(precision: Extents.Precision):
+        """
+        Sets the precision used when none is specified explicitly. Defaults to OPTIMAL.
+        """
+        if precision is None:
+            raise ValueError("Default precision may not be None")
+
+        Extents._default_precision = precision
+
+    @staticmethod
+    def resolve_precision(precision: typing.Optional[Extents.Precision]) -> Extents.Precision:
+        """
+        :return: precision, or the default precision if it is None.
+        """
+        return Extents._default_precision if precision is None else precision
+
+    @staticmethod
+    def _cached_bounds(shape: OCC.Core.TopoDS.TopoDS_Shape,
+                       precision: Extents.Precision) -> typing.Tuple[typing.Tuple[float, ...], OCC.Core.Bnd.Bnd_OBB]:
+        """
+        :return: the bounds as (x_min, y_min, z_min, x_max, y_max, z_max), and the oriented box for the OBB
+        precision (None otherwise). Cached in the PropertyCache, except for the TRIANGULATION precision, which
+        depends on whatever mesh the shape carries at the time.
+        """
+        def compute():
+            oriented_box = Extents._compute_oriented_box(shape) if precision == Extents.Precision.OBB else None
+            return Extents._compute_bnd_box(shape, precision, oriented_box).Get(), oriented_box
+
+        if precision == Extents.Precision.TRIANGULATION:
+            return compute()
+
+        return PropertyCache.instance().get("extents", shape, compute, precision)
+
+    @staticmethod
+    def _compute_oriented_box(shape: OCC.Core.TopoDS.TopoDS_Shape) -> OCC.Core.Bnd.Bnd_OBB:
+        obb = OCC.Core.Bnd.Bnd_OBB()
+        OCC.Core.BRepBndLib.brepbndlib_AddOBB(shape, obb, True, True, False)
+        return obb
+
+    @staticmethod
+    def _compute_bnd_box(shape: OCC.Core.TopoDS.TopoDS_Shape,
+                         precision: Extents.Precision,
+                         oriented_box: OCC.Core.Bnd.Bnd_OBB = None) -> OCC.Core.Bnd.Bnd_Box:
+        bnd_box = OCC.Core.Bnd.Bnd_Box()
+
+        if precision == Extents.Precision.FAST:
+            OCC.Core.BRepBndLib.brepbndlib_Add(shape, bnd_box, False)
+        elif precision == Extents.Precision.TRIANGULATION:
+            OCC.Core.BRepBndLib.brepbndlib_Add(shape, bnd_box, True)
+        elif precision == Extents.Precision.OPTIMAL:
+            OCC.Core.BRepBndLib.brepbndlib_AddOptimal(shape, bnd_box, False, False)
+        elif precision == Extents.Precision.OBB:
+            if oriented_box is None:
+                oriented_box = Extents._compute_oriented_box(shape)
+
+            center = oriented_box.Center()
+            half_axes = [
+                (oriented_box.XDirection(), oriented_box.XHSize()),
+                (oriented_box.YDirection(), oriented_box.YHSize()),
+                (oriented_box.ZDirection(), oriented_box.ZHSize())]
+
+            for signs in itertools.product([-1, 1], repeat=3):
+                corner = OCC.Core.gp.gp_XYZ(center.X(), center.Y(), center.Z())
+                for sign, (direction, half_size) in zip(signs, half_axes):
+                    corner.Add(direction.Multiplied(sign * half_size))
+
+                bnd_box.Add(gp_Pnt(corner))
+        else:
+            raise ValueError(f"Unsupported precision: {precision}")
+
+        return bnd_box
+
+    @staticmethod
+    def bulk(shapes: typing.Union[typing.Iterable[OCC.Core.TopoDS.TopoDS_Shape], Explorer],
+             precision: Extents.Precision = None) -> numpy.ndarray:
+        """
+        Computes the extents of many shapes at once.
+        :param shapes: the shapes, or an Explorer that provides them.
+        :param precision: see Extents.Precision, uses the default precision if not specified.
+        :return: an (N, 6) array, where each row is x_min, y_min, z_min, x_max, y_max, z_max of the corresponding
+        shape. See #mins, #maxs, #spans and #mids for vectorised access.
+        """
+        if isinstance(shapes, Explorer):
+            shapes = shapes.get()
+
+        shapes = [s for s in shapes]
+
+        precision = Extents.resolve_precision(precision)
+
+        result = numpy.empty((len(shapes), 6))
+
+        for i, shape in enumerate(shapes):
+            result[i] = Extents._cached_bounds(shape, precision)[0]
+
+        return result
+
+    @staticmethod
+    def mins(bounds: numpy.ndarray) -> numpy.ndarray:
+        """
+        :return: the (N, 3) min coordinates of an array returned by #bulk
+        """
+        return bounds[:, 0:3]
+
+    @staticmethod
+    def maxs(bounds: numpy.ndarray) -> numpy.ndarray:
+        """
+        :return: the (N, 3) max coordinates of an array returned by #bulk
+        """
+        return bounds[:, 3:6]
+
+    @staticmethod
+    def spans(bounds: numpy.ndarray) -> numpy.ndarray:
+        """
+        :return: the (N, 3) spans of an array returned by #bulk
+        """
+        return bounds[:, 3:6] - bounds[:, 0:3]
+
+    @staticmethod
+    def mids(bounds: numpy.ndarray) -> numpy.ndarray:
+        """
+        :return: the (N, 3) midpoints of an array returned by #bulk
+        """
+        return bounds[:, 0:3] + 0.5 * (bounds[:, 3:6] - bounds[:, 0:3])
+
     def _cache_bndbox_fields(self, bnd_box):
         self.x_min, self.y_min, self.z_min, self.x_max, self.y_max, self.z_max = \
             bnd_box.Get()
 
+    @staticmethod
+    def is_axis_preserving(trsf: OCC.Core.gp.gp_Trsf) -> bool:
+        """
+        :return: True if trsf is a translation and/or uniform scaling, i.e. maps axis aligned boxes to axis aligned
+        boxes, see #transformed.
+        """
+        tol = OCC.Core.Precision.precision.Confusion()
+
+        # vectorial part is the rotation, the scale factor is applied separately
+        mat = trsf.HVectorialPart()
+        for row in range(1, 4):
+            for col in range(1, 4):
+                if math.fabs(mat.Value(row, col) - (1 if row == col else 0)) > tol:
+                    return False
+
+        return True
+
+    def transformed(self, trsf: OCC.Core.gp.gp_Trsf) -> typing.Optional[Extents]:
+        """
+        :return: the extents of the shape after applying trsf, computed from these extents without touching the
+        shape. Only possible for translations and uniform scaling, None is returned for any transformation that
+        rotates the box, or if these extents carry an oriented box.
+        """
+        if self.oriented_box is not None or not Extents.is_axis_preserving(trsf):
+            return None
+
+        factor = trsf.ScaleFactor()
+        offset = trsf.TranslationPart()
+
+        result = Extents()
+        for axis, d in zip("xyz", [offset.X(), offset.Y(), offset.Z()]):
+            v0 = factor * getattr(self, f"{axis}_min") + d
+            v1 = factor * getattr(self, f"{axis}_max") + d
+
+            setattr(result, f"{axis}_min", min(v0, v1))
+            setattr(result, f"{axis}_max", max(v0, v1))
+
+        return result
+
     def get_box(self):
         return OCC.Core.BRepPrimAPI.BRepPrimAPI_MakeBox(
             gp_Pnt(*self.min),
             gp_Pnt(*self.max)).Shape()
 
+    def intersects(self, other: Extents, tolerance: float = 0) -> bool:
+        """
+        :return: True if the boxes overlap or touch, after enlarging this box by tolerance on all sides.
+        """
+        return self.x_min - tolerance <= other.x_max and other.x_min <= self.x_max + tolerance and \
+            self.y_min - tolerance <= other.y_max and other.y_min <= self.y_max + tolerance and \
+            self.z_min - tolerance <= other.z_max and other.z_min <= self.z_max + tolerance
+
+
+class ExtentsIndex:
+    """
+    Sweep and prune index over a fixed list of Extents, used to find intersecting boxes without testing
+    every pair.
+    """
+
+    def __init__(self, extents: typing.List[Extents], tolerance: float = 0):
+        self._extents = [e for e in extents]
+        self._tolerance = tolerance
+
+        self._order = sorted(range(len(self._extents)), key=lambda i: self._extents[i].x_min)
+        self._x_mins = [self._extents[i].x_min for i in self._order]
+
+    def __len__(self):
+        return len(self._extents)
+
+    def query(self, extents: Extents) -> typing.List[int]:
+        """
+        :return: the indices of the indexed Extents that intersect the supplied extents, in ascending order.
+        """
+
+        # boxes starting beyond the end of the query box cannot intersect it
+        candidate_count = bisect.bisect_right(self._x_mins, extents.x_max + self._tolerance)
+
+        return sorted(i for i in self._order[:candidate_count]
+                      if extents.intersects(self._extents[i], self._tolerance))
+
+    def isolated(self) -> typing.List[int]:
+        """
+        :return: the indices of the indexed Extents that intersect no other indexed Extents, in ascending order.
+        """
+        has_overlap = [False] * len(self._extents)
+
+        active = []
+        for i in self._order:
+            e = self._extents[i]
+
+            # drop boxes that end before this one starts
+            active = [a for a in active if self._extents[a].x_max + self._tolerance >= e.x_min]
+
+            for a in active:
+                if e.intersects(self._extents[a], self._tolerance):
+                    has_overlap[a] = True
+                    has_overlap[i] = True
+
+            active.append(i)
+
+        return [i for i, o in enumerate(has_overlap) if not o]
+
 
 class EllipseParams:
 
@@ -1093,37 +1350,149 @@ class IOUtils:
                        filename: str,
                        lin_deflection: float = 0.01,
                        ang_deflection: float = 0.5):
-        mesh = OCC.Core.BRepMesh.BRepMesh_IncrementalMesh(
-            shape,
-            lin_deflection,
-            False,
-            ang_deflection)
+        MeshCache.instance().mesh(shape, lin_deflection, ang_deflection)
 
         writer = OCC.Core.StlAPI.StlAPI_Writer()
 
-        if not writer.Write(mesh.Shape(), filename):
+        if not writer.Write(shape, filename):
             raise RuntimeError("Could not write shape")
 
 
+class BoolOptions:
+    """
+    Options applied to BRepAlgoAPI boolean operations. Operations that are not supplied options explicitly use the
+    process-wide default, see #set_default.
+    """
+
+    _default: BoolOptions = None
+
+    def __init__(self,
+                 run_parallel: bool = False,
+                 fuzzy_value: float = None,
+                 use_obb: bool = False,
+                 check_inverted: bool = True,
+                 prefilter: bool = False):
+        """
+        :param run_parallel: use OCC's built-in parallel processing for the operation.
+        :param fuzzy_value: additional tolerance used to resolve near-coincident geometry. None leaves the
+        algorithm default.
+        :param use_obb: use oriented bounding boxes to filter interfering shapes, which helps when many tools
+        are not axis aligned.
+        :param check_inverted: check the inputs for inverted solids. Disable for a small speedup when inputs are
+        known to be valid.
+        :param prefilter: compare bounding boxes before running Part booleans. Cut/common tools that cannot touch
+        the target are dropped, and union tools that touch nothing are added as a compound instead of being fused.
+        """
+        self.run_parallel = run_parallel
+        self.fuzzy_value = fuzzy_value
+        self.use_obb = use_obb
+        self.check_inverted = check_inverted
+        self.prefilter = prefilter
+
+    def updated(self, **kwargs) -> BoolOptions:
+        """
+        :return: a copy of these options with the specified fields replaced.
+        """
+        fields = {
+            "run_parallel": self.run_parallel,
+            "fuzzy_value": self.fuzzy_value,
+            "use_obb": self.use_obb,
+            "check_inverted": self.check_inverted,
+            "prefilter": self.prefilter
+        }
+
+        for k in kwargs.keys():
+            if k not in fields:
+                raise ValueError(f"Unknown bool option: {k}")
+
+        fields.update(kwargs)
+
+        return BoolOptions(**fields)
+
+    def apply(self, algo: OCC.Core.BRepAlgoAPI.BRepAlgoAPI_BooleanOperation):
+        """
+        Configures the algorithm with these options. Must be called before the algorithm is built.
+        """
+        algo.SetRunParallel(self.run_parallel)
+        algo.SetUseOBB(self.use_obb)
+        algo.SetCheckInverted(self.check_inverted)
+
+        if self.fuzzy_value is not None:
+            algo.SetFuzzyValue(self.fuzzy_value)
+
+    @staticmethod
+    def get_default() -> BoolOptions:
+        if BoolOptions._default is None:
+            BoolOptions._default = BoolOptions()
+
+        return BoolOptions._default
+
+    @staticmethod
+    def set_default(options: BoolOptions):
+        """
+        Sets the options used by boolean operations that are not supplied options explicitly.
+        """
+        if options is None:
+            raise ValueError("Default options may not be None")
+
+        BoolOptions._default = options
+
+    @staticmethod
+    def resolve(options: typing.Optional[BoolOptions]) -> BoolOptions:
+        """
+        :return: options, or the process-wide default if options is None.
+        """
+        return BoolOptions.get_default() if options is None else options
+
+
 class BoolUtils:
 
     @staticmethod
     def incremental_cut(shape: oc.TopoDS.TopoDS_Shape,
                         cut_tools: typing.Union[typing.List[oc.TopoDS.TopoDS_Shape], oc.TopoDS.TopoDS_Shape],
-                        cleanup: bool = False):
+                        cleanup: bool = False,
+                        options: BoolOptions = None,
+                        group_size: int = None):
+        """
+        Cuts the tools from shape. Tools are no longer applied one at a time, see #batch_cut.
+        """
+        return BoolUtils.batch_cut(shape, cut_tools, cleanup=cleanup, options=options, group_size=group_size)
+
+    @staticmethod
+    def incremental_fuse(shapes: typing.List[oc.TopoDS.TopoDS_Shape],
+                         cleanup: bool = False,
+                         options: BoolOptions = None,
+                         group_size: int = None) -> OCC.Core.TopoDS.TopoDS_Shape:
+        """
+        Fuses the shapes together. Shapes are no longer applied one at a time, see #batch_fuse.
+        """
+        return BoolUtils.batch_fuse(shapes, cleanup=cleanup, options=options, group_size=group_size)
+
+    @staticmethod
+    def batch_cut(shape: oc.TopoDS.TopoDS_Shape,
+                  cut_tools: typing.Union[typing.List[oc.TopoDS.TopoDS_Shape], oc.TopoDS.TopoDS_Shape],
+                  cleanup: bool = False,
+                  options: BoolOptions = None,
+                  group_size: int = None) -> OCC.Core.TopoDS.TopoDS_Shape:
+        """
+        Cuts all tools from shape using a single boolean operation, or one operation per group of tools.
+        :param group_size: if specified, tools are split into spatially local groups of at most this size, which
+        keeps each operation small when there are very many tools.
+        """
 
         if isinstance(cut_tools, oc.TopoDS.TopoDS_Shape):
             cut_tools = [cut_tools]
 
         result = shape
 
-        for tool in cut_tools:
-            intermediate_result = OCC.Core.BRepAlgoAPI.BRepAlgoAPI_Cut(result, tool).Shape()
-            if intermediate_result is None:
-                VisualizationUtils.visualize(result, tool)
+        # without tools there are no groups, only the cleanup applies
+        for group in BoolUtils.group_by_locality(cut_tools, group_size):
+            algo = BoolUtils.perform(OCC.Core.BRepAlgoAPI.BRepAlgoAPI_Cut(), [result], group, options)
+            if algo.HasErrors():
+                VisualizationUtils.visualize(result, *group)
                 raise RuntimeError("Error occurred during boolean operation")
 
-            result = intermediate_result
+            result = algo.Shape()
 
         if cleanup:
             result = Cleanup.simplify_domain(result)
@@ -1131,36 +1500,99 @@ class BoolUtils:
         return result
 
     @staticmethod
-    def incremental_fuse(shapes: typing.List[oc.TopoDS.TopoDS_Shape],
-                         cleanup: bool = False) -> OCC.Core.TopoDS.TopoDS_Shape:
-        result = shapes[0]
+    def batch_fuse(shapes: typing.List[oc.TopoDS.TopoDS_Shape],
+                   cleanup: bool = False,
+                   options: BoolOptions = None,
+                   group_size: int = None) -> OCC.Core.TopoDS.TopoDS_Shape:
+        """
+        Fuses all shapes using a single boolean operation. If group_size is specified, spatially local groups
+        of shapes are fused first, and the group results are then fused in a single final operation.
+        """
+
+        if len(shapes) == 0:
+            raise ValueError("No shapes specified")
+
+        def fuse_all(to_fuse: typing.List[oc.TopoDS.TopoDS_Shape]) -> oc.TopoDS.TopoDS_Shape:
+            if len(to_fuse) == 1:
+                return to_fuse[0]
 
-        for shape in shapes[1:]:
-            result = OCC.Core.BRepAlgoAPI.BRepAlgoAPI_Fuse(result, shape).Shape()
-            if result is None:
+            algo = BoolUtils.perform(OCC.Core.BRepAlgoAPI.BRepAlgoAPI_Fuse(), to_fuse[0:1], to_fuse[1:], options)
+            if algo.HasErrors():
                 raise RuntimeError("Error occurred during boolean operation")
 
+            return algo.Shape()
+
+        groups = BoolUtils.group_by_locality(shapes, group_size)
+
+        if len(groups) == 1:
+            result = fuse_all(groups[0])
+        else:
+            result = fuse_all([fuse_all(g) for g in groups])
+
         if cleanup:
             result = Cleanup.simplify_domain(result)
 
         return result
 
     @staticmethod
-    def fuse(shapes: typing.List[oc.TopoDS.TopoDS_Shape]) -> OCC.Core.TopoDS.TopoDS_Shape:
+    def group_by_locality(shapes: typing.List[oc.TopoDS.TopoDS_Shape],
+                          group_size: typing.Optional[int]) -> typing.List[typing.List[oc.TopoDS.TopoDS_Shape]]:
+        """
+        Splits the shapes into groups of at most group_size, such that shapes that are close to each other tend to
+        end up in the same group. Shapes are ordered by the midpoint of their bounding box along the axis the
+        midpoints are most spread out on.
+        :return: a single group containing all shapes if group_size is None or not exceeded, no groups if there are
+        no shapes.
+        """
+        if group_size is not None and group_size < 1:
+            raise ValueError("Group size must be at least 1")
 
-        algo = OCC.Core.BRepAlgoAPI.BRepAlgoAPI_Fuse()
+        if len(shapes) == 0:
+            return []
 
-        algo.SetNonDestructive(True)
-        algo.SetArguments(ListUtils.list([shapes[0]]))
-        algo.SetTools(ListUtils.list(shapes[1:]))
+        if group_size is None or len(shapes) <= group_size:
+            return [[s for s in shapes]]
 
-        algo.Build()
+        mids = [Extents(s).mid for s in shapes]
+
+        spreads = [max(m[i] for m in mids) - min(m[i] for m in mids) for i in range(3)]
+        axis = spreads.index(max(spreads))
+
+        ordered = [s for _, s in sorted(zip(mids, shapes), key=lambda ms: ms[0][axis])]
+
+        return [ordered[i:i + group_size] for i in range(0, len(ordered), group_size)]
+
+    @staticmethod
+    def fuse(shapes: typing.List[oc.TopoDS.TopoDS_Shape], options: BoolOptions = None) -> OCC.Core.TopoDS.TopoDS_Shape:
+
+        algo = BoolUtils.perform(
+            OCC.Core.BRepAlgoAPI.BRepAlgoAPI_Fuse(), shapes[0:1], shapes[1:], options, non_destructive=True)
 
         if algo.HasErrors():
             raise RuntimeError("bool op failed")
 
         return algo.Shape()
 
+    @staticmethod
+    def perform(algo: OCC.Core.BRepAlgoAPI.BRepAlgoAPI_BooleanOperation,
+                args: typing.List[oc.TopoDS.TopoDS_Shape],
+                tools: typing.List[oc.TopoDS.TopoDS_Shape],
+                options: BoolOptions = None,
+                non_destructive: bool = False) -> OCC.Core.BRepAlgoAPI.BRepAlgoAPI_BooleanOperation:
+        """
+        Configures algo with the arguments, tools and options, and builds it. Errors are left for the caller to check.
+        :return: algo
+        """
+        BoolOptions.resolve(options).apply(algo)
+
+        algo.SetNonDestructive(non_destructive)
+        algo.SetArguments(ListUtils.list(args))
+        algo.SetTools(ListUtils.list(tools))
+
+        algo.Build()
+
+        return algo
+
 
 class TransformUtils:
 
@@ -1347,6 +1779,17 @@ class ExploreUtils:
 
             explorer.Next()
 
+    @staticmethod
+    def explore_unique(
+            shape: oc.TopoDS.TopoDS_Shape,
+            shape_type: oc.TopAbs.TopAbs_ShapeEnum) -> typing.Generator[oc.TopoDS.TopoDS_Shape, None, None]:
+        """
+        Like explore_iterate, but each subshape is yielded once (IsSame), even if it is shared by several parents.
+        e.g. a box yields 12 edges rather than 24. Shapes are yielded in the order they are first encountered,
+        which matches their ShapeIndex index.
+        """
+        yield from ShapeIndex.of_subshapes(shape, shape_type)
+
     @staticmethod
     def iterate_compound(shape: oc.TopoDS.TopoDS_Compound):
         iterator = OCC.Core.TopoDS.TopoDS_Iterator(shape)
@@ -1355,15 +1798,102 @@ class ExploreUtils:
             iterator.Next()
 
 
+class ExtentsPredicate:
+    """
+    A shape predicate defined on the extents of shapes, which can be evaluated for many shapes at once.
+    Explorers apply these as array masks over Extents#bulk, rather than computing Extents shape by shape.
+    Instances can still be called with a single shape, so they are usable anywhere a regular predicate is.
+    """
+
+    def __init__(self, mask: typing.Callable[[numpy.ndarray], numpy.ndarray]):
+        """
+        :param mask: maps an (N, 6) array, as returned by Extents#bulk, to an (N,) boolean array.
+        """
+        self._mask = mask
+
+    def mask(self, bounds: numpy.ndarray) -> numpy.ndarray:
+        return numpy.asarray(self._mask(bounds), dtype=bool)
+
+    def __call__(self, shape) -> bool:
+        # also accept shape wrappers, e.g. Parts
+        shape = getattr(shape, "shape", shape)
+        return bool(self.mask(Extents.bulk([shape]))[0])
+
+    def __and__(self, other: ExtentsPredicate) -> ExtentsPredicate:
+        return ExtentsPredicate(lambda b: self.mask(b) & other.mask(b))
+
+    @staticmethod
+    def mask_all(shapes: typing.List[OCC.Core.TopoDS.TopoDS_Shape],
+                 predicates: typing.List[ExtentsPredicate],
+                 bounds: numpy.ndarray = None) -> numpy.ndarray:
+        """
+        :return: a boolean array, True where the shape satisfies all the predicates.
+        """
+        if bounds is None:
+            bounds = Extents.bulk(shapes)
+
+        result = numpy.ones(len(shapes), dtype=bool)
+        for p in predicates:
+            result &= p.mask(bounds)
+
+        return result
+
+
+class ExtentsKey:
+    """
+    A sort key defined on the extents of shapes, which can be evaluated for many shapes at once.
+    See ExtentsPredicate.
+    """
+
+    def __init__(self, keys: typing.Callable[[numpy.ndarray], numpy.ndarray]):
+        """
+        :param keys: maps an (N, 6) array, as returned by Extents#bulk, to an (N,) array of sort keys.
+        """
+        self._keys = keys
+
+    def keys(self, bounds: numpy.ndarray) -> numpy.ndarray:
+        return numpy.asarray(self._keys(bounds), dtype=float)
+
+    def __call__(self, shape) -> float:
+        shape = getattr(shape, "shape", shape)
+        return float(self.keys(Extents.bulk([shape]))[0])
+
+    def order(self, shapes: typing.List[OCC.Core.TopoDS.TopoDS_Shape], bounds: numpy.ndarray = None) -> typing.List[int]:
+        """
+        :return: the indices of shapes, stably sorted by key.
+        """
+        if bounds is None:
+            bounds = Extents.bulk(shapes)
+
+        return [int(i) for i in numpy.argsort(self.keys(bounds), kind="stable")]
+
+
 class Explorer:
 
-    def __init__(self, shape: OCC.Core.TopoDS.TopoDS_Shape, shape_type: oc.TopAbs.TopAbs_ShapeEnum):
+    # extents predicates are evaluated on chunks of this many shapes, so that filtering stays vectorised
+    # while results are still streamed
+    EXTENTS_CHUNK_SIZE = 256
+
+    def __init__(self,
+                 shape: OCC.Core.TopoDS.TopoDS_Shape,
+                 shape_type: oc.TopAbs.TopAbs_ShapeEnum,
+                 unique: bool = False):
+        """
+        :param unique: if True, shared subshapes are visited once, see ExploreUtils.explore_unique. Otherwise, they
+        are visited once per parent (TopExp_Explorer behaviour).
+        """
         self.shape = shape
         self.shape_type = shape_type
+        self.unique = unique
         self.predicate = lambda s: True
-        self.key = lambda s: 0.0
+        self.key = None
+        self._extents_predicates: typing.List[ExtentsPredicate] = []
 
     def filter_by(self, predicate: typing.Callable[[OCC.Core.TopoDS.TopoDS_Shape], bool]):
+        if isinstance(predicate, ExtentsPredicate):
+            self._extents_predicates.append(predicate)
+            return self
+
         old_pred = self.predicate
 
         self.predicate = lambda e: (old_pred(e) and predicate(e))
@@ -1373,45 +1903,125 @@ class Explorer:
         self.key = key
         return self
 
+    def deduplicated(self):
+        """
+        Visit shared subshapes only once.
+        """
+        self.unique = True
+        return self
+
+    def _explore(self) -> typing.Generator[OCC.Core.TopoDS.TopoDS_Shape, None, None]:
+        if self.unique:
+            return ExploreUtils.explore_unique(self.shape, self.shape_type)
+
+        return ExploreUtils.explore_iterate(self.shape, self.shape_type)
+
+    @staticmethod
+    def filter_by_extents(shapes: typing.Iterable[OCC.Core.TopoDS.TopoDS_Shape],
+                          predicates: typing.List[ExtentsPredicate],
+                          chunk_size: int = None) -> typing.Generator[OCC.Core.TopoDS.TopoDS_Shape, None, None]:
+        """
+        Lazily yields the shapes that satisfy all the predicates, evaluating them on chunks of shapes at a time.
+        """
+        if len(predicates) == 0:
+            yield from shapes
+            return
+
+        if chunk_size is None:
+            chunk_size = Explorer.EXTENTS_CHUNK_SIZE
+
+        shapes = iter(shapes)
+        while True:
+            chunk = [s for s in itertools.islice(shapes, chunk_size)]
+            if len(chunk) == 0:
+                return
+
+            mask = ExtentsPredicate.mask_all(chunk, predicates)
+            yield from (s for s, m in zip(chunk, mask) if m)
+
+    def iterate(self) -> typing.Generator[OCC.Core.TopoDS.TopoDS_Shape, None, None]:
+        """
+        Lazily yields the shapes that satisfy the filters, in exploration order. Any order_by key is ignored.
+        """
+        # vectorised filters first, so that per-shape predicates see fewer shapes
+        for s in Explorer.filter_by_extents(self._explore(), self._extents_predicates):
+            if self.predicate(s):
+                yield s
+
+    def __iter__(self):
+        return self.iterate()
+
     def get(self):
-        result = [s for s in ExploreUtils.explore_iterate(self.shape, self.shape_type) if self.predicate(s)]
+        result = [s for s in self.iterate()]
+
+        if self.key is None:
+            return result
+
+        if isinstance(self.key, ExtentsKey):
+            return [result[i] for i in self.key.order(result)]
+
         result.sort(key=self.key)
         return result
 
+    def first(self) -> typing.Optional[OCC.Core.TopoDS.TopoDS_Shape]:
+        """
+        :return: the first matching shape, or None if there are none. Stops exploring early unless an order_by key
+        has been set.
+        """
+        if self.key is not None:
+            result = self.get()
+            return result[0] if len(result) > 0 else None
+
+        return next(self.iterate(), None)
+
+    def any(self) -> bool:
+        """
+        :return: True if any shape matches. Stops at the first match.
+        """
+        return next(self.iterate(), None) is not None
+
+    def count(self) -> int:
+        return sum(1 for _ in self.iterate())
+
     def get_single(self) -> OCC.Core.TopoDS.TopoDS_Shape:
-        result = [s for s in ExploreUtils.explore_iterate(self.shape, self.shape_type) if self.predicate(s)]
-        if len(result) != 1:
+        """
+        :return: the only matching shape. Stops exploring as soon as a second match is found.
+        """
+        iterator = self.iterate()
+
+        result = next(iterator, None)
+        if result is None or next(iterator, None) is not None:
             raise RuntimeError("Unable to return single element")
 
-        return result[0]
+        return result
 
     @staticmethod
-    def solid_explorer(shape: OCC.Core.TopoDS.TopoDS_Shape):
-        return Explorer(shape, OCC.Core.TopAbs.TopAbs_ShapeEnum.TopAbs_SOLID)
+    def solid_explorer(shape: OCC.Core.TopoDS.TopoDS_Shape, unique: bool = False):
+        return Explorer(shape, OCC.Core.TopAbs.TopAbs_ShapeEnum.TopAbs_SOLID, unique)
 
     @staticmethod
-    def face_explorer(shape: OCC.Core.TopoDS.TopoDS_Shape):
-        return Explorer(shape, OCC.Core.TopAbs.TopAbs_ShapeEnum.TopAbs_FACE)
+    def face_explorer(shape: OCC.Core.TopoDS.TopoDS_Shape, unique: bool = False):
+        return Explorer(shape, OCC.Core.TopAbs.TopAbs_ShapeEnum.TopAbs_FACE, unique)
 
     @staticmethod
-    def vertex_explorer(shape: OCC.Core.TopoDS.TopoDS_Shape):
-        return Explorer(shape, OCC.Core.TopAbs.TopAbs_ShapeEnum.TopAbs_VERTEX)
+    def vertex_explorer(shape: OCC.Core.TopoDS.TopoDS_Shape, unique: bool = False):
+        return Explorer(shape, OCC.Core.TopAbs.TopAbs_ShapeEnum.TopAbs_VERTEX, unique)
 
     @staticmethod
-    def edge_explorer(shape: OCC.Core.TopoDS.TopoDS_Shape):
-        return Explorer(shape, OCC.Core.TopAbs.TopAbs_ShapeEnum.TopAbs_EDGE)
+    def edge_explorer(shape: OCC.Core.TopoDS.TopoDS_Shape, unique: bool = False):
+        return Explorer(shape, OCC.Core.TopAbs.TopAbs_ShapeEnum.TopAbs_EDGE, unique)
 
     @staticmethod
-    def wire_explorer(shape: OCC.Core.TopoDS.TopoDS_Shape):
-        return Explorer(shape, OCC.Core.TopAbs.TopAbs_ShapeEnum.TopAbs_WIRE)
+    def wire_explorer(shape: OCC.Core.TopoDS.TopoDS_Shape, unique: bool = False):
+        return Explorer(shape, OCC.Core.TopAbs.TopAbs_ShapeEnum.TopAbs_WIRE, unique)
 
     @staticmethod
-    def by_depth_mid_order():
-        return lambda s: Extents(s).z_mid
+    def by_depth_mid_order() -> ExtentsKey:
+        return ExtentsKey(lambda b: Extents.mids(b)[:, 2])
 
     @staticmethod
-    def by_depth_max_filter(max_depth: float):
-        return lambda s: Extents(s).z_span < max_depth
+    def by_depth_max_filter(max_depth: float) -> ExtentsPredicate:
+        return ExtentsPredicate(lambda b: Extents.spans(b)[:, 2] < max_depth)
 
     @staticmethod
     def extents_filter(filter: typing.Callable[[Extents], bool]) -> \
@@ -1420,19 +2030,32 @@ class Explorer:
         return lambda s: filter(Extents(s))
 
     @staticmethod
-    def is_x_line_filter(tolerance: float):
-        return Explorer.extents_filter(
-            lambda e: e.z_span < tolerance < e.x_span and e.y_span < tolerance)
+    def is_x_line_filter(tolerance: float) -> ExtentsPredicate:
+        return Explorer._is_axis_line_filter(0, tolerance)
 
     @staticmethod
-    def is_y_line_filter(tolerance: float):
-        return Explorer.extents_filter(
-            lambda e: e.z_span < tolerance and e.y_span > tolerance > e.x_span)
+    def is_y_line_filter(tolerance: float) -> ExtentsPredicate:
+        return Explorer._is_axis_line_filter(1, tolerance)
 
     @staticmethod
-    def is_z_line_filter(tolerance: float):
-        return Explorer.extents_filter(
-            lambda e: e.z_span > tolerance > e.x_span and e.y_span < tolerance)
+    def is_z_line_filter(tolerance: float) -> ExtentsPredicate:
+        return Explorer._is_axis_line_filter(2, tolerance)
+
+    @staticmethod
+    def _is_axis_line_filter(axis: int, tolerance: float) -> ExtentsPredicate:
+        """
+        :return: a predicate for shapes that span more than tolerance along the axis, and less than tolerance
+        along the other two.
+        """
+        def mask(bounds: numpy.ndarray) -> numpy.ndarray:
+            spans = Extents.spans(bounds)
+            result = spans[:, axis] > tolerance
+            for other_axis in {0, 1, 2} - {axis}:
+                result &= spans[:, other_axis] < tolerance
+
+            return result
+
+        return ExtentsPredicate(mask)
 
     @staticmethod
     def extents_order(k: typing.Callable[[Extents], float]) -> \
@@ -1596,15 +2219,10 @@ class GeomUtils:
         if len(d_coords) == 0 or len(d_coords) % 3 != 0:
             raise ValueError("Coords must be a multiple of 3")
 
-        result = GeomUtils.prism(shape, d_coords[0], d_coords[1], d_coords[2])
+        prisms = [GeomUtils.prism(shape, d_coords[i], d_coords[i + 1], d_coords[i + 2])
+                  for i in range(0, len(d_coords), 3)]
 
-        for i in range(1, len(d_coords) // 3):
-            dx = d_coords[i * 3]
-            dy = d_coords[i * 3 + 1]
-            dz = d_coords[i * 3 + 2]
-            result = BoolUtils.incremental_fuse([result, GeomUtils.prism(shape, dx, dy, dz)], **bool_kwargs)
-
-        return result
+        return BoolUtils.batch_fuse(prisms, **bool_kwargs)
 
     @staticmethod
     def regular_polygon(r: float, num_points: int) -> OCC.Core.TopoDS.TopoDS_Shape:
@@ -1694,11 +2312,7 @@ class InterrogateUtils:
             # e.g. FACE cannot contain SOLID
             return False
 
-        for s in ExploreUtils.explore_iterate(parent, child.ShapeType()):
-            if s == child:
-                return True
-
-        return False
+        return ShapeTopology.of(parent).contains(child)
 
     @staticmethod
     def face_normal(face: OCC.Core.TopoDS.TopoDS_Face,
@@ -1710,6 +2324,22 @@ class InterrogateUtils:
         if not isinstance(face, OCC.Core.TopoDS.TopoDS_Face):
             raise ValueError(f"Supplied argument is not a face: {face}")
 
+        if uv_mapper is not None:
+            return InterrogateUtils._face_normal(face, uv_mapper, resolution)
+
+        # only the default uv mapping can be cached, arbitrary callables cannot be compared
+        pnt, normal = PropertyCache.instance().get(
+            "face_normal", face, lambda: InterrogateUtils._face_normal(face, None, resolution), resolution)
+
+        # gp types are mutable, so hand out copies
+        return gp_Pnt(pnt.XYZ()), gp_Dir(normal.XYZ())
+
+    @staticmethod
+    def _face_normal(face: OCC.Core.TopoDS.TopoDS_Face,
+                     uv_mapper: typing.Optional[typing.Callable[
+                        [float, float, float, float],
+                        typing.Tuple[float, float]]],
+                     resolution: float) -> typing.Tuple[gp_Pnt, gp_Dir]:
         if uv_mapper is None:
             uv_mapper = lambda umn, umx, vmn, vmx: (umn + (umx - umn) / 2, vmn + (vmx - vmn) / 2)
 
@@ -1819,21 +2449,42 @@ class InterrogateUtils:
 
     @staticmethod
     def linear_properties(shape: OCC.Core.TopoDS.TopoDS_Shape) -> OCC.Core.GProp.GProp_GProps:
-        gprops = OCC.Core.GProp.GProp_GProps()
-        OCC.Core.BRepGProp.brepgprop.LinearProperties(shape, gprops)
-        return gprops
+        """
+        :return: the linear mass properties of the shape. The result is cached (see PropertyCache) and must not be
+        modified.
+        """
+        def compute():
+            gprops = OCC.Core.GProp.GProp_GProps()
+            OCC.Core.BRepGProp.brepgprop.LinearProperties(shape, gprops)
+            return gprops
+
+        return PropertyCache.instance().get("linear_properties", shape, compute)
 
     @staticmethod
     def surface_properties(shape: OCC.Core.TopoDS.TopoDS_Shape) -> OCC.Core.GProp.GProp_GProps:
-        gprops = OCC.Core.GProp.GProp_GProps()
-        OCC.Core.BRepGProp.brepgprop.SurfaceProperties(shape, gprops)
-        return gprops
+        """
+        :return: the surface mass properties of the shape. The result is cached (see PropertyCache) and must not be
+        modified.
+        """
+        def compute():
+            gprops = OCC.Core.GProp.GProp_GProps()
+            OCC.Core.BRepGProp.brepgprop.SurfaceProperties(shape, gprops)
+            return gprops
+
+        return PropertyCache.instance().get("surface_properties", shape, compute)
 
     @staticmethod
     def volume_properties(shape: OCC.Core.TopoDS.TopoDS_Shape) -> OCC.Core.GProp.GProp_GProps:
-        gprops = OCC.Core.GProp.GProp_GProps()
-        OCC.Core.BRepGProp.brepgprop.VolumeProperties(shape, gprops)
-        return gprops
+        """
+        :return: the volume mass properties of the shape. The result is cached (see PropertyCache) and must not be
+        modified.
+        """
+        def compute():
+            gprops = OCC.Core.GProp.GProp_GProps()
+            OCC.Core.BRepGProp.brepgprop.VolumeProperties(shape, gprops)
+            return gprops
+
+        return PropertyCache.instance().get("volume_properties", shape, compute)
 
     @staticmethod
     def center_of_mass(shape: OCC.Core.TopoDS.TopoDS_Shape) -> typing.Tuple[float, float, float]:
@@ -1913,11 +2564,7 @@ class InterrogateUtils:
         if shape.ShapeType() != OCC.Core.TopAbs.TopAbs_EDGE and shape.ShapeType() != OCC.Core.TopAbs.TopAbs_WIRE:
             raise ValueError("ShapeType does not have meaningful length.")
 
-        gprops = OCC.Core.GProp.GProp_GProps()
-
-        OCC.Core.BRepGProp.brepgprop.LinearProperties(shape, gprops)
-
-        return gprops.Mass()
+        return InterrogateUtils.linear_properties(shape).Mass()
 
 
 class FilletUtils:
@@ -1942,7 +2589,7 @@ class FilletUtils:
 
         mkf = OCC.Core.BRepFilletAPI.BRepFilletAPI_MakeFillet(shape)
 
-        for edge in Explorer.edge_explorer(shape)\
+        for edge in Explorer.edge_explorer(shape, unique=True)\
                 .filter_by(lambda e: edge_selector(OCC.Core.TopoDS.topods_Edge(e))).get():
 
             mkf.Add(amount, OCC.Core.TopoDS.topods.Edge(edge))
@@ -1957,7 +2604,7 @@ class FilletUtils:
 
         mkf = OCC.Core.BRepFilletAPI.BRepFilletAPI_MakeChamfer(shape)
 
-        for edge in Explorer.edge_explorer(shape)\
+        for edge in Explorer.edge_explorer(shape, unique=True)\
                 .filter_by(lambda e: edge_selector(OCC.Core.TopoDS.topods_Edge(e))).get():
 
             mkf.Add(amount, OCC.Core.TopoDS.topods.Edge(edge))
@@ -1970,7 +2617,7 @@ class FilletUtils:
                 edge_selector: typing.Callable[[], typing.Iterable[OCC.Core.TopoDS.TopoDS_Shape]] = None):
 
         if edge_selector is None:
-            edge_selector = Explorer.edge_explorer(shape).get
+            edge_selector = Explorer.edge_explorer(shape, unique=True).get
 
         mkc = OCC.Core.BRepFilletAPI.BRepFilletAPI_MakeChamfer(shape)
 
@@ -2264,11 +2911,15 @@ class Drill:
 
     def perform(self, shape: OCC.Core.TopoDS.TopoDS_Shape) -> OCC.Core.TopoDS.TopoDS_Shape:
         result = shape
-        for op in self.get_drill_ops(shape):
-            if op.is_inverted:
-                result = BoolUtils.incremental_fuse([result] + op.shapes)
+
+        # consecutive operations of the same kind are applied as a single boolean
+        for is_inverted, ops in itertools.groupby(self.get_drill_ops(shape), key=lambda o: o.is_inverted):
+            tools = [s for o in ops for s in o.shapes]
+
+            if is_inverted:
+                result = BoolUtils.batch_fuse([result] + tools)
             else:
-                result = BoolUtils.incremental_cut(result, op.shapes)
+                result = BoolUtils.batch_cut(result, tools)
 
         return result
 
@@ -2285,9 +2936,9 @@ class Drill:
         start_wire = OCC.Core.BRepBuilderAPI.BRepBuilderAPI_MakeEdge(start_line.Value()).Shape()
 
         vertexes = []
-        for f in Explorer.face_explorer(shape).get():
+        for f in Explorer.face_explorer(shape, unique=True).get():
             common = OCC.Core.BRepAlgoAPI.BRepAlgoAPI_Section(f, start_wire).Shape()
-            intersections = Explorer.vertex_explorer(common).get()
+            intersections = Explorer.vertex_explorer(common, unique=True).get()
 
             vertexes += [OCC.Core.BRep.BRep_Tool_Pnt(v) for v in intersections]
 
@@ -2490,11 +3141,12 @@ class Align:
 
     align_re = re.compile("[xyz]+_(mid|min|max)_to_(mid|min|max)")
 
-    def __init__(self, shape: OCC.Core.TopoDS.TopoDS_Shape):
+    def __init__(self, shape: OCC.Core.TopoDS.TopoDS_Shape, precision: Extents.Precision = None):
         if not isinstance(shape, OCC.Core.TopoDS.TopoDS_Shape):
             raise ValueError("Argument not a shape")
 
         self._shape = shape
+        self._precision = precision
 
     def __getattr__(self, item: str):
         if not Align.align_re.fullmatch(item):
@@ -2507,11 +3159,11 @@ class Align:
         arg_from = args[1]
         arg_to = args[3]
 
-        shape_from_ext = Extents(self._shape)
+        shape_from_ext = Extents(self._shape, self._precision)
 
         def return_func(dest_shape: OCC.Core.TopoDS.TopoDS_Shape,
                         translate_consumer: typing.Callable[[float, float, float], None] = None):
-            dest_shape_ext = Extents(dest_shape)
+            dest_shape_ext = Extents(dest_shape, self._precision)
 
             offsets = {}
 
@@ -2539,18 +3191,374 @@ class Align:
 
 
 class SetPlaceableShape:
+    """
+    Wraps a TopoDS_Shape so that it may be used as a set member or dict key. Equality follows
+    TopTools_ShapeMapHasher, i.e. two shapes are equal if they share TShape and Location (IsSame),
+    orientation is ignored.
+    """
 
-    UPPER_BOUND = 10000
+    # TopTools_ShapeMapHasher reduces the (TShape, Location) hash to the range [1, upper]. Use the full
+    # Standard_Integer range, small bounds cause heavy collisions on parts with many subshapes.
+    UPPER_BOUND = 2147483647
 
     def __init__(self, shape: OCC.Core.TopoDS.TopoDS_Shape):
         self._shape = shape
+        self._hash = OCC.Core.TopTools.TopTools_ShapeMapHasher.HashCode(shape, SetPlaceableShape.UPPER_BOUND)
 
     @property
     def shape(self) -> OCC.Core.TopoDS.TopoDS_Shape:
         return self._shape
 
     def __hash__(self) -> int:
-        return OCC.Core.TopTools.TopTools_ShapeMapHasher.HashCode(self._shape, SetPlaceableShape.UPPER_BOUND)
+        return self._hash
 
     def __eq__(self, other: SetPlaceableShape) -> bool:
-        return OCC.Core.TopTools.TopTools_ShapeMapHasher.IsEqual(self.shape, other.shape)
+        if not isinstance(other, SetPlaceableShape):
+            return False
+
+        return self._hash == other._hash and \
+            OCC.Core.TopTools.TopTools_ShapeMapHasher.IsEqual(self.shape, other.shape)
+
+
+class ShapeIndex:
+    """
+    Shape -> integer index map backed by TopTools_IndexedMapOfShape. Lookups are performed on the OCC side,
+    so they stay O(1) regardless of the number of shapes. Shapes are compared with IsSame semantics
+    (TShape + Location). Indices are 1-based, and are assigned in insertion order.
+    """
+
+    def __init__(self, shapes: typing.Iterable[OCC.Core.TopoDS.TopoDS_Shape] = None):
+        self._map = OCC.Core.TopTools.TopTools_IndexedMapOfShape()
+
+        if shapes is not None:
+            for s in shapes:
+                self._map.Add(s)
+
+    @staticmethod
+    def of_subshapes(shape: OCC.Core.TopoDS.TopoDS_Shape,
+                     shape_type: OCC.Core.TopAbs.TopAbs_ShapeEnum = None) -> ShapeIndex:
+        """
+        :return: an index of the shape and all of its subshapes, or if shape_type is specified only the
+        subshapes of that type. Each subshape is present once, regardless of how many parents it has.
+        """
+        result = ShapeIndex()
+
+        if shape_type is None:
+            OCC.Core.TopExp.topexp.MapShapes(shape, result._map)
+        else:
+            OCC.Core.TopExp.topexp.MapShapes(shape, shape_type, result._map)
+
+        return result
+
+    def add(self, shape: OCC.Core.TopoDS.TopoDS_Shape) -> int:
+        """
+        Adds the shape if not already present.
+        :return: the index of the shape.
+        """
+        return self._map.Add(shape)
+
+    def index_of(self, shape: OCC.Core.TopoDS.TopoDS_Shape) -> typing.Optional[int]:
+        """
+        :return: the index of the shape, or None if it is not present.
+        """
+        index = self._map.FindIndex(shape)
+        return None if index == 0 else index
+
+    def shape(self, index: int) -> OCC.Core.TopoDS.TopoDS_Shape:
+        return self._map.FindKey(index)
+
+    def __contains__(self, shape: OCC.Core.TopoDS.TopoDS_Shape) -> bool:
+        return self._map.Contains(shape)
+
+    def __len__(self) -> int:
+        return self._map.Extent()
+
+    def __iter__(self) -> typing.Generator[OCC.Core.TopoDS.TopoDS_Shape, None, None]:
+        for i in range(1, self._map.Extent() + 1):
+            yield self._map.FindKey(i)
+
+
+class ShapeTopology:
+    """
+    Adjacency maps for a shape (vertex -> edges, edge -> faces, face -> solids, ...), built once per
+    (subshape type, ancestor type) pair with TopExp.MapShapesAndUniqueAncestors and then looked up in O(1).
+    Shapes are compared with IsSame semantics, and each ancestor is listed once.
+    """
+
+    def __init__(self, shape: OCC.Core.TopoDS.TopoDS_Shape):
+        self._shape = shape
+        self._subshapes: typing.Optional[ShapeIndex] = None
+        self._ancestor_maps: typing.Dict[
+            typing.Tuple[OCC.Core.TopAbs.TopAbs_ShapeEnum, OCC.Core.TopAbs.TopAbs_ShapeEnum],
+            OCC.Core.TopTools.TopTools_IndexedDataMapOfShapeListOfShape] = {}
+
+    @staticmethod
+    def of(shape: OCC.Core.TopoDS.TopoDS_Shape) -> ShapeTopology:
+        """
+        :return: the topology of the shape, shared through the PropertyCache so that repeated queries against the
+        same shape reuse the ancestor maps already built.
+        """
+        return PropertyCache.instance().get("topology", shape, lambda: ShapeTopology(shape))
+
+    @property
+    def shape(self) -> OCC.Core.TopoDS.TopoDS_Shape:
+        return self._shape
+
+    def contains(self, shape: OCC.Core.TopoDS.TopoDS_Shape) -> bool:
+        """
+        :return: True if the shape is the root shape or one of its subshapes.
+        """
+        if self._subshapes is None:
+            self._subshapes = ShapeIndex.of_subshapes(self._shape)
+
+        return shape in self._subshapes
+
+    def ancestors(self,
+                  shape: OCC.Core.TopoDS.TopoDS_Shape,
+                  ancestor_type: OCC.Core.TopAbs.TopAbs_ShapeEnum) -> typing.List[OCC.Core.TopoDS.TopoDS_Shape]:
+        """
+        :return: the shapes of ancestor_type that contain the specified shape, e.g. the faces bounded by an edge.
+        Empty if the shape is not part of this topology.
+        """
+        ancestor_map = self._get_ancestor_map(shape.ShapeType(), ancestor_type)
+
+        index = ancestor_map.FindIndex(shape)
+        if index == 0:
+            return []
+
+        return [s for s in ListUtils.iterate_list(ancestor_map.FindFromIndex(index))]
+
+    def vertex_edges(self, vertex: OCC.Core.TopoDS.TopoDS_Vertex) -> typing.List[OCC.Core.TopoDS.TopoDS_Shape]:
+        return self.ancestors(vertex, OCC.Core.TopAbs.TopAbs_EDGE)
+
+    def edge_faces(self, edge: OCC.Core.TopoDS.TopoDS_Edge) -> typing.List[OCC.Core.TopoDS.TopoDS_Shape]:
+        return self.ancestors(edge, OCC.Core.TopAbs.TopAbs_FACE)
+
+    def face_solids(self, face: OCC.Core.TopoDS.TopoDS_Face) -> typing.List[OCC.Core.TopoDS.TopoDS_Shape]:
+        return self.ancestors(face, OCC.Core.TopAbs.TopAbs_SOLID)
+
+    def _get_ancestor_map(self,
+                          shape_type: OCC.Core.TopAbs.TopAbs_ShapeEnum,
+                          ancestor_type: OCC.Core.TopAbs.TopAbs_ShapeEnum):
+        key = (shape_type, ancestor_type)
+
+        if key not in self._ancestor_maps:
+            ancestor_map = OCC.Core.TopTools.TopTools_IndexedDataMapOfShapeListOfShape()
+            OCC.Core.TopExp.topexp.MapShapesAndUniqueAncestors(self._shape, shape_type, ancestor_type, ancestor_map)
+            self._ancestor_maps[key] = ancestor_map
+
+        return self._ancestor_maps[key]
+
+
+class PropertyCache:
+    """
+    Bounded LRU cache for derived shape properties (mass properties, normals, bounding boxes, ...). Thread safe, so
+    may be shared with the viewer's meshing workers.
+
+    Entries are keyed by the property name, the shape identity (TShape + Location, see SetPlaceableShape) and
+    orientation, plus any arguments the property depends on. The key keeps a reference to the shape, so its TShape
+    cannot be freed and reused while the entry exists. Shapes modified in place (e.g. by BRep_Builder) are not
+    detected, call #clear after doing so.
+    """
+
+    DEFAULT_MAX_SIZE = 4096
+
+    _instance: PropertyCache = None
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE):
+        self._entries: collections.OrderedDict = collections.OrderedDict()
+        self._max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def instance() -> PropertyCache:
+        """
+        :return: the process-wide cache used by InterrogateUtils and Extents.
+        """
+        if PropertyCache._instance is None:
+            PropertyCache._instance = PropertyCache()
+
+        return PropertyCache._instance
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @max_size.setter
+    def max_size(self, max_size: int):
+        """
+        Sets the number of entries retained. A size of 0 disables caching.
+        """
+        if max_size < 0:
+            raise ValueError("Cache size may not be negative")
+
+        with self._lock:
+            self._max_size = max_size
+            self._evict()
+
+    def get(self,
+            name: str,
+            shape: OCC.Core.TopoDS.TopoDS_Shape,
+            compute: typing.Callable[[], typing.Any],
+            *args) -> typing.Any:
+        """
+        :return: the cached value of the named property for the shape and args, computing it if not present.
+        """
+        if self._max_size == 0:
+            self.misses += 1
+            return compute()
+
+        key = (name, SetPlaceableShape(shape), shape.Orientation(), *args)
+
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+            self.misses += 1
+
+        # computed outside the lock, the value may be computed twice when requested concurrently
+        value = compute()
+
+        with self._lock:
+            self._entries[key] = value
+            self._evict()
+
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self):
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+
+class MeshCache:
+    """
+    Records the linear and angular deflection each face was last meshed with, so that meshing an unchanged shape
+    again with the same parameters is skipped.
+
+    Triangulations are stored on the faces' TShapes, so entries are keyed by face TShape: located copies (e.g.
+    instances) and shapes sharing faces (e.g. the solids of a compound) share their mesh. Only the faces of a shape
+    that are not meshed with the requested parameters are cleaned and meshed again, so adding to a part keeps the
+    mesh of its existing faces. As with PropertyCache, shapes modified in place are not detected, call #clear after
+    doing so.
+
+    Entries reference their face, keeping it and its triangulation alive until evicted.
+    """
+
+    DEFAULT_MAX_SIZE = 8192
+
+    _instance: MeshCache = None
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE):
+        self._entries: collections.OrderedDict = collections.OrderedDict()
+        self._max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+        # held while meshing: shapes meshed from different threads may share faces
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def instance() -> MeshCache:
+        """
+        :return: the process-wide cache shared by the viewer and the mesh exporters.
+        """
+        if MeshCache._instance is None:
+            MeshCache._instance = MeshCache()
+
+        return MeshCache._instance
+
+    @property
+    def lock(self) -> threading.RLock:
+        """
+        Held while meshing. Hold it while reading the triangulations of shapes that may be meshed concurrently, so
+        they are not cleaned mid-read, and while modelling on shapes that may be meshed concurrently (see
+        Session#build_workspace), as both write to the same TShapes.
+        """
+        return self._lock
+
+    @staticmethod
+    def incremental_mesh(shape: OCC.Core.TopoDS.TopoDS_Shape, lin_deflection: float, ang_deflection: float):
+        """
+        The default mesher of #mesh.
+        """
+        OCC.Core.BRepMesh.BRepMesh_IncrementalMesh(shape, lin_deflection, False, ang_deflection)
+
+    def mesh(self,
+             shape: OCC.Core.TopoDS.TopoDS_Shape,
+             lin_deflection: float,
+             ang_deflection: float,
+             mesher: typing.Callable[[OCC.Core.TopoDS.TopoDS_Shape, float, float], typing.Any] = None) \
+            -> OCC.Core.TopoDS.TopoDS_Shape:
+        """
+        Ensures the faces of the shape are triangulated with the given (absolute) linear and angular deflection. Faces
+        that were, are left untouched. Shapes without faces are always meshed.
+
+        :param mesher: meshes a shape with the given deflections, defaults to #incremental_mesh. e.g. the viewer
+        passes one that releases the GIL while meshing.
+        :return: the shape, for convenience.
+        """
+        if mesher is None:
+            mesher = MeshCache.incremental_mesh
+
+        with self._lock:
+            params = (lin_deflection, ang_deflection)
+
+            faces = {SetPlaceableShape(f.Located(OCC.Core.TopLoc.TopLoc_Location())): f
+                     for f in ExploreUtils.explore_unique(shape, OCC.Core.TopAbs.TopAbs_FACE)}
+
+            stale = [(k, f) for k, f in faces.items() if self._entries.get(k, None) != params]
+
+            for k in faces.keys():
+                if k in self._entries:
+                    self._entries.move_to_end(k)
+
+            if len(faces) > 0 and len(stale) == 0:
+                self.hits += 1
+                return shape
+
+            self.misses += 1
+
+            if len(faces) == 0:
+                OCC.Core.BRepTools.breptools.Clean(shape)
+                mesher(shape, lin_deflection, ang_deflection)
+                return shape
+
+            # faces that were never triangulated need no cleaning, which keeps the edge polygons on the
+            # triangulations of their up-to-date neighbours
+            meshed = [f for _, f in stale
+                      if OCC.Core.BRep.BRep_Tool_Triangulation(f, OCC.Core.TopLoc.TopLoc_Location()) is not None]
+            if len(meshed) > 0:
+                OCC.Core.BRepTools.breptools.Clean(GeomUtils.make_compound(*meshed))
+
+            mesher(GeomUtils.make_compound(*[f for _, f in stale]), lin_deflection, ang_deflection)
+
+            for k, _ in stale:
+                self._entries[k] = params
+                self._entries.move_to_end(k)
+
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+            return shape
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
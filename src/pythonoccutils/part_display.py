@@ -224,7 +224,7 @@ class PartDisplay(QtWidgets.QMainWindow):
 
         self._part_ais = self._occ_viewer._display.DisplayShape(self._part.shape)[0]
 
-        for label, shapelist in self._part.subshapes.items():
+        for label, shapelist in self._part.subshape_map.items():
             for shape in shapelist:
                 display_pnt = OCC.Core.gp.gp_Pnt(*op.InterrogateUtils.center_of_mass(shape))
 
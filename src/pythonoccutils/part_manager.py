@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import collections.abc
+import functools
+import itertools
 import math
 import pdb
 import re
@@ -7,6 +10,7 @@ import typing
 
 import OCC
 import OCC.Core.Addons
+import OCC.Core.BRepAdaptor
 import OCC.Core.BOPAlgo
 import OCC.Core.BRepAlgoAPI
 import OCC.Core.BRepAlgoAPI
@@ -22,6 +26,7 @@ import OCC.Core.BOPAlgo
 import OCC.Core.BRepTools as BRepTools
 import OCC.Core.GeomAbs
 import OCC.Core.GC
+import OCC.Core.Precision
 import OCC.Core.GCE2d
 import OCC.Core.Geom
 import OCC.Core.Geom2d
@@ -29,11 +34,13 @@ import OCC.Core.ShapeAnalysis
 import OCC.Core.ShapeFix
 import OCC.Core.ShapeUpgrade
 import OCC.Core.TopAbs as ta
+import OCC.Core.TopLoc
 import OCC.Core.TopOpeBRepBuild
 import OCC.Core.TopTools
 import OCC.Core.TopoDS
 import OCC.Core.gp
 import OCC.Core.gp as gp
+import numpy
 import parsimonious
 from OCC.Core.Geom import Geom_CylindricalSurface
 from OCC.Core.Message import Message_Gravity
@@ -47,6 +54,50 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+class SubshapeMap(collections.abc.Mapping):
+    """
+    Immutable mapping of label -> tuple of shapes, used as the subshape map of a Part.
+
+    Since neither the mapping nor the tuples are ever modified, Parts that do not change their labels
+    can share a SubshapeMap (and individual tuples) instead of copying it.
+    """
+
+    def __init__(self, subshapes: typing.Mapping[str, typing.Iterable[OCC.Core.TopoDS.TopoDS_Shape]] = None):
+        # tuple() of a tuple returns the same instance, so tuples are shared rather than copied
+        self._entries = {} if subshapes is None else {n: tuple(l) for n, l in subshapes.items()}
+
+    @staticmethod
+    def of(subshapes: typing.Mapping[str, typing.Iterable[OCC.Core.TopoDS.TopoDS_Shape]]) -> SubshapeMap:
+        """
+        :return: subshapes if it is already a SubshapeMap, otherwise a new SubshapeMap with the same entries.
+        """
+        if isinstance(subshapes, SubshapeMap):
+            return subshapes
+
+        return SubshapeMap(subshapes)
+
+    def __getitem__(self, name: str) -> typing.Tuple[OCC.Core.TopoDS.TopoDS_Shape, ...]:
+        return self._entries[name]
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def to_dict(self) -> typing.Dict[str, typing.List[OCC.Core.TopoDS.TopoDS_Shape]]:
+        """
+        :return: a mutable copy of this map, as a dict of lists.
+        """
+        return {n: list(l) for n, l in self._entries.items()}
+
+
+SubshapeMap.EMPTY = SubshapeMap()
+
+
 class Part:
 
     def pruned(self) -> Part:
@@ -57,16 +108,15 @@ class Part:
         """
         new_named_subshapes = {}
 
-        shape_set = set()
-        for s in op.InterrogateUtils.traverse_all_subshapes(self._shape):
-            shape_set.add(op.SetPlaceableShape(s))
+        # note that the index contains the root shape, which is not considered part of its own hierarchy
+        shape_index = op.ShapeIndex.of_subshapes(self.shape)
 
-        logger.debug(f"Filtering shape set {shape_set}")
+        logger.debug(f"Filtering shape index of {len(shape_index)} shapes")
 
-        for n, l in self._named_subshapes.items():
+        for n, l in self.subshape_map.items():
             sublist = []
             for s in l:
-                if op.SetPlaceableShape(s) in shape_set:
+                if s in shape_index and not s.IsSame(self.shape):
                     logger.debug(f"Preserving {s}")
                     sublist.append(s)
                 else:
@@ -75,18 +125,19 @@ class Part:
             if len(sublist) > 0:
                 new_named_subshapes[n] = sublist
 
-        return Part(self._shape, new_named_subshapes)
+        return Part(self.shape, new_named_subshapes)
 
     def __init__(self,
                  shape: OCC.Core.TopoDS.TopoDS_Shape,
-                 subshapes: typing.Dict[str, typing.List[OCC.Core.TopoDS.TopoDS_Shape]] = None):
+                 subshapes: typing.Mapping[str, typing.Iterable[OCC.Core.TopoDS.TopoDS_Shape]] = None):
         self._shape = shape
-        self._extents = None
-        self._named_subshapes = {}
+        self._extents = {}
+        self._label_index = None
+        self._topology = None
+        self._named_subshapes = SubshapeMap.EMPTY if subshapes is None else SubshapeMap.of(subshapes)
 
-        if subshapes is not None:
-            for n, l in subshapes.items():
-                self._named_subshapes[n] = [s for s in l]
+        # (source Part, gp_Trsf) of a transform that has not been applied yet, see PartTransformer
+        self._deferred_transform: typing.Optional[typing.Tuple[Part, OCC.Core.gp.gp_Trsf]] = None
 
     def raise_exception(self) -> Part:
         """
@@ -110,10 +161,10 @@ class Part:
         if title is not None:
             print(title + ':')
 
-        print(str(self._shape) + " " + str(id(self._shape)))
-        print("    " + str([s for s in op.InterrogateUtils.traverse_direct_subshapes(self._shape)]))
+        print(str(self.shape) + " " + str(id(self.shape)))
+        print("    " + str([s for s in op.InterrogateUtils.traverse_direct_subshapes(self.shape)]))
 
-        for n, l in self._named_subshapes.items():
+        for n, l in self.subshape_map.items():
             print(f"    {n}: {', '.join([str(s) + str(id(s)) for s in l])}")
 
         print(f"BBox: xyz_span{self.extents.xyz_span} xyz_min:{self.extents.xyz_min} - xyz_max{self.extents.xyz_max}")
@@ -129,12 +180,9 @@ class Part:
         :param name:
         :return:
         """
-        subshapes = self.subshapes
-        for n, lst in subshapes.items():
-            if self.shape in lst:
-                lst.remove(self.shape)
+        subshapes = self._subshapes_without_root()
 
-        subshapes[name] = [self.shape]
+        subshapes[name] = (self.shape,)
         return Part(self.shape, subshapes)
 
     def name_recurse(self, name: str, subshape_filter: typing.Callable[[OCC.Core.TopoDS.TopoDS_Shape], bool] = None) -> Part:
@@ -148,10 +196,7 @@ class Part:
         if subshape_filter is None:
             subshape_filter = lambda s: True
 
-        subshapes = self.subshapes
-        for n, lst in subshapes.items():
-            if self.shape in lst:
-                lst.remove(self.shape)
+        subshapes = self._subshapes_without_root()
 
         named_subshapes = [self.shape]
         for s in op.InterrogateUtils.traverse_all_subshapes(self.shape):
@@ -161,6 +206,20 @@ class Part:
         subshapes[name] = named_subshapes
         return Part(self.shape, subshapes)
 
+    def _subshapes_without_root(self) -> typing.Dict[str, typing.Sequence[OCC.Core.TopoDS.TopoDS_Shape]]:
+        """
+        :return: a shallow copy of the subshape map with the root shape removed. Only lists that contained
+        the root shape are copied.
+        """
+        subshapes = dict(self.subshape_map.items())
+        for n, lst in subshapes.items():
+            if self.shape in lst:
+                lst = list(lst)
+                lst.remove(self.shape)
+                subshapes[n] = lst
+
+        return subshapes
+
     def do(self, consumer: typing.Callable[[Part], Part]) -> Part:
         """
         Applies the consumer to this part and returns the result.
@@ -190,36 +249,45 @@ class Part:
         result = OCC.Core.TopoDS.TopoDS_Compound()
 
         builder.MakeCompound(result)
-        builder.Add(result, self._shape)
+        builder.Add(result, self.shape)
 
-        subshape_list = self.subshapes
+        subshape_maps = [self.subshape_map]
 
         for other in others:
             builder.Add(result, other.shape)
 
-            subshapes_to_add = { sublabel + label: lst for label, lst in other.subshapes.items() }
+            if sublabel == "":
+                subshape_maps.append(other.subshape_map)
+            else:
+                subshape_maps.append({sublabel + label: lst for label, lst in other.subshape_map.items()})
+
+        result_part = Part(result, Part.merge_all_subshape_lists(*subshape_maps))
+
+        if self._label_index is not None and all(o._label_index is not None for o in others):
+            label_index = {k: set(v) for k, v in self._label_index.items()}
+            for other in others:
+                for k, v in other._label_index.items():
+                    label_index.setdefault(k, set()).update(sublabel + l for l in v)
 
-            subshape_list = Part.merge_subshape_lists(subshape_list, subshapes_to_add)
+            result_part._label_index = {k: frozenset(v) for k, v in label_index.items()}
 
-        return Part(result, subshape_list)
+        return result_part
 
     def pattern(self, range_supplier: typing.Iterable[int], part_modifier: typing.Callable[[int, Part], Part]) -> Part:
         """
         Iterates over the supplied range, adding the result parts.
-        part_modifier is provided with this part instance.
+        part_modifier is provided with this part instance. For large patterns, consider placing the copies with
+        part.transform.instance, which shares the geometry between them.
         :param range_supplier: provides indices.
         :param part_modifier: modifies the original part according to the index.
         :return: this Part modified according to modifier and i for all i in range
         """
-        result = None
-        for i in range_supplier:
-            intermediate_result = part_modifier(i, self)
-            if result is None:
-                result = intermediate_result
-            else:
-                result = result.add(intermediate_result)
+        results = [part_modifier(i, self) for i in range_supplier]
 
-        return result
+        if len(results) == 0:
+            return None
+
+        return PartFactory.compound(*results)
 
     @staticmethod
     def visualize(*parts):
@@ -230,25 +298,76 @@ class Part:
 
         pv.visualize_parts(*parts)
 
-    def align(self, subshape_name: str = None) -> PartAligner:
-        return PartAligner(self, subshape_name)
+    def align(self, subshape_name: str = None, precision: op.Extents.Precision = None) -> PartAligner:
+        return PartAligner(self, subshape_name, precision)
 
     @property
     def extents(self):
         """
-        :return: the occutils_python.Extents for this Part's root shape.
+        :return: the occutils_python.Extents for this Part's root shape, at the default precision.
         """
 
-        if self._extents is None:
-            self._extents = op.Extents(self._shape)
+        return self.get_extents()
 
-        return self._extents
+    def get_extents(self, precision: op.Extents.Precision = None) -> op.Extents:
+        """
+        :return: the occutils_python.Extents for this Part's root shape at the specified precision (or the
+        default precision). Results are cached per precision.
+        """
+        precision = op.Extents.resolve_precision(precision)
+
+        if precision not in self._extents and self._deferred_transform is not None:
+            # the extents of the source can be transformed without applying the transform to the shape, unless the
+            # transform rotates them. Checked first, computing the source extents would be wasted otherwise.
+            source, trsf = self._deferred_transform
+            if precision != op.Extents.Precision.OBB and op.Extents.is_axis_preserving(trsf):
+                extents = source.get_extents(precision).transformed(trsf)
+                if extents is not None:
+                    self._extents[precision] = extents
+
+        if precision not in self._extents:
+            self._extents[precision] = op.Extents(self.shape, precision)
+
+        return self._extents[precision]
+
+    @staticmethod
+    def deferred_transform(source: Part, trsf: OCC.Core.gp.gp_Trsf) -> Part:
+        """
+        :return: a Part equal to source transformed by trsf. The transform is only applied (with
+        BRepBuilderAPI_Transform) once the shape or subshape map of the result is needed, and consecutive deferred
+        transforms are composed so that a chain of transforms copies the geometry once.
+        """
+        if source._deferred_transform is not None:
+            source, source_trsf = source._deferred_transform
+            trsf = trsf.Multiplied(source_trsf)
+
+        result = Part(None)
+        result._named_subshapes = None
+        result._deferred_transform = (source, trsf)
+
+        return result
+
+    def _apply_deferred_transform(self):
+        if self._deferred_transform is None:
+            return
+
+        source, trsf = self._deferred_transform
+
+        # todo: for some reason I get errors when copy geom is enabled... In theory copy should be performed
+        # to ensure underlying geometry is not modified...
+        transformer = OCC.Core.BRepBuilderAPI.BRepBuilderAPI_Transform(source.shape, trsf, False)
+        transformed = source.perform_make_shape(transformer)
+
+        self._shape = transformed._shape
+        self._named_subshapes = transformed._named_subshapes
+        self._deferred_transform = None
 
     @property
     def shape(self):
         """
         :return: this Parts root shape
         """
+        self._apply_deferred_transform()
         return self._shape
 
     @property
@@ -299,7 +418,7 @@ class Part:
     def make(self):
         return PartMake(self)
 
-    def drill(self, drill: op.Drill):
+    def drill(self, drill: op.Drill, options: op.BoolOptions = None):
         drill_ops = drill.get_drill_ops(self.shape)
 
         union_tools = [Part(s) for d in drill_ops for s in d.shapes if d.is_inverted]
@@ -308,10 +427,10 @@ class Part:
         result = self
 
         if len(union_tools) > 0:
-            result = result.bool.union(*union_tools)
+            result = result.bool.union(*union_tools, options=options)
 
         if len(cut_tools) > 0:
-            result = result.bool.cut(*cut_tools)
+            result = result.bool.cut(*cut_tools, options=options)
 
         return result
 
@@ -323,11 +442,16 @@ class Part:
         orphaned subshapes.
         """
 
-        result = {}
-        for n, l in self._named_subshapes.items():
-            result[n] = [s for s in l]
+        return self.subshape_map.to_dict()
 
-        return result
+    @property
+    def subshape_map(self) -> SubshapeMap:
+        """
+        :return: the immutable subshape map of this Part. Unlike #subshapes this is not a copy, prefer it when
+        the map is only read or passed on to another Part.
+        """
+        self._apply_deferred_transform()
+        return self._named_subshapes
 
     def compound_subpart(self, name: str):
         """
@@ -336,7 +460,7 @@ class Part:
         """
         subshape = self.get_compound(name)
 
-        return Part(subshape, self.subshapes)
+        return Part(subshape, self.subshape_map)
 
     def single_subpart(self, name: str):
         """
@@ -345,7 +469,7 @@ class Part:
         """
         subshape = self.get_single(name)
 
-        return Part(subshape, self.subshapes)
+        return Part(subshape, self.subshape_map)
 
     def subpart(self, prefix: str, trim_prefix: bool = True):
         """
@@ -355,15 +479,25 @@ class Part:
         """
 
         new_subshapes = {}
-        for subshape_label, subshapes in self.subshapes.items():
+        for subshape_label, subshapes in self.subshape_map.items():
             if subshape_label.startswith(prefix):
 
                 trimmed_subshape_label = subshape_label[len(prefix):] if trim_prefix else subshape_label
 
+                new_subshapes[trimmed_subshape_label] = subshapes
+
+        result = Part(self.shape, new_subshapes)
 
-                new_subshapes[trimmed_subshape_label] = [s for s in subshapes]
+        if self._label_index is not None:
+            label_index = {}
+            for k, v in self._label_index.items():
+                labels = frozenset((l[len(prefix):] if trim_prefix else l) for l in v if l.startswith(prefix))
+                if len(labels) > 0:
+                    label_index[k] = labels
 
-        return Part(self.shape, new_subshapes)
+            result._label_index = label_index
+
+        return result
 
     @property
     def sew(self):
@@ -386,10 +520,10 @@ class Part:
         :return: The list of shapes in the subshape map that have the given name.
         """
 
-        if name not in self._named_subshapes:
+        if name not in self.subshape_map:
             raise ValueError(f"Unknown subshape: {name}")
 
-        return self._named_subshapes[name]
+        return list(self.subshape_map[name])
 
     def get_single(self, name: str) -> OCC.Core.TopoDS.TopoDS_Shape:
         """
@@ -407,27 +541,68 @@ class Part:
         """
         return op.GeomUtils.make_compound(*self.get(name))
 
+    def has_label(self, name: str) -> bool:
+        """
+        :return: True if the subshape map contains an entry with the given name.
+        """
+        return name in self.subshape_map
+
+    def labels_of(self, shape: OCC.Core.TopoDS.TopoDS_Shape) -> typing.FrozenSet[str]:
+        """
+        :return: the names under which the shape appears in the subshape map. Shapes are matched using IsSame,
+        i.e. orientation is ignored. The reverse index is built on first use and shared by derived Parts where possible.
+        """
+        return self._get_label_index().get(op.SetPlaceableShape(shape), frozenset())
+
+    def _get_label_index(self) -> typing.Dict[op.SetPlaceableShape, typing.FrozenSet[str]]:
+        if self._label_index is None:
+            label_index = {}
+            for n, l in self.subshape_map.items():
+                for s in l:
+                    label_index.setdefault(op.SetPlaceableShape(s), set()).add(n)
+
+            self._label_index = {k: frozenset(v) for k, v in label_index.items()}
+
+        return self._label_index
+
+    @property
+    def topology(self) -> op.ShapeTopology:
+        """
+        :return: adjacency maps (vertex -> edges, edge -> faces, face -> solids) of this Part's shape, built on
+        first use.
+        """
+        if self._topology is None:
+            self._topology = op.ShapeTopology.of(self.shape)
+
+        return self._topology
+
     def rename_subshape(self, src_name: str, dst_name: str):
         """
         Checks that the dst_name is free, and renames all subshapes with src_name to dst_name
         :return: a new Part with updated subshape map
         """
 
-        if dst_name in self._named_subshapes:
+        if dst_name in self.subshape_map:
             raise ValueError("Name already in use")
 
         updated_subshapes = {}
 
-        for n, s in self._named_subshapes.items():
+        for n, s in self.subshape_map.items():
             if n == src_name:
                 n = dst_name
 
             updated_subshapes[n] = s
 
-        return Part(self.shape, updated_subshapes)
+        result = Part(self.shape, updated_subshapes)
+
+        if self._label_index is not None:
+            result._label_index = {
+                k: frozenset(dst_name if l == src_name else l for l in v) for k, v in self._label_index.items()}
+
+        return result
 
     @staticmethod
-    def clone_subshape_map(subshape_map: typing.Dict[str, typing.List[OCC.Core.TopoDS.TopoDS_Shape]]):
+    def clone_subshape_map(subshape_map: typing.Mapping[str, typing.Iterable[OCC.Core.TopoDS.TopoDS_Shape]]):
         """
         Copies the specified subshape map and returns it. TopoDS_Shapes are not copied.
         """
@@ -440,36 +615,45 @@ class Part:
         return result
 
     @staticmethod
-    def merge_subshape_lists(s0: typing.Dict[str, typing.List[OCC.Core.TopoDS.TopoDS_Shape]],
-                             s1: typing.Dict[str, typing.List[OCC.Core.TopoDS.TopoDS_Shape]]):
+    def merge_subshape_lists(s0: typing.Mapping[str, typing.Iterable[OCC.Core.TopoDS.TopoDS_Shape]],
+                             s1: typing.Mapping[str, typing.Iterable[OCC.Core.TopoDS.TopoDS_Shape]]) -> SubshapeMap:
 
         """
         Combines the subshape lists. Uniqueness of shape instances is not checked, so two identical shapes
-        may end up in the subshape map.
+        may end up in the subshape map. Labels present in only one of the maps share their shape tuple with
+        the input.
         """
 
-        result = {}
+        result = dict(SubshapeMap.of(s0).items())
 
-        for k, v in s0.items():
-            if k not in result:
-                result[k] = []
+        for k, v in SubshapeMap.of(s1).items():
+            if k in result:
+                result[k] = result[k] + v
+            else:
+                result[k] = v
 
-            for s in v:
-                result[k].append(s)
+        return SubshapeMap(result)
 
-        for k, v in s1.items():
-            if k not in result:
-                result[k] = []
+    @staticmethod
+    def merge_all_subshape_lists(
+            *subshape_maps: typing.Mapping[str, typing.Iterable[OCC.Core.TopoDS.TopoDS_Shape]]) -> SubshapeMap:
+        """
+        Equivalent to folding merge_subshape_lists over the maps, but each label's shapes are concatenated once,
+        so merging n maps is linear in the total number of entries rather than quadratic.
+        """
+        merged: typing.Dict[str, typing.List[typing.Tuple[OCC.Core.TopoDS.TopoDS_Shape, ...]]] = {}
 
-            for s in v:
-                result[k].append(s)
+        for subshape_map in subshape_maps:
+            for k, v in SubshapeMap.of(subshape_map).items():
+                merged.setdefault(k, []).append(v)
 
-        return result
+        return SubshapeMap({k: v[0] if len(v) == 1 else tuple(itertools.chain.from_iterable(v))
+                            for k, v in merged.items()})
 
     @staticmethod
     def map_subshape_changes(
             new_shape: OCC.Core.TopoDS.TopoDS_Shape,
-            existing_subshapes: typing.Dict[str, typing.List[OCC.Core.TopoDS.TopoDS_Shape]],
+            existing_subshapes: typing.Mapping[str, typing.Iterable[OCC.Core.TopoDS.TopoDS_Shape]],
             mks: typing.Union[
                 OCC.Core.BRepBuilderAPI.BRepBuilderAPI_MakeShape,
                 OCC.Core.BRepTools.BRepTools_History,
@@ -489,41 +673,82 @@ class Part:
         else:
             raise ValueError("Unsupported MakeShape type")
 
-        result = Part.clone_subshape_map(existing_subshapes)
+        same_buckets, partner_buckets = Part._bucket_subshapes(new_shape, map_is_same, map_is_partner)
 
-        if map_is_partner or map_is_same:
-            all_new_subshapes = [s for s in op.InterrogateUtils.traverse_all_subshapes(new_shape)]
-        else:
-            all_new_subshapes = None
+        # the same shape is often labelled several times, only interrogate its history once
+        replacements = {}
 
-        for name in result.keys():
+        result = {}
+
+        for name, shape_list in existing_subshapes.items():
             updated_shape_list = []
+            seen = set()
 
-            for shape in result[name]:
-                if get_is_deleted(shape):
-                    continue
+            for shape in shape_list:
+                shape_key = op.SetPlaceableShape(shape)
 
-                new_subshapes = []
-                if map_is_same:
-                    new_subshapes += [s for s in all_new_subshapes if s.IsSame(shape)]
+                replaced_subshapes = replacements.get((shape_key, shape.Orientation()))
+                if replaced_subshapes is None:
+                    if get_is_deleted(shape):
+                        replaced_subshapes = []
+                    else:
+                        new_subshapes = []
+                        if map_is_same:
+                            new_subshapes += same_buckets.get(shape_key, [])
 
-                if map_is_partner:
-                    new_subshapes += [s for s in all_new_subshapes if s.IsPartner(shape)]
+                        if map_is_partner:
+                            new_subshapes += partner_buckets.get(Part._partner_key(shape), [])
 
-                new_subshapes += [l for l in op.ListUtils.iterate_list(mks.Modified(shape))]
-                generated_from = [l for l in op.ListUtils.iterate_list(mks.Generated(shape))]
+                        new_subshapes += [l for l in op.ListUtils.iterate_list(mks.Modified(shape))]
+                        generated_from = [l for l in op.ListUtils.iterate_list(mks.Generated(shape))]
 
-                replaced_subshapes = [shape] if len(new_subshapes) == 0 else new_subshapes
-                replaced_subshapes += generated_from
+                        replaced_subshapes = [shape] if len(new_subshapes) == 0 else new_subshapes
+                        replaced_subshapes += generated_from
 
-                replaced_subshapes = [s for s in replaced_subshapes if s not in updated_shape_list]
+                    replacements[(shape_key, shape.Orientation())] = replaced_subshapes
 
-                updated_shape_list += replaced_subshapes
+                for s in replaced_subshapes:
+                    # equivalent to TopoDS_Shape.IsEqual
+                    s_key = (op.SetPlaceableShape(s), s.Orientation())
+                    if s_key not in seen:
+                        seen.add(s_key)
+                        updated_shape_list.append(s)
 
             result[name] = updated_shape_list
 
         return result
 
+    @staticmethod
+    def _partner_key(shape: OCC.Core.TopoDS.TopoDS_Shape) -> op.SetPlaceableShape:
+        """
+        :return: a key that is equal for shapes that are IsPartner, i.e. share the same TShape.
+        """
+        return op.SetPlaceableShape(shape.Located(OCC.Core.TopLoc.TopLoc_Location()))
+
+    @staticmethod
+    def _bucket_subshapes(shape: OCC.Core.TopoDS.TopoDS_Shape,
+                          by_same: bool,
+                          by_partner: bool) -> typing.Tuple[
+            typing.Dict[op.SetPlaceableShape, typing.List[OCC.Core.TopoDS.TopoDS_Shape]],
+            typing.Dict[op.SetPlaceableShape, typing.List[OCC.Core.TopoDS.TopoDS_Shape]]]:
+        """
+        Groups all subshapes of shape (in traversal order) by IsSame and IsPartner identity, in a single pass.
+        """
+        same_buckets = {}
+        partner_buckets = {}
+
+        if not by_same and not by_partner:
+            return same_buckets, partner_buckets
+
+        for s in op.InterrogateUtils.traverse_all_subshapes(shape):
+            if by_same:
+                same_buckets.setdefault(op.SetPlaceableShape(s), []).append(s)
+
+            if by_partner:
+                partner_buckets.setdefault(Part._partner_key(s), []).append(s)
+
+        return same_buckets, partner_buckets
+
     def perform_make_shape(self,
                            mks: typing.Union[
                                OCC.Core.BRepBuilderAPI.BRepBuilderAPI_MakeShape,
@@ -544,7 +769,7 @@ class Part:
 
         return Part(
             shape,
-            Part.map_subshape_changes(shape, self._named_subshapes, mks, **kwargs))
+            Part.map_subshape_changes(shape, self.subshape_map, mks, **kwargs))
 
 
 class PartSew:
@@ -562,7 +787,7 @@ class PartSew:
         sewed_shape = sew.SewedShape()
 
         return Part(sewed_shape,
-                    Part.map_subshape_changes(sew.SewedShape(), self._part.subshapes, sew.GetContext().History()))
+                    Part.map_subshape_changes(sew.SewedShape(), self._part.subshape_map, sew.GetContext().History()))
 
 
 class PartValidate:
@@ -628,11 +853,14 @@ class PartSave:
         op.IOUtils.save_shape_stl(self._part.shape, filename, **kwargs)
         return self._part
 
-    def stl_solids(self, name: str, **kwargs) -> Part:
+    def stl_solids(self, name: str, lin_deflection: float = 0.01, ang_deflection: float = 0.5) -> Part:
+        # mesh the part once, the solids share its faces
+        op.MeshCache.instance().mesh(self._part.shape, lin_deflection, ang_deflection)
+
         for i, s in enumerate(self._part.explore.solid.get()):
             filename = f"{name}-{i}.stl"
             logger.debug(f"Writing {filename}")
-            op.IOUtils.save_shape_stl(s.shape, filename, **kwargs)
+            op.IOUtils.save_shape_stl(s.shape, filename, lin_deflection, ang_deflection)
 
         return self._part
 
@@ -642,12 +870,19 @@ class PartArray:
     def __init__(self, part: Part):
         self._part = part
 
-    def on_verts_of(self, other: Part) -> Part:
+    def on_verts_of(self, other: Part, instance: bool = False) -> Part:
+        """
+        :param instance: if True, the copies share geometry with this Part, see PartTransformer#instance
+        """
         result = []
 
         for v in other.explore.vertex.get():
             x, y, z = op.InterrogateUtils.vertex_to_xyz(v.shape)
-            result.append(self._part.transform.translate(x, y, z))
+
+            if instance:
+                result.append(self._part.transform.translate_instance(x, y, z))
+            else:
+                result.append(self._part.transform.translate(x, y, z))
 
         return PartFactory.compound(*result)
 
@@ -726,7 +961,7 @@ class PartCleanup:
 
         return Part(
             shape,
-            Part.map_subshape_changes(shape, self._part.subshapes, mkw, map_is_partner=True, map_is_same=True))
+            Part.map_subshape_changes(shape, self._part.subshape_map, mkw, map_is_partner=True, map_is_same=True))
 
     def fix_small_face(self):
         sf = OCC.Core.ShapeFix.ShapeFix_FixSmallFace()
@@ -737,7 +972,7 @@ class PartCleanup:
         shape = sf.Shape()
         return Part(
             shape,
-            Part.map_subshape_changes(shape, self._part.subshapes, sf.Context().History()))
+            Part.map_subshape_changes(shape, self._part.subshape_map, sf.Context().History()))
 
     def fix_solid(self):
         sf = OCC.Core.ShapeFix.ShapeFix_Solid()
@@ -747,7 +982,7 @@ class PartCleanup:
 
         shape = sf.Shape()
 
-        return Part(shape, Part.map_subshape_changes(shape, self._part.subshapes, sf.Context().History()))
+        return Part(shape, Part.map_subshape_changes(shape, self._part.subshape_map, sf.Context().History()))
 
     def __call__(self,
                  unify_edges: bool = True,
@@ -763,7 +998,7 @@ class PartCleanup:
 
         return Part(
             shape,
-            Part.map_subshape_changes(shape, self._part.subshapes, unif.History()))
+            Part.map_subshape_changes(shape, self._part.subshape_map, unif.History()))
 
 
 class PartExplorer:
@@ -772,56 +1007,119 @@ class PartExplorer:
     to just re-implement it here.
     """
 
-    def __init__(self, part: Part, shape_type: OCC.Core.TopAbs.TopAbs_ShapeEnum):
+    def __init__(self, part: Part, shape_type: OCC.Core.TopAbs.TopAbs_ShapeEnum, unique: bool = False):
         self._part = part
         self._shape_type = shape_type
-        self._predicate: typing.Callable[[Part], bool] = lambda p: True
-        self._key: typing.Callable[[Part], float] = lambda p: 0.0
+        self._unique = unique
+        self._predicate: typing.Optional[typing.Callable[[Part], bool]] = None
+        self._key: typing.Optional[typing.Callable[[Part], float]] = None
+        self._extents_predicates: typing.List[op.ExtentsPredicate] = []
 
     def filter_by(self, predicate: typing.Callable[[Part], bool]):
+        if isinstance(predicate, op.ExtentsPredicate):
+            self._extents_predicates.append(predicate)
+            return self
+
         old_pred = self._predicate
 
-        self._predicate = lambda e: (old_pred(e) and predicate(e))
+        self._predicate = predicate if old_pred is None else lambda e: (old_pred(e) and predicate(e))
         return self
 
     def order_by(self, key: typing.Callable[[Part], float]):
         self._key = key
         return self
 
+    def deduplicated(self):
+        """
+        Visit shared subshapes only once, see op.ExploreUtils.explore_unique.
+        """
+        self._unique = True
+        return self
+
+    def _iterate_shapes(self) -> typing.Generator[OCC.Core.TopoDS.TopoDS_Shape, None, None]:
+        if self._unique:
+            shapes = op.ExploreUtils.explore_unique(self._part.shape, self._shape_type)
+        else:
+            shapes = op.ExploreUtils.explore_iterate(self._part.shape, self._shape_type)
+
+        for s in op.Explorer.filter_by_extents(shapes, self._extents_predicates):
+            # only wrap shapes in a Part when a predicate needs one
+            if self._predicate is None or self._predicate(Part(s, self._part.subshape_map)):
+                yield s
+
+    def iterate(self) -> typing.Generator[Part, None, None]:
+        """
+        Lazily yields a Part for each shape that satisfies the filters, in exploration order. Any order_by key is
+        ignored.
+        """
+        return (Part(s, self._part.subshape_map) for s in self._iterate_shapes())
+
+    def __iter__(self):
+        return self.iterate()
+
     def get(self) -> typing.List[Part]:
-        result = [Part(s, self._part.subshapes) for s in
-                  op.ExploreUtils.explore_iterate(self._part.shape, self._shape_type)]
-        result = [p for p in result if self._predicate(p)]
-        result.sort(key=self._key)
+        if isinstance(self._key, op.ExtentsKey):
+            shapes = [s for s in self._iterate_shapes()]
+            return [Part(shapes[i], self._part.subshape_map) for i in self._key.order(shapes)]
+
+        result = [p for p in self.iterate()]
+
+        if self._key is not None:
+            result.sort(key=self._key)
+
         return result
 
+    def first(self) -> typing.Optional[Part]:
+        """
+        :return: the first matching Part, or None if there are none. Stops exploring early unless an order_by key
+        has been set.
+        """
+        if self._key is not None:
+            result = self.get()
+            return result[0] if len(result) > 0 else None
+
+        return next(self.iterate(), None)
+
+    def any(self) -> bool:
+        """
+        :return: True if any shape matches. Stops at the first match.
+        """
+        return next(self._iterate_shapes(), None) is not None
+
+    def count(self) -> int:
+        return sum(1 for _ in self._iterate_shapes())
+
     def get_single(self) -> Part:
-        result = self.get()
+        """
+        :return: the only matching Part. Stops exploring as soon as a second match is found.
+        """
+        shapes = [s for s in itertools.islice(self._iterate_shapes(), 2)]
 
-        if len(result) != 1:
-            raise ValueError(f"Expected result of explore to be a single element, was instead {len(result)}")
+        if len(shapes) != 1:
+            count = "more than one" if len(shapes) > 1 else "0"
+            raise ValueError(f"Expected result of explore to be a single element, was instead {count}")
 
-        return result[0]
+        return Part(shapes[0], self._part.subshape_map)
 
     @staticmethod
-    def solid_explorer(part: Part):
-        return PartExplorer(part, OCC.Core.TopAbs.TopAbs_ShapeEnum.TopAbs_SOLID)
+    def solid_explorer(part: Part, unique: bool = False):
+        return PartExplorer(part, OCC.Core.TopAbs.TopAbs_ShapeEnum.TopAbs_SOLID, unique)
 
     @staticmethod
-    def face_explorer(part: Part):
-        return PartExplorer(part, OCC.Core.TopAbs.TopAbs_ShapeEnum.TopAbs_FACE)
+    def face_explorer(part: Part, unique: bool = False):
+        return PartExplorer(part, OCC.Core.TopAbs.TopAbs_ShapeEnum.TopAbs_FACE, unique)
 
     @staticmethod
-    def vertex_explorer(part: Part):
-        return PartExplorer(part, OCC.Core.TopAbs.TopAbs_ShapeEnum.TopAbs_VERTEX)
+    def vertex_explorer(part: Part, unique: bool = False):
+        return PartExplorer(part, OCC.Core.TopAbs.TopAbs_ShapeEnum.TopAbs_VERTEX, unique)
 
     @staticmethod
-    def edge_explorer(part: Part):
-        return PartExplorer(part, OCC.Core.TopAbs.TopAbs_ShapeEnum.TopAbs_EDGE)
+    def edge_explorer(part: Part, unique: bool = False):
+        return PartExplorer(part, OCC.Core.TopAbs.TopAbs_ShapeEnum.TopAbs_EDGE, unique)
 
     @staticmethod
-    def wire_explorer(part: Part):
-        return PartExplorer(part, OCC.Core.TopAbs.TopAbs_ShapeEnum.TopAbs_WIRE)
+    def wire_explorer(part: Part, unique: bool = False):
+        return PartExplorer(part, OCC.Core.TopAbs.TopAbs_ShapeEnum.TopAbs_WIRE, unique)
 
 
 class PartExplore:
@@ -847,13 +1145,13 @@ class PartExtruder:
         mko = OCC.Core.BRepOffsetAPI.BRepOffsetAPI_MakeOffsetShape()
         mko.PerformBySimple(face, amount / 2)
 
-        offset_surface0 = op.Explorer.face_explorer(mko.Shape()).get()[0]
+        offset_surface0 = op.Explorer.face_explorer(mko.Shape()).first()
 
         reversed_face = face.Reversed()
         mko = OCC.Core.BRepOffsetAPI.BRepOffsetAPI_MakeOffsetShape()
         mko.PerformBySimple(reversed_face, amount / 2)
 
-        offset_surface1 = op.Explorer.face_explorer(mko.Shape()).get()[0]
+        offset_surface1 = op.Explorer.face_explorer(mko.Shape()).first()
 
         return PartFactory.loft([
             op.InterrogateUtils.outer_wire(offset_surface0),
@@ -892,9 +1190,10 @@ class PartExtruder:
                        amount: float,
                        union: bool = True):
 
-        verts = [v for v in op.Explorer.vertex_explorer(shell).get()]
-        edges = [e for e in op.Explorer.edge_explorer(shell).get()]
-        faces = [f for f in op.Explorer.face_explorer(shell).get()]
+        # shared edges and verts would otherwise be solidified once per owning face/edge
+        verts = [v for v in op.Explorer.vertex_explorer(shell, unique=True).get()]
+        edges = [e for e in op.Explorer.edge_explorer(shell, unique=True).get()]
+        faces = [f for f in op.Explorer.face_explorer(shell, unique=True).get()]
 
         # duplicate a sphere on each vertex
         solid_verts = [PartFactory.sphere(amount / 2)
@@ -907,25 +1206,14 @@ class PartExtruder:
         if not union:
             return PartFactory.compound(*solid_verts, *solid_edges, *solid_faces)
 
-        result = solid_faces[0]
+        tools = [*solid_faces[1:], *solid_edges, *solid_verts]
 
-        for i, sf in enumerate(solid_faces[1:]):
-            logger.debug(f"Fusing with bool face {i + 1}/{len(solid_faces)}")
-            result = result.bool.union(sf)
+        if len(tools) == 0:
+            return solid_faces[0]
 
-        for i, sf in enumerate(solid_edges):
-            logger.debug(f"Fusing with bool edge {i + 1}/{len(solid_edges)}")
-            try:
-                result = result.bool.union(sf)
-            except RuntimeError:
-                result.bool.union(sf).preview()
-                raise
+        logger.debug(f"Fusing {len(solid_faces)} faces, {len(solid_edges)} edges and {len(solid_verts)} verts")
 
-        for i, sf in enumerate(solid_verts):
-            logger.debug(f"Fusing with bool vert {i + 1}/{len(solid_verts)}")
-            result = result.bool.union(sf)
-
-        return result
+        return solid_faces[0].bool.union(*tools)
 
     def inflate_faces(self, amount: float, union: bool = True):
         """
@@ -939,7 +1227,7 @@ class PartExtruder:
 
         """
 
-        return Part(self._inflate_faces(self._part.shape, amount, union).shape, self._part.subshapes)
+        return Part(self._inflate_faces(self._part.shape, amount, union).shape, self._part.subshape_map)
 
     def square_offset(self,
                       amount: float,
@@ -1079,26 +1367,69 @@ class PartExtruder:
                     if ss not in extra_shapes[loft_profile_name]:
                         extra_shapes[loft_profile_name].append(ss)
 
-        return Part(result.shape, Part.merge_subshape_lists(result.subshapes, extra_shapes))
+        return Part(result.shape, Part.merge_subshape_lists(result.subshape_map, extra_shapes))
 
 
 class PartTransformer:
 
+    _deferred_by_default: bool = True
+
     def __init__(self, part):
         self._part = part
 
+    @staticmethod
+    def get_deferred_by_default() -> bool:
+        return PartTransformer._deferred_by_default
+
+    @staticmethod
+    def set_deferred_by_default(deferred: bool):
+        """
+        If True (the default), transforms are applied lazily, see Part#deferred_transform. Disable to apply
+        every transform immediately, e.g. to locate a failing transform while debugging.
+        """
+        PartTransformer._deferred_by_default = deferred
+
     def __call__(self, trsf_configurer: typing.Callable[[OCC.Core.gp.gp_Trsf], None]) -> Part:
         trsf = OCC.Core.gp.gp_Trsf()
         trsf_configurer(trsf)
-        # todo: for some reason I get errors when copy geom is enabled... In theory copy should be performed
-        # to ensure underlying geometry is not modified...
-        transformer = OCC.Core.BRepBuilderAPI.BRepBuilderAPI_Transform(self._part.shape, trsf, False)
 
-        return self._part.perform_make_shape(transformer)
+        result = Part.deferred_transform(self._part, trsf)
+
+        if not PartTransformer._deferred_by_default:
+            result._apply_deferred_transform()
+
+        return result
 
     def translate(self, dx: float = 0, dy: float = 0, dz: float = 0) -> Part:
         return self(lambda t: t.SetTranslation(gp.gp_Vec(dx, dy, dz)))
 
+    def instance(self, trsf_configurer: typing.Callable[[OCC.Core.gp.gp_Trsf], None], sublabel: str = "") -> Part:
+        """
+        Places a copy of this Part by applying a TopLoc_Location rather than transforming the geometry. The result
+        shares its TShapes with this Part, so the cost is independent of the size of the geometry. This makes it
+        suitable for patterns and arrays with many instances.
+        Only rigid transformations (translations and rotations) are supported.
+        :param sublabel: prefixed to each label of the instance, e.g. to tell apart the instances in an array.
+        """
+        trsf = OCC.Core.gp.gp_Trsf()
+        trsf_configurer(trsf)
+
+        if trsf.IsNegative() or math.fabs(trsf.ScaleFactor() - 1) > OCC.Core.Precision.precision.Confusion():
+            raise ValueError("Only translations and rotations can be instanced, scaling or mirroring requires a copy.")
+
+        location = OCC.Core.TopLoc.TopLoc_Location(trsf)
+
+        subshapes = {sublabel + label: [s.Moved(location) for s in lst]
+                     for label, lst in self._part.subshape_map.items()}
+
+        return Part(self._part.shape.Moved(location), subshapes)
+
+    def translate_instance(self, dx: float = 0, dy: float = 0, dz: float = 0, sublabel: str = "") -> Part:
+        """
+        Like translate, but see #instance
+        """
+        return self.instance(lambda t: t.SetTranslation(gp.gp_Vec(dx, dy, dz)), sublabel)
+
     def rotate(self, ax1: OCC.Core.gp.gp_Ax1, angle: float, offset: typing.Tuple[float, float, float] = None) -> Part:
         if offset is not None:
             ax1 = ax1.Translated(gp.gp_Vec(*offset))
@@ -1156,7 +1487,10 @@ class PartBool:
 
         # resulting part is a union of shapes from both parts
 
-    def union(self, *others: Part, glue: OCC.Core.BOPAlgo.BOPAlgo_GlueEnum = None) -> Part:
+    def union(self,
+              *others: Part,
+              glue: OCC.Core.BOPAlgo.BOPAlgo_GlueEnum = None,
+              options: op.BoolOptions = None) -> Part:
         fuse = OCC.Core.BRepAlgoAPI.BRepAlgoAPI_Fuse()
         if glue is not None:
             fuse.SetGlue(glue)
@@ -1166,53 +1500,125 @@ class PartBool:
                 raise ValueError("Argumentless bool can only be performed on compound shapes, "
                                  f"this shape has type {self._part.shape}")
 
-            tools = [Part(s, self._part.subshapes) for s in op.InterrogateUtils.traverse_direct_subshapes(self._part.shape)]
+            tools = [Part(s, self._part.subshape_map) for s in op.InterrogateUtils.traverse_direct_subshapes(self._part.shape)]
+
+            return self._boolop(fuse, tools[0:1], tools[1:], options)
+
+        options = op.BoolOptions.resolve(options)
+
+        if not options.prefilter:
+            return self._boolop(fuse, [self._part], [p for p in others], options)
+
+        # tools that touch neither the target nor another tool can simply be added to the result
+        index = op.ExtentsIndex([self._part.extents] + [p.extents for p in others], PartBool._prefilter_tolerance(options))
+        isolated = {i - 1 for i in index.isolated() if i != 0}
 
-            return self._boolop(fuse, tools[0:1], tools[1:])
+        fused_tools = [p for i, p in enumerate(others) if i not in isolated]
+        added_tools = [p for i, p in enumerate(others) if i in isolated]
 
-        return self._boolop(fuse, [self._part], [p for p in others])
+        logger.debug(f"Bool prefilter: fusing {len(fused_tools)} tools, adding {len(added_tools)} disjoint tools")
 
-    def cut(self, *others: Part) -> Part:
+        result = self._part if len(fused_tools) == 0 else self._boolop(fuse, [self._part], fused_tools, options)
+
+        return result if len(added_tools) == 0 else result.add(*added_tools)
+
+    def cut(self, *others: Part, options: op.BoolOptions = None) -> Part:
         if len(others) == 0:
             raise ValueError("No other parts specified")
 
-        return self._boolop(OCC.Core.BRepAlgoAPI.BRepAlgoAPI_Cut(),
-                                        [self._part],
-                                        [p for p in others])
+        options = op.BoolOptions.resolve(options)
+
+        tools, dropped_tools = self._prefilter_intersecting(others, options)
 
-    def common(self, *others: Part) -> Part:
+        if len(tools) == 0:
+            return PartBool._with_dropped_labels(self._part, dropped_tools)
+
+        return PartBool._with_dropped_labels(
+            self._boolop(OCC.Core.BRepAlgoAPI.BRepAlgoAPI_Cut(), [self._part], tools, options),
+            dropped_tools)
+
+    def common(self, *others: Part, options: op.BoolOptions = None) -> Part:
         if len(others) == 0:
             raise ValueError("No other parts specified")
 
-        return self._boolop(OCC.Core.BRepAlgoAPI.BRepAlgoAPI_Common(),
-                            [self._part],
-                            [p for p in others])
+        options = op.BoolOptions.resolve(options)
 
-    def section(self, *others: Part):
+        tools, dropped_tools = self._prefilter_intersecting(others, options)
+
+        if len(tools) == 0:
+            # nothing in common, so the result is empty and none of the labelled shapes survive
+            return PartBool._with_dropped_labels(
+                Part(op.GeomUtils.make_compound()),
+                [self._part, *dropped_tools])
+
+        return PartBool._with_dropped_labels(
+            self._boolop(OCC.Core.BRepAlgoAPI.BRepAlgoAPI_Common(), [self._part], tools, options),
+            dropped_tools)
+
+    def section(self, *others: Part, options: op.BoolOptions = None):
         if len(others) == 0:
             raise ValueError("No other parts specified")
 
         return self._boolop(OCC.Core.BRepAlgoAPI.BRepAlgoAPI_Section(),
                             [self._part],
-                            [p for p in others])
+                            [p for p in others],
+                            options)
+
+    @staticmethod
+    def _prefilter_tolerance(options: op.BoolOptions) -> float:
+        tolerance = OCC.Core.Precision.precision.Confusion()
+        if options.fuzzy_value is not None:
+            tolerance += options.fuzzy_value
+
+        return tolerance
+
+    def _prefilter_intersecting(self,
+                                tools: typing.Sequence[Part],
+                                options: op.BoolOptions) -> typing.Tuple[typing.List[Part], typing.List[Part]]:
+        """
+        :return: the tools whose bounding boxes intersect this part's, and those that do not. If prefiltering is
+        disabled, all tools are returned as intersecting.
+        """
+        if not options.prefilter:
+            return [t for t in tools], []
+
+        index = op.ExtentsIndex([t.extents for t in tools], PartBool._prefilter_tolerance(options))
+        intersecting = set(index.query(self._part.extents))
+
+        logger.debug(f"Bool prefilter: dropping {len(tools) - len(intersecting)}/{len(tools)} tools")
+
+        return [t for i, t in enumerate(tools) if i in intersecting], \
+            [t for i, t in enumerate(tools) if i not in intersecting]
+
+    @staticmethod
+    def _with_dropped_labels(part: Part, dropped: typing.List[Part]) -> Part:
+        """
+        Shapes of tools that do not contribute to the result are deleted by the boolean op, which leaves their
+        labels present but empty. Mirror that for tools removed by the prefilter.
+        """
+        if len(dropped) == 0:
+            return part
+
+        empty_labels = {n: () for p in dropped for n in p.subshape_map.keys() if n not in part.subshape_map}
+        if len(empty_labels) == 0:
+            return part
+
+        return Part(part.shape, Part.merge_subshape_lists(part.subshape_map, empty_labels))
 
     @staticmethod
     def _boolop(algo: OCC.Core.BRepAlgoAPI.BRepAlgoAPI_BooleanOperation,
                 args : typing.List[Part],
-                tools : typing.List[Part]) -> Part:
-
-        algo.SetNonDestructive(True)
-        algo.SetArguments(op.ListUtils.list([p.shape for p in args]))
-        algo.SetTools(op.ListUtils.list([p.shape for p in tools]))
+                tools : typing.List[Part],
+                options: op.BoolOptions = None) -> Part:
 
-        union_subshapes = args[0].subshapes
+        union_subshapes = args[0].subshape_map
         for p in args[1:]:
-            union_subshapes = Part.merge_subshape_lists(union_subshapes, p.subshapes)
+            union_subshapes = Part.merge_subshape_lists(union_subshapes, p.subshape_map)
 
         for p in tools:
-            union_subshapes = Part.merge_subshape_lists(union_subshapes, p.subshapes)
+            union_subshapes = Part.merge_subshape_lists(union_subshapes, p.subshape_map)
 
-        algo.Build()
+        op.BoolUtils.perform(algo, [p.shape for p in args], [p.shape for p in tools], options, non_destructive=True)
 
         if algo.HasErrors():
             report = algo.GetReport()
@@ -1269,29 +1675,32 @@ class PartMirror:
 class Fillet2dDefaultVertSelector:
 
     def __init__(self,
-                 source_edges: typing.List[OCC.Core.TopoDS.TopoDS_Edge],
+                 source_edges: typing.Union[op.ShapeTopology, typing.List[OCC.Core.TopoDS.TopoDS_Edge]],
                  allowed_edges: typing.List[OCC.Core.TopoDS.TopoDS_Edge]):
-        self._source_edges = source_edges
-        self._allowed_edges = allowed_edges
-        self._default_added_verts = []
+        """
+        :param source_edges: the edges used to determine vertex connectivity, or the topology of the shape being
+        filleted (preferred, as it avoids rebuilding the vertex -> edge map).
+        :param allowed_edges: only verts bounding one of these edges are selected.
+        """
+        if isinstance(source_edges, op.ShapeTopology):
+            self._topology = source_edges
+        else:
+            self._topology = op.ShapeTopology(op.GeomUtils.make_compound(*source_edges))
+
+        self._allowed_edges = op.ShapeIndex(allowed_edges)
+        self._default_added_verts = op.ShapeIndex()
 
     def __call__(self, vert: OCC.Core.TopoDS.TopoDS_Vertex) -> bool:
         # determine number of edges for vert, if 2, then a fillet can be performed
+        owner_edges = self._topology.vertex_edges(vert)
 
-        owner_edges = [e for e in self._allowed_edges if any(v.IsSame(vert) for v in op.Explorer.vertex_explorer(e).get())]
-
-        if len(owner_edges) == 0:
+        if not any(e in self._allowed_edges for e in owner_edges):
             # vertex not owned by any edge allowed to be filleted
             return False
 
-        connected_edge_count = 0
-        for edge in self._source_edges:
-            for v in op.Explorer.vertex_explorer(edge).get():
-                if v.IsSame(vert):
-                    connected_edge_count += 1
-                    if connected_edge_count > 1 and not any(v1.IsSame(vert) for v1 in self._default_added_verts):
-                        self._default_added_verts.append(vert)
-                        return True
+        if len(owner_edges) > 1 and vert not in self._default_added_verts:
+            self._default_added_verts.add(vert)
+            return True
 
         return False
 
@@ -1316,7 +1725,7 @@ class PartFilleter:
 
         mkf = OCC.Core.BRepFilletAPI.BRepFilletAPI_MakeFillet(self._part.shape)
 
-        for e in op.Explorer.edge_explorer(self._part.shape).filter_by(edge_selector).get():
+        for e in op.Explorer.edge_explorer(self._part.shape, unique=True).filter_by(edge_selector).get():
             mkf.Add(radius, e)
 
         mkf.Build()
@@ -1329,7 +1738,7 @@ class PartFilleter:
 
         mkf = OCC.Core.BRepFilletAPI.BRepFilletAPI_MakeChamfer(self._part.shape)
 
-        for e in op.Explorer.edge_explorer(self._part.shape).filter_by(edge_selector).get():
+        for e in op.Explorer.edge_explorer(self._part.shape, unique=True).filter_by(edge_selector).get():
             mkf.Add(radius, e)
 
         mkf.Build()
@@ -1342,14 +1751,15 @@ class PartFilleter:
                            str,
                            typing.Callable[[OCC.Core.TopoDS.TopoDS_Vertex], bool]] = None) -> Part:
         if isinstance(vert_selector, str):
-            verts_to_allow = set(self._part.subshapes[vert_selector])
+            verts_to_allow = set(self._part.subshape_map[vert_selector])
 
             def vert_selector(vert):
                 return vert in verts_to_allow
 
         if vert_selector is None:
-            all_edges = op.Explorer.edge_explorer(self._part.shape).get()
-            vert_selector = Fillet2dDefaultVertSelector(all_edges, all_edges)
+            vert_selector = Fillet2dDefaultVertSelector(
+                self._part.topology,
+                op.Explorer.edge_explorer(self._part.shape, unique=True).get())
 
         if self._part.shape.ShapeType() == OCC.Core.TopAbs.TopAbs_WIRE:
             result = self._part.make.face()
@@ -1358,7 +1768,7 @@ class PartFilleter:
 
         mkf = OCC.Core.BRepFilletAPI.BRepFilletAPI_MakeFillet2d(result.shape)
 
-        for v in op.Explorer.vertex_explorer(result.shape).filter_by(vert_selector).get():
+        for v in op.Explorer.vertex_explorer(result.shape, unique=True).filter_by(vert_selector).get():
             mkf.AddFillet(v, radius)
 
         mkf.Build()
@@ -1368,13 +1778,13 @@ class PartFilleter:
         # seems like BRepFilletAPI_MakeFillet2D:Modified does a cast of the supplied shape to TopoDS_Edge.
         # this fails when the input shape is a vertex, so strip out any labelled verts. Not ideal, but better
         # than a crash
-        result_subshapes = {s:[e for e in ss if e.ShapeType() != OCC.Core.TopAbs.TopAbs_VERTEX] for s,ss in result.subshapes.items()}
+        result_subshapes = {s:[e for e in ss if e.ShapeType() != OCC.Core.TopAbs.TopAbs_VERTEX] for s,ss in result.subshape_map.items()}
         result = Part(result, result_subshapes).perform_make_shape(mkf)
 
         if self._part.shape.ShapeType() == OCC.Core.TopAbs.TopAbs_WIRE:
             root_face = result.shape
-            updated_subshapes = {n: [l1 for l1 in l if l1 != root_face] for n, l in result.subshapes.items()}
-            wire = op.Explorer.wire_explorer(result.shape).get()[0]
+            updated_subshapes = {n: [l1 for l1 in l if l1 != root_face] for n, l in result.subshape_map.items()}
+            wire = op.Explorer.wire_explorer(result.shape).first()
 
             return Part(wire, updated_subshapes)
         else:
@@ -1387,9 +1797,14 @@ class PartFilleter:
 
         mkf = OCC.Core.BRepFilletAPI.BRepFilletAPI_MakeFillet(self._part.shape)
 
+        # edges shared by two selected faces must only be added once
+        edges = op.ShapeIndex()
         for f in op.Explorer.face_explorer(self._part.shape).filter_by(face_selector).get():
-            for e in op.Explorer.edge_explorer(f).get():
-                mkf.Add(radius, e)
+            for e in op.ExploreUtils.explore_unique(f, OCC.Core.TopAbs.TopAbs_EDGE):
+                edges.add(e)
+
+        for e in edges:
+            mkf.Add(radius, e)
 
         mkf.Build()
 
@@ -1401,9 +1816,14 @@ class PartFilleter:
 
         mkf = OCC.Core.BRepFilletAPI.BRepFilletAPI_MakeChamfer(self._part.shape)
 
+        # edges shared by two selected faces must only be added once
+        edges = op.ShapeIndex()
         for f in op.Explorer.face_explorer(self._part.shape).filter_by(face_selector).get():
-            for e in op.Explorer.edge_explorer(f).get():
-                mkf.Add(radius, e)
+            for e in op.ExploreUtils.explore_unique(f, OCC.Core.TopAbs.TopAbs_EDGE):
+                edges.add(e)
+
+        for e in edges:
+            mkf.Add(radius, e)
 
         mkf.Build()
 
@@ -1415,20 +1835,25 @@ class PartFilleter:
 
         mkf = OCC.Core.BRepFilletAPI.BRepFilletAPI_MakeFillet(self._part.shape)
 
+        edges = op.ShapeIndex()
+
         shapes = [s for n in names for s in self._part.get(n)] #[s for n in self._part.get(n) for n in names]
         for s in shapes:
             if isinstance(s, OCC.Core.TopoDS.TopoDS_Edge):
-                mkf.Add(radius, s)
+                edges.add(s)
             else:
-                for e in op.Explorer.edge_explorer(s).get():
-                    mkf.Add(radius, e)
+                for e in op.ExploreUtils.explore_unique(s, OCC.Core.TopAbs.TopAbs_EDGE):
+                    edges.add(e)
+
+        for e in edges:
+            mkf.Add(radius, e)
 
         mkf.Build()
 
         return self._part.perform_make_shape(mkf)
 
     def fillet_edges_by_query(self, radius, query: str):
-        to_fillet = set(op.Explorer.edge_explorer(self._part.query(query).shape).get())
+        to_fillet = op.ShapeIndex.of_subshapes(self._part.query(query).shape, OCC.Core.TopAbs.TopAbs_EDGE)
 
         return self.fillet_edges(radius, lambda e: e in to_fillet)
 
@@ -1445,9 +1870,7 @@ class PartFilleter:
 
             edge_list.append(s)
 
-        return self.fillet2d_verts(radius, vert_selector=Fillet2dDefaultVertSelector(
-            op.Explorer.edge_explorer(self._part.shape).get(),
-            edge_list))
+        return self.fillet2d_verts(radius, vert_selector=Fillet2dDefaultVertSelector(self._part.topology, edge_list))
 
     def __call__(self, radius: float) -> Part:
         return self.fillet_edges(radius)
@@ -1457,9 +1880,10 @@ class PartAligner:
 
     align_re = re.compile("[xyz]+_(min|mid|max)_to(_(min|mid|max))?")
 
-    def __init__(self, part, subshape_name: str = None):
+    def __init__(self, part, subshape_name: str = None, precision: op.Extents.Precision = None):
         self._part = part
         self._subshape_name = subshape_name
+        self._precision = precision
 
     def com_to_origin(self) -> Part:
         com = op.InterrogateUtils.center_of_mass(self._part.shape)
@@ -1478,9 +1902,9 @@ class PartAligner:
         axes = align_args[0]
         source_part = align_args[1]
 
-        source_extents = self._part.extents \
+        source_extents = self._part.get_extents(self._precision) \
             if self._subshape_name is None \
-            else op.Extents(op.GeomUtils.make_compound(*self._part.get(self._subshape_name)))
+            else op.Extents(op.GeomUtils.make_compound(*self._part.get(self._subshape_name)), self._precision)
 
         if len(align_args) < 4:
             def result_fn_coords(**kwargs) -> Part:
@@ -1502,12 +1926,14 @@ class PartAligner:
         dest_part = align_args[3]
 
         def result_fn(dest_shape: typing.Union[OCC.Core.TopoDS.TopoDS_Shape, Part]) -> Part:
-            if not isinstance(dest_shape, OCC.Core.TopoDS.TopoDS_Shape):
-                # must be a part
-                dest_shape = dest_shape.shape
+            if isinstance(dest_shape, OCC.Core.TopoDS.TopoDS_Shape):
+                dest_extents = op.Extents(dest_shape, self._precision)
+            else:
+                # must be a part, reuse its cached extents
+                dest_extents = dest_shape.get_extents(self._precision)
 
             align_source = getattr(source_extents, f"xyz_{source_part}")
-            align_dest = getattr(op.Extents(dest_shape), f"xyz_{dest_part}")
+            align_dest = getattr(dest_extents, f"xyz_{dest_part}")
 
             dx = align_dest[0] - align_source[0] if "x" in axes else 0
             dy = align_dest[1] - align_source[1] if "y" in axes else 0
@@ -1570,7 +1996,7 @@ class PartLoft:
 
             new_subshapes = Part.map_subshape_changes(
                 shape,
-                result.subshapes,
+                result.subshape_map,
                 fsf.Context().History())
 
             result = Part(shape, new_subshapes)
@@ -1794,15 +2220,17 @@ class PartFactory:
 
     @staticmethod
     def compound(*parts: Part) -> Part:
+        """
+        :return: a Part with a single-level compound of all the parts' shapes, and their subshape maps merged.
+        A single part is returned as-is.
+        """
         if len(parts) == 0:
             raise ValueError("No parts specified for compound")
 
-        p = parts[0]
+        if len(parts) == 1:
+            return parts[0]
 
-        for p2 in parts[1:]:
-            p = p.add(p2)
-
-        return p
+        return parts[0].add(*parts[1:])
 
     @staticmethod
     def union(*parts: Part) -> Part:
@@ -1826,10 +2254,17 @@ class PartFactory:
         return Part(OCC.Core.Addons.text_to_brep(text, font_name, font_aspect, size, is_composite_curve))
 
     @staticmethod
-    def hex_lattice(rows: int, cols: int, hex_radius: float = 0.9, grid_radius: float = 1) -> Part:
+    def hex_lattice(rows: int,
+                    cols: int,
+                    hex_radius: float = 0.9,
+                    grid_radius: float = 1,
+                    instance: bool = False) -> Part:
+        """
+        :param instance: if True, the cells share geometry, see PartTransformer#instance
+        """
         base_shape = Part(op.GeomUtils.regular_polygon(hex_radius, 6)).make.face()
 
-        part = None
+        cells = []
 
         col_spacing = grid_radius * 3
         row_spacing = math.sqrt(3) * 0.5 * grid_radius
@@ -1841,11 +2276,14 @@ class PartFactory:
             for c in range(0, cols):
                 x = col_spacing * c + x_offs
 
-                subpart = base_shape.transform.translate(dx=x, dy=y)
+                if instance:
+                    subpart = base_shape.transform.translate_instance(dx=x, dy=y)
+                else:
+                    subpart = base_shape.transform.translate(dx=x, dy=y)
 
-                part = subpart if part is None else part.add(subpart)
+                cells.append(subpart)
 
-        return part
+        return PartFactory.compound(*cells)
 
     @staticmethod
     def lattice(rows: int, cols: int, diag_a: bool=False, diag_b: bool=False) -> Part:
@@ -2005,8 +2443,8 @@ class PartFactory:
 
         cylinder = OCC.Core.BRepPrimAPI.BRepPrimAPI_MakeCylinder(radius, height_abs).Shape()
         wires = op.Explorer(cylinder, OCC.Core.TopAbs.TopAbs_WIRE) \
-            .filter_by(lambda w: op.Extents(w).z_span < height_abs) \
-            .order_by(lambda s: op.Extents(s).z_mid) \
+            .filter_by(op.Explorer.by_depth_max_filter(height_abs)) \
+            .order_by(op.Explorer.by_depth_mid_order()) \
             .get()
 
         named_subshapes = {}
@@ -2165,11 +2603,188 @@ class ShapeSpecifier:
         return op.Explorer(part.shape, self._expected_shape_type).get()
 
 
+class PartPropertyTable:
+    """
+    Integer ids (rows) and geometric properties of all subshapes of one type in a shape, used to evaluate query
+    filters as masks. Each column is computed for every subshape at once on first use, rows are looked up by shape
+    identity (IsSame) through a ShapeIndex. Tables are shared through the PropertyCache, so repeated queries against a Part only pay
+    for the array comparisons.
+    """
+
+    CURVE_TYPES = {
+        "line": OCC.Core.GeomAbs.GeomAbs_Line,
+        "circle": OCC.Core.GeomAbs.GeomAbs_Circle,
+        "ellipse": OCC.Core.GeomAbs.GeomAbs_Ellipse,
+        "hyperbola": OCC.Core.GeomAbs.GeomAbs_Hyperbola,
+        "parabola": OCC.Core.GeomAbs.GeomAbs_Parabola,
+        "bezier": OCC.Core.GeomAbs.GeomAbs_BezierCurve,
+        "bspline": OCC.Core.GeomAbs.GeomAbs_BSplineCurve,
+        "offset": OCC.Core.GeomAbs.GeomAbs_OffsetCurve
+    }
+
+    SURFACE_TYPES = {
+        "plane": OCC.Core.GeomAbs.GeomAbs_Plane,
+        "cylinder": OCC.Core.GeomAbs.GeomAbs_Cylinder,
+        "cone": OCC.Core.GeomAbs.GeomAbs_Cone,
+        "sphere": OCC.Core.GeomAbs.GeomAbs_Sphere,
+        "torus": OCC.Core.GeomAbs.GeomAbs_Torus,
+        "bezier": OCC.Core.GeomAbs.GeomAbs_BezierSurface,
+        "bspline": OCC.Core.GeomAbs.GeomAbs_BSplineSurface,
+        "revolution": OCC.Core.GeomAbs.GeomAbs_SurfaceOfRevolution,
+        "extrusion": OCC.Core.GeomAbs.GeomAbs_SurfaceOfExtrusion,
+        "offset": OCC.Core.GeomAbs.GeomAbs_OffsetSurface
+    }
+
+    # the measure reported by #measures for each shape type
+    MEASURES = {
+        "length": [OCC.Core.TopAbs.TopAbs_EDGE, OCC.Core.TopAbs.TopAbs_WIRE],
+        "area": [OCC.Core.TopAbs.TopAbs_FACE, OCC.Core.TopAbs.TopAbs_SHELL],
+        "volume": [OCC.Core.TopAbs.TopAbs_SOLID, OCC.Core.TopAbs.TopAbs_COMPSOLID, OCC.Core.TopAbs.TopAbs_COMPOUND]
+    }
+
+    def __init__(self, shape: OCC.Core.TopoDS.TopoDS_Shape, shape_type: OCC.Core.TopAbs.TopAbs_ShapeEnum):
+        self._shape_type = shape_type
+        self._index = op.ShapeIndex.of_subshapes(shape, shape_type)
+        self._shapes = [s for s in self._index]
+        self._columns: typing.Dict[str, numpy.ndarray] = {}
+
+    @staticmethod
+    def of(part: Part, shape_type: OCC.Core.TopAbs.TopAbs_ShapeEnum) -> PartPropertyTable:
+        return op.PropertyCache.instance().get(
+            "part_property_table", part.shape, lambda: PartPropertyTable(part.shape, shape_type), shape_type)
+
+    def __len__(self):
+        return len(self._shapes)
+
+    @property
+    def shape_type(self) -> OCC.Core.TopAbs.TopAbs_ShapeEnum:
+        return self._shape_type
+
+    def row(self, shape: OCC.Core.TopoDS.TopoDS_Shape) -> typing.Optional[int]:
+        """
+        :return: the row of the shape, or None if it is not a subshape of the table's type.
+        """
+        index = self._index.index_of(shape)
+        return None if index is None else index - 1
+
+    def rows(self, shapes: typing.Iterable[OCC.Core.TopoDS.TopoDS_Shape]) -> numpy.ndarray:
+        """
+        :return: the rows of the shapes as an integer array, -1 where a shape is not a subshape of the table's type.
+        """
+        return numpy.array([-1 if r is None else r for r in (self.row(s) for s in shapes)], dtype=int)
+
+    @property
+    def bounds(self) -> numpy.ndarray:
+        """
+        :return: the (N, 6) extents of the shapes, see op.Extents#bulk
+        """
+        return self._column("bounds", lambda: op.Extents.bulk(self._shapes))
+
+    @property
+    def geom_types(self) -> numpy.ndarray:
+        """
+        :return: the (N,) names of the underlying curve (edges) or surface (faces) types, as used in CURVE_TYPES and
+        SURFACE_TYPES. Empty for other shape types.
+        """
+        def compute():
+            if self._shape_type == OCC.Core.TopAbs.TopAbs_EDGE:
+                names = {v: k for k, v in PartPropertyTable.CURVE_TYPES.items()}
+                types = [names.get(OCC.Core.BRepAdaptor.BRepAdaptor_Curve(s).GetType(), "other") for s in self._shapes]
+            elif self._shape_type == OCC.Core.TopAbs.TopAbs_FACE:
+                names = {v: k for k, v in PartPropertyTable.SURFACE_TYPES.items()}
+                types = [names.get(OCC.Core.BRepAdaptor.BRepAdaptor_Surface(s).GetType(), "other") for s in self._shapes]
+            else:
+                types = ["" for _ in self._shapes]
+
+            return numpy.array(types, dtype=object)
+
+        return self._column("geom_types", compute)
+
+    @property
+    def measures(self) -> numpy.ndarray:
+        """
+        :return: the (N,) length (edges, wires), area (faces, shells) or volume (solids, compounds) of the shapes.
+        """
+        def compute():
+            ta = OCC.Core.TopAbs
+            if self._shape_type in [ta.TopAbs_EDGE, ta.TopAbs_WIRE]:
+                props = op.InterrogateUtils.linear_properties
+            elif self._shape_type in [ta.TopAbs_FACE, ta.TopAbs_SHELL]:
+                props = op.InterrogateUtils.surface_properties
+            elif self._shape_type == ta.TopAbs_VERTEX:
+                return numpy.zeros(len(self._shapes))
+            else:
+                props = op.InterrogateUtils.volume_properties
+
+            return numpy.array([props(s).Mass() for s in self._shapes], dtype=float)
+
+        return self._column("measures", compute)
+
+    @property
+    def normals(self) -> numpy.ndarray:
+        """
+        :return: the (N, 3) outward normals of faces at their uv midpoint, taking face orientation into account.
+        NaN for other shape types.
+        """
+        def compute():
+            result = numpy.full((len(self._shapes), 3), numpy.nan)
+
+            if self._shape_type == OCC.Core.TopAbs.TopAbs_FACE:
+                for i, s in enumerate(self._shapes):
+                    _, normal = op.InterrogateUtils.face_normal(s)
+                    sign = -1.0 if s.Orientation() == OCC.Core.TopAbs.TopAbs_REVERSED else 1.0
+                    result[i] = [sign * normal.X(), sign * normal.Y(), sign * normal.Z()]
+
+            return result
+
+        return self._column("normals", compute)
+
+    def _column(self, name: str, compute: typing.Callable[[], numpy.ndarray]) -> numpy.ndarray:
+        if name not in self._columns:
+            self._columns[name] = compute()
+
+        return self._columns[name]
+
+
 class ShapeFilter:
+    """
+    Filters are evaluated as boolean masks over the rows of a PartPropertyTable, i.e. over integer ids of the
+    part's subshapes of one type, so that chains of filters reduce to array intersections.
+    """
+
+    def mask(self, part: Part, table: PartPropertyTable) -> numpy.ndarray:
+        """
+        :return: an (N,) boolean array, True for the rows of the table that pass the filter.
+        """
+        raise NotImplementedError()
 
     def filter(self, part: Part, filter_inputs: typing.Generator[Shape, None, None]) -> \
             typing.Generator[Shape, None, None]:
-        raise NotImplementedError()
+        yield from ShapeFilter.apply_masks(part, [self], filter_inputs)
+
+    @staticmethod
+    def apply_masks(part: Part,
+                    filters: typing.List[ShapeFilter],
+                    filter_inputs: typing.Iterable[Shape]) -> typing.Generator[Shape, None, None]:
+        """
+        :return: the filter inputs that pass all the filters, in their original order and multiplicity.
+        """
+        masks = {}
+        for s in filter_inputs:
+            shape_type = s.ShapeType()
+            if shape_type not in masks:
+                table = PartPropertyTable.of(part, shape_type)
+
+                mask = numpy.ones(len(table), dtype=bool)
+                for f in filters:
+                    mask &= numpy.asarray(f.mask(part, table), dtype=bool)
+
+                masks[shape_type] = (table, mask)
+
+            table, mask = masks[shape_type]
+            row = table.row(s)
+            if row is not None and mask[row]:
+                yield s
 
 
 class ShapeLabelledFilter(ShapeFilter):
@@ -2182,28 +2797,115 @@ class ShapeLabelledFilter(ShapeFilter):
         else:
             self._label = label
 
-    def filter(self, part: Part, filter_inputs: typing.Generator[Shape, None, None]) -> \
-            typing.Generator[Shape, None, None]:
-
-        candidate_shapes = set()
-
-        # apply the label filter
+    def mask(self, part: Part, table: PartPropertyTable) -> numpy.ndarray:
         if self._is_prefix:
-            part = part.subpart(self._label)
-            for l, subshapes in part.subshapes.items():
-                for s in subshapes:
-                    candidate_shapes.add(s)
+            labels = [l for l in part.subshape_map.keys() if l.startswith(self._label)]
         else:
-            subshapes = part.subshapes
-
-            if not self._label in subshapes.keys():
+            if not part.has_label(self._label):
                 raise ValueError(f"Label: \"{self._label}\" is not present in the part.")
 
-            candidate_shapes = {s for s in subshapes[self._label]}
+            labels = [self._label]
 
-        for s in filter_inputs:
-            if s in candidate_shapes:
-                yield s
+        result = numpy.zeros(len(table), dtype=bool)
+
+        rows = table.rows(s for l in labels for s in part.subshape_map[l])
+        result[rows[rows >= 0]] = True
+
+        return result
+
+
+class ShapePropertyFilter(ShapeFilter):
+    """
+    Filters shapes on a boolean mask computed over the PartPropertyTable of their type, so the geometric
+    properties are evaluated once per table rather than once per shape and query.
+    """
+
+    # tolerance used for the comparisons in geometric filters
+    TOLERANCE = 1e-4
+
+    def __init__(self, mask: typing.Callable[[PartPropertyTable], numpy.ndarray]):
+        self._mask = mask
+
+    def mask(self, part: Part, table: PartPropertyTable) -> numpy.ndarray:
+        return self._mask(table)
+
+    @staticmethod
+    def compare(values: numpy.ndarray, comparator: str, value: float) -> numpy.ndarray:
+        tol = ShapePropertyFilter.TOLERANCE
+
+        if comparator == "=":
+            return numpy.abs(values - value) <= tol
+        elif comparator == "<=":
+            return values <= value + tol
+        elif comparator == ">=":
+            return values >= value - tol
+        elif comparator == "<":
+            return values < value - tol
+        elif comparator == ">":
+            return values > value + tol
+
+        raise ValueError(f"Unrecognized comparator: \"{comparator}\"")
+
+    @staticmethod
+    def extents(field: str, comparator: str, value: float) -> ShapePropertyFilter:
+        """
+        :param field: e.g. z_max, x_mid, y_span
+        """
+        axis_name, quantity = field.split("_")
+        axis = "xyz".index(axis_name)
+
+        columns = {
+            "min": op.Extents.mins,
+            "max": op.Extents.maxs,
+            "mid": op.Extents.mids,
+            "span": op.Extents.spans
+        }[quantity]
+
+        return ShapePropertyFilter(
+            lambda t: ShapePropertyFilter.compare(columns(t.bounds)[:, axis], comparator, value))
+
+    @staticmethod
+    def geom_type(type_name: str) -> ShapePropertyFilter:
+        if type_name not in PartPropertyTable.CURVE_TYPES and type_name not in PartPropertyTable.SURFACE_TYPES:
+            raise ValueError(f"Unrecognized curve or surface type: \"{type_name}\"")
+
+        return ShapePropertyFilter(lambda t: t.geom_types == type_name)
+
+    @staticmethod
+    def normal(direction: typing.Tuple[float, float, float]) -> ShapePropertyFilter:
+        direction = numpy.array(direction, dtype=float)
+
+        def mask(t: PartPropertyTable):
+            with numpy.errstate(invalid="ignore"):
+                return t.normals @ direction >= 1 - ShapePropertyFilter.TOLERANCE
+
+        return ShapePropertyFilter(mask)
+
+    @staticmethod
+    def measure_range(measure: str,
+                      range_min: typing.Optional[float],
+                      range_max: typing.Optional[float]) -> ShapePropertyFilter:
+        """
+        :param measure: one of PartPropertyTable.MEASURES, must match the type of the filtered shapes.
+        """
+        if measure not in PartPropertyTable.MEASURES:
+            raise ValueError(f"Unrecognized measure: \"{measure}\"")
+
+        def mask(t: PartPropertyTable):
+            if t.shape_type not in PartPropertyTable.MEASURES[measure]:
+                raise ValueError(f"Measure \"{measure}\" does not apply to shapes of type {t.shape_type}")
+
+            result = numpy.ones(len(t), dtype=bool)
+
+            if range_min is not None:
+                result &= ShapePropertyFilter.compare(t.measures, ">=", range_min)
+
+            if range_max is not None:
+                result &= ShapePropertyFilter.compare(t.measures, "<=", range_max)
+
+            return result
+
+        return ShapePropertyFilter(mask)
 
 
 class ShapeValidation:
@@ -2230,9 +2932,11 @@ class SubshapeResolver:
     def get_shapes(self, part: Part) -> typing.List[Shape]:
         typed_shapes = self._shape_specifier.get_shapes(part)
 
-        filtered_shapes = typed_shapes
-        for shape_filter in self._filters:
-            filtered_shapes = [s for s in shape_filter.filter(part, (fs for fs in filtered_shapes))]
+        if len(self._filters) == 0:
+            filtered_shapes = typed_shapes
+        else:
+            # all filters are combined into a single mask, so shapes are only visited once
+            filtered_shapes = [s for s in ShapeFilter.apply_masks(part, self._filters, typed_shapes)]
 
         return self._quantity_resolver.get_quantity(*filtered_shapes)
 
@@ -2240,6 +2944,9 @@ class SubshapeResolver:
 # noinspection PyMethodMayBeStatic
 class SubshapeResolverVisitor(parsimonious.NodeVisitor):
 
+    # e.g. unknown shape or curve types, report these as-is rather than as VisitationErrors
+    unwrapped_exceptions = (ValueError,)
+
     def visit_subshape_resolver(self, node, visited_children):
         quantity_resolver, shape_specifier = visited_children[0]
 
@@ -2277,6 +2984,30 @@ class SubshapeResolverVisitor(parsimonious.NodeVisitor):
     def visit_label_filter(self, node, visited_children):
         return ShapeLabelledFilter(node.children[1].text)
 
+    def visit_extents_filter(self, node, visited_children):
+        field, comparator, value = node.children
+        return ShapePropertyFilter.extents(field.text, comparator.text, float(value.text))
+
+    def visit_type_filter(self, node, visited_children):
+        return ShapePropertyFilter.geom_type(node.children[1].text)
+
+    def visit_normal_filter(self, node, visited_children):
+        sign = -1.0 if node.children[1].text == "-" else 1.0
+        axis = "xyz".index(node.children[2].text)
+
+        direction = [0.0, 0.0, 0.0]
+        direction[axis] = sign
+
+        return ShapePropertyFilter.normal((direction[0], direction[1], direction[2]))
+
+    def visit_measure_filter(self, node, visited_children):
+        r0, r1 = node.children[2].text.split(":")
+        return ShapePropertyFilter.measure_range(
+            node.children[0].text,
+            float(r0) if r0 != "" else None,
+            float(r1) if r1 != "" else None
+        )
+
     def generic_visit(self, node, visited_children):
         """ The generic visit method. """
         return visited_children or node
@@ -2291,12 +3022,26 @@ class PartQuery:
         validation_part                 = quantity_resolver shape_specifier
 
         filters                         = ("," filter)*
-        filter                          = label_filter
+        filter                          = label_filter / type_filter / normal_filter / measure_filter / extents_filter
 
         # p: modified in previous operation
         # l: has label
         label_filter                    = "l(" (label "*"?) ")"
 
+        # t: curve or surface type, e.g. t(line), t(cylinder)
+        type_filter                     = "t(" ~"[a-z]+" ")"
+
+        # n: face normal along an axis, e.g. n(+z)
+        normal_filter                   = "n(" ("+" / "-") ("x" / "y" / "z") ")"
+
+        # length, area or volume range, either bound may be omitted, e.g. length(2:), area(:10.5)
+        measure_filter                  = ("length" / "area" / "volume") "(" (number? ":" number?) ")"
+
+        # bounding box comparisons, e.g. z_max<=5, x_mid=0
+        extents_filter                  = ~"[xyz]_(min|mid|max|span)" comparator number
+        comparator                      = "<=" / ">=" / "<" / ">" / "="
+        number                          = ~"-?([0-9]+([.][0-9]*)?|[.][0-9]+)(e-?[0-9]+)?"i
+
         shape_specifier                 = "v" / "e" / "w" / "f" / "sh" / "so" / "c" / "s"
 
         quantity_resolver               = quantity_slice / quantity_exact / quantity_all
@@ -2312,79 +3057,131 @@ class PartQuery:
         digit                           = ~"[0-9]"
         """)
 
+    COMPILED_CACHE_SIZE = 256
+
     def __init__(self, part: Part, to_subpart: bool):
         self._part = part
         self._to_subpart = to_subpart
 
-    def __call__(self, query: str):
+    @staticmethod
+    @functools.lru_cache(maxsize=COMPILED_CACHE_SIZE)
+    def compile(query: str) -> SubshapeResolver:
+        """
+        Parses the query into a resolver that can be evaluated against any number of Parts. Resolvers hold no
+        per-Part state, so the most recently used ones are cached by query text and repeated queries are not
+        re-parsed.
+        """
         syntax_tree = PartQuery.grammar.parse(query)
 
         visitor = SubshapeResolverVisitor()
 
-        subshape_resolver: SubshapeResolver = visitor.visit(syntax_tree)
+        return visitor.visit(syntax_tree)
 
-        shapes = subshape_resolver.get_shapes(self._part)
+    def __call__(self, query: str):
+        shapes = PartQuery.compile(query).get_shapes(self._part)
 
         if not self._to_subpart:
             return shapes
         else:
-            return Part(op.GeomUtils.make_compound(*shapes), self._part.subshapes)
+            return Part(op.GeomUtils.make_compound(*shapes), self._part.subshape_map)
 
 
 class PartSelectionResolver:
 
     SHAPE_TYPE_LOOKUP = {v: k for k, v in ShapeSpecifier.SHAPE_TYPES.items()}
 
+    # this runs on every click in the viewer, so the range suggestions are skipped for large or highly
+    # fragmented selections, where they would not be useful anyway
+    MAX_RANGE_SUGGESTIONS = 16
+
     def __init__(self, part: Part, *selection: OCC.Core.TopoDS.TopoDS_Shape):
         self._part = part
-        self._selection = {}
+        self._selection: typing.Dict[OCC.Core.TopAbs.TopAbs_ShapeEnum, typing.List[OCC.Core.TopoDS.TopoDS_Shape]] = {}
 
         # group the selections into types
         for s in selection:
-            self._selection[s.ShapeType()] = self._selection.get(s.ShapeType(), []) + [s]
-
-        # reverse lookup for shape labels
-        self._label_cache = {}
-        for label, shape_list in self._part.subshapes.items():
-            for shape in shape_list:
-                self._label_cache[shape] = label
+            self._selection.setdefault(s.ShapeType(), []).append(s)
 
     def get_suggested_selections(self) -> typing.Generator[str, None, None]:
         for shape_type, shapes in self._selection.items():
-            shapes = set(shapes)
-
             shape_type_query = PartSelectionResolver.SHAPE_TYPE_LOOKUP[shape_type]
 
-            all_shapes: typing.List[OCC.Core.TopoDS.TopoDS_Shape] = self._part.query_shapes(f"*{shape_type_query}")
+            positions = PartSelectionResolver._get_positions(self._part, shape_type)
 
-            if set(all_shapes) == set(shapes):
-                yield f"*{shape_type_query}"
+            # positions are keyed as the query results would be compared, i.e. including orientation
+            selected_keys = {PartSelectionResolver._position_key(s) for s in shapes}
+            indices = [positions.get(k) for k in selected_keys]
 
-            if shapes.issubset(all_shapes):
-                for i0, i1 in PartSelectionResolver.get_index_ranges(shapes, all_shapes):
-                    if i1 is not None:
-                        yield f"{shape_type_query}[{i0}:{i1 + 1}]"
-                    else:
-                        yield f"{shape_type_query}[{i0}]"
+            if all(i is not None for i in indices):
+                if len(selected_keys) == len(positions):
+                    yield f"*{shape_type_query}"
 
-            shape_labels = set(self._label_cache[s] for s in shapes if s in self._label_cache.keys())
-            if len(shape_labels) == 1:
-                yield f"{shape_type_query},l({shape_labels.pop()})"
+                ranges = [r for r in itertools.islice(
+                    PartSelectionResolver._index_ranges(indices), PartSelectionResolver.MAX_RANGE_SUGGESTIONS + 1)]
+
+                if len(ranges) <= PartSelectionResolver.MAX_RANGE_SUGGESTIONS:
+                    for i0, i1 in ranges:
+                        if i1 is not None:
+                            yield f"{shape_type_query}[{i0}:{i1 + 1}]"
+                        else:
+                            yield f"{shape_type_query}[{i0}]"
+
+            shape_labels = None
+            for s in shapes:
+                labels = self._part.labels_of(s)
+                shape_labels = labels if shape_labels is None else shape_labels & labels
+
+                if len(shape_labels) == 0:
+                    break
+
+            for label in sorted(shape_labels):
+                yield f"{shape_type_query},l({label})"
+
+    @staticmethod
+    def _position_key(shape: OCC.Core.TopoDS.TopoDS_Shape):
+        return op.SetPlaceableShape(shape), shape.Orientation()
+
+    @staticmethod
+    def _get_positions(part: Part, shape_type: OCC.Core.TopAbs.TopAbs_ShapeEnum) -> typing.Dict[typing.Any, int]:
+        """
+        :return: map of each subshape of the type to its first index in the result of the "*<type>" query.
+        """
+        def compute():
+            result = {}
+            for i, s in enumerate(op.Explorer(part.shape, shape_type).iterate()):
+                result.setdefault(PartSelectionResolver._position_key(s), i)
+
+            return result
+
+        return op.PropertyCache.instance().get("selection_positions", part.shape, compute, shape_type)
 
     @staticmethod
     def get_index_ranges(sublist: typing.List,
                          superlist: typing.List) -> typing.Generator[typing.Tuple[int, typing.Optional[int]], None, None]:
-        indices = [superlist.index(s) for s in sublist]
-        indices.sort()
-
-        while len(indices) > 0:
-            start_index = indices.pop(0)
-            end_index = start_index
-            while len(indices) > 0 and indices[0] == end_index + 1:
-                end_index = indices.pop(0)
-
-            # by this point, have consumed all contiguous elements
-            if start_index == end_index:
-                yield start_index, None
-            else:
-                yield start_index, end_index
+        positions = {}
+        for i, s in enumerate(superlist):
+            positions.setdefault(s, i)
+
+        return PartSelectionResolver._index_ranges([positions[s] for s in sublist])
+
+    @staticmethod
+    def _index_ranges(indices: typing.Iterable[int]) -> typing.Generator[typing.Tuple[int, typing.Optional[int]], None, None]:
+        """
+        :return: the contiguous runs in the indices, as (start, end) or (index, None) for runs of one.
+        """
+        start_index = None
+        end_index = None
+
+        for i in sorted(set(indices)):
+            if start_index is not None and i == end_index + 1:
+                end_index = i
+                continue
+
+            if start_index is not None:
+                yield start_index, (end_index if end_index != start_index else None)
+
+            start_index = i
+            end_index = i
+
+        if start_index is not None:
+            yield start_index, (end_index if end_index != start_index else None)
@@ -108,7 +108,10 @@ class StockParts:
             "hole_edge": [op.Explorer.edge_explorer(hole_face).get_single()]
         })
 
-        holes = None
+        holes = []
+
+        # the holes are instances of a single aligned hole, so the geometry is only built once
+        hole_part = hole_part.align().xy_min_to_min(result.shape)
 
         for col in range(0, cols):
             for row in range(0, rows):
@@ -116,15 +119,11 @@ class StockParts:
 
                 if include_holes:
                     hole = hole_part.rename_subshape("hole_edge", f"{col}_{row}")\
-                        .align().xy_min_to_min(result.shape)\
-                        .transform.translate(*coord)
+                        .transform.translate_instance(*coord)
 
-                    if holes is None:
-                        holes = hole
-                    else:
-                        holes = holes.add(hole)
+                    holes.append(hole)
 
-        holes = holes.align().xy_mid_to_mid(result)
+        holes = PartFactory.compound(*holes).align().xy_mid_to_mid(result)
 
         result = result.bool.cut(holes)
 
@@ -155,9 +154,9 @@ class StockParts:
             .transform.translate(3.5, 3.5)
 
         hole_cut = hole.name_recurse("hole_bottom_left", lambda s: s.ShapeType() == OCC.Core.TopAbs.TopAbs_EDGE)\
-            .add(hole.transform.translate(dy=49).name_recurse("hole_top_left", lambda s: s.ShapeType() == OCC.Core.TopAbs.TopAbs_EDGE))\
-            .add(hole.transform.translate(dx=58, dy=49).name_recurse("hole_top_right", lambda s: s.ShapeType() == OCC.Core.TopAbs.TopAbs_EDGE))\
-            .add(hole.transform.translate(dx=58).name_recurse("hole_bottom_right", lambda s: s.ShapeType() == OCC.Core.TopAbs.TopAbs_EDGE))
+            .add(hole.transform.translate_instance(dy=49).name_recurse("hole_top_left", lambda s: s.ShapeType() == OCC.Core.TopAbs.TopAbs_EDGE))\
+            .add(hole.transform.translate_instance(dx=58, dy=49).name_recurse("hole_top_right", lambda s: s.ShapeType() == OCC.Core.TopAbs.TopAbs_EDGE))\
+            .add(hole.transform.translate_instance(dx=58).name_recurse("hole_bottom_right", lambda s: s.ShapeType() == OCC.Core.TopAbs.TopAbs_EDGE))
 
         hole_cut.compound_subpart("hole_bottom_right")
 
@@ -0,0 +1,41 @@
+import unittest
+
+import OCC.Core.BRepPrimAPI
+import OCC.Core.gp as gp
+
+import pythonoccutils.occutils_python as op
+
+
+class BoolUtilsTest(unittest.TestCase):
+
+    @staticmethod
+    def _pins(count: int):
+        return [OCC.Core.BRepPrimAPI.BRepPrimAPI_MakeBox(gp.gp_Pnt(2 * i + 1, 1, -1), 1, 1, 3).Shape()
+                for i in range(count)]
+
+    def test_batch_cut(self):
+        plate = OCC.Core.BRepPrimAPI.BRepPrimAPI_MakeBox(20, 3, 1).Shape()
+
+        for group_size in [None, 3]:
+            result = op.BoolUtils.batch_cut(plate, self._pins(9), group_size=group_size)
+            self.assertAlmostEqual(op.InterrogateUtils.volume_properties(result).Mass(), 60 - 9)
+
+        self.assertTrue(op.BoolUtils.batch_cut(plate, []).IsSame(plate))
+
+    def test_batch_fuse(self):
+        base = OCC.Core.BRepPrimAPI.BRepPrimAPI_MakeBox(20, 3, 1).Shape()
+
+        for group_size in [None, 4]:
+            result = op.BoolUtils.batch_fuse([base] + self._pins(9), group_size=group_size)
+            self.assertAlmostEqual(op.InterrogateUtils.volume_properties(result).Mass(), 60 + 9 * 2)
+
+    def test_group_by_locality(self):
+        pins = self._pins(10)
+
+        groups = op.BoolUtils.group_by_locality(list(reversed(pins)), 4)
+
+        self.assertEqual([len(g) for g in groups], [4, 4, 2])
+        self.assertTrue(all(a.IsSame(b) for a, b in zip([s for g in groups for s in g], pins)))
+
+        self.assertEqual(len(op.BoolUtils.group_by_locality(pins, None)), 1)
+        self.assertEqual(op.BoolUtils.group_by_locality([], 4), [])
@@ -6,6 +6,7 @@ import OCC.Core.BOPAlgo
 import OCC.Core.BRepAlgoAPI
 import OCC.Core.BRepBuilderAPI
 import OCC.Core.BRepFilletAPI
+import OCC.Core.BRepMesh
 import OCC.Core.BRepOffsetAPI
 import OCC.Core.BRepPrimAPI
 import OCC.Core.GeomAbs
@@ -45,3 +46,66 @@ class TestExtents(unittest.TestCase):
         self.assertEqual(extents.yx_max, [extents.y_max, extents.x_max])
         self.assertEqual(extents.xx_max, [extents.x_max, extents.x_max])
         self.assertEqual(extents.xyz_max, [extents.x_max, extents.y_max, extents.z_max])
+
+    def test_bulk(self):
+        box = OCC.Core.BRepPrimAPI.BRepPrimAPI_MakeBox(gp.gp_Pnt(0, 1, 2), gp.gp_Pnt(10, 5, 19)).Shape()
+
+        faces = op.Explorer.face_explorer(box).get()
+        bounds = op.Extents.bulk(faces)
+
+        self.assertEqual(bounds.shape, (6, 6))
+
+        for f, row in zip(faces, bounds):
+            extents = op.Extents(f)
+            self.assertEqual(list(row), [*extents.xyz_min, *extents.xyz_max])
+
+        self.assertEqual(op.Extents.bulk(op.Explorer.face_explorer(box)).tolist(), bounds.tolist())
+
+    def test_vectorised_filters(self):
+        box = OCC.Core.BRepPrimAPI.BRepPrimAPI_MakeBox(gp.gp_Pnt(0, 1, 2), gp.gp_Pnt(10, 5, 19)).Shape()
+
+        # the 4 x lines of the box, each explored once per owning face
+        x_lines = op.Explorer.edge_explorer(box).filter_by(op.Explorer.is_x_line_filter(0.1)).get()
+        self.assertEqual(len(x_lines), 8)
+        self.assertTrue(all(op.Explorer.is_x_line_filter(0.1)(e) for e in x_lines))
+
+        z_ordered = op.Explorer.face_explorer(box).order_by(op.Explorer.by_depth_mid_order()).get()
+        z_mids = [op.Extents(f).z_mid for f in z_ordered]
+        self.assertEqual(z_mids, sorted(z_mids))
+
+    def test_precision(self):
+        box = OCC.Core.BRepPrimAPI.BRepPrimAPI_MakeBox(gp.gp_Pnt(0, 1, 2), gp.gp_Pnt(10, 5, 19)).Shape()
+        optimal = op.Extents(box, op.Extents.Precision.OPTIMAL)
+
+        for precision in op.Extents.Precision:
+            extents = op.Extents(box, precision)
+
+            # every tier must enclose the shape
+            for a in "xyz":
+                self.assertLessEqual(getattr(extents, f"{a}_min"), getattr(optimal, f"{a}_min") + 1e-6)
+                self.assertGreaterEqual(getattr(extents, f"{a}_max"), getattr(optimal, f"{a}_max") - 1e-6)
+
+            self.assertAlmostEqual(extents.x_span, 10, delta=0.01)
+
+        self.assertIsNotNone(op.Extents(box, op.Extents.Precision.OBB).oriented_box)
+
+    def test_triangulation_precision_not_cached(self):
+        sphere = OCC.Core.BRepPrimAPI.BRepPrimAPI_MakeSphere(7).Shape()
+        op.Extents(sphere, op.Extents.Precision.TRIANGULATION)
+
+        OCC.Core.BRepMesh.BRepMesh_IncrementalMesh(sphere, 0.5, False, 0.5, True)
+
+        expected = op.Extents._compute_bnd_box(sphere, op.Extents.Precision.TRIANGULATION).Get()
+        extents = op.Extents(sphere, op.Extents.Precision.TRIANGULATION)
+        self.assertEqual([*extents.xyz_min, *extents.xyz_max], list(expected))
+
+    def test_default_precision(self):
+        box = OCC.Core.BRepPrimAPI.BRepPrimAPI_MakeBox(gp.gp_Pnt(0, 1, 2), gp.gp_Pnt(10, 5, 19)).Shape()
+
+        self.assertEqual(op.Extents.get_default_precision(), op.Extents.Precision.OPTIMAL)
+
+        op.Extents.set_default_precision(op.Extents.Precision.OBB)
+        try:
+            self.assertIsNotNone(op.Extents(box).oriented_box)
+        finally:
+            op.Extents.set_default_precision(op.Extents.Precision.OPTIMAL)
@@ -20,7 +20,7 @@ from OCC.Core.TopAbs import TopAbs_FACE
 from OCC.Core.gp import gp_Vec
 
 import pythonoccutils.occutils_python as op
-from pythonoccutils.part_manager import Part, PartFactory
+from pythonoccutils.part_manager import Part, PartFactory, PartQuery, PartSelectionResolver
 
 
 class PartQueryTest(unittest.TestCase):
@@ -49,3 +49,70 @@ class PartQueryTest(unittest.TestCase):
 
         self.assertEqual(len(box.query_shapes("*f,l(x/min)")), 1)
         self.assertEqual(len(box.query_shapes("*f,l(x/max)")), 1)
+
+    def test_compiled_query_cached(self):
+        box = PartFactory.box_centered(10, 10, 10, x_min_face_name="x/min")
+        other = PartFactory.box_centered(5, 5, 5, x_min_face_name="x/min")
+
+        resolver = PartQuery.compile("*f,l(x/min)")
+        self.assertIs(PartQuery.compile("*f,l(x/min)"), resolver)
+
+        hits = PartQuery.compile.cache_info().hits
+        box.query_shapes("*f,l(x/min)")
+        self.assertEqual(PartQuery.compile.cache_info().hits, hits + 1)
+
+        self.assertEqual(len(resolver.get_shapes(box)), 1)
+        self.assertEqual(len(resolver.get_shapes(other)), 1)
+        self.assertNotEqual(resolver.get_shapes(box), resolver.get_shapes(other))
+
+    def test_geometric_filters(self):
+        box = PartFactory.box(10, 20, 30)
+
+        self.assertEqual(len(box.query_shapes("*f,n(+z)")), 1)
+        self.assertAlmostEqual(op.Extents(box.query_shapes("*f,n(-z)")[0]).z_max, 0)
+
+        self.assertEqual(len(box.query_shapes("*f,z_min>=30")), 1)
+        self.assertEqual(len(box.query_shapes("*f,x_mid=5")), 4)
+        self.assertEqual(len(box.query_shapes("*f,t(plane)")), 6)
+        self.assertEqual(len(box.query_shapes("*f,t(cylinder)")), 0)
+
+        # edges are explored once per owning face
+        self.assertEqual(len(set(box.query_shapes("*e,t(line),length(25:)"))), 4)
+        self.assertEqual(len(box.query_shapes("*f,area(:250)")), 2)
+        self.assertEqual(len(box.query_shapes("*f,area(250:),z_min<1")), 4)
+
+        with self.assertRaises(ValueError):
+            PartQuery.compile("*e,t(not_a_type)")
+
+        # edges have no area
+        with self.assertRaises(ValueError):
+            box.query_shapes("*e,area(1:)")
+
+    def test_combined_filters(self):
+        box = PartFactory.box(10, 20, 30, z_max_face_name="top", x_min_face_name="sides/x_min",
+                              y_min_face_name="sides/y_min")
+
+        self.assertEqual(len(box.query_shapes("*f,l(sides/*),n(-x)")), 1)
+        self.assertEqual(len(box.query_shapes("*f,l(sides/*),l(top)")), 0)
+
+        top_edges = box.query_shapes("*e,l(top)")
+        self.assertEqual(len(top_edges), 0)
+
+        self.assertEqual(len(set(box.query_shapes("*e,z_min>=30"))), 4)
+
+    def test_selection_suggestions(self):
+        box = PartFactory.box(10, 20, 30, z_max_face_name="top")
+        faces = box.query_shapes("*f")
+
+        suggestions = list(PartSelectionResolver(box, *faces).get_suggested_selections())
+        self.assertIn("*f", suggestions)
+        self.assertIn("f[0:6]", suggestions)
+
+        suggestions = list(PartSelectionResolver(box, faces[1], faces[2], faces[4]).get_suggested_selections())
+        self.assertEqual(suggestions, ["f[1:3]", "f[4]"])
+
+        top = box.get_single("top")
+        self.assertIn("f,l(top)", PartSelectionResolver(box, top).get_suggested_selections())
+
+        self.assertEqual(list(PartSelectionResolver.get_index_ranges([8, 0, 2, 1, 5, 7], list(range(10)))),
+                         [(0, 2), (5, None), (7, 8)])
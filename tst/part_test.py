@@ -126,6 +126,202 @@ class TestPart(unittest.TestCase):
         self.assertFalse("box_a" in box_b_part.subshapes.keys())
         self.assertFalse("box_b" in box_b_part.subshapes.keys())
 
+    def test_labels_of(self):
+        mkbox = OCC.Core.BRepPrimAPI.BRepPrimAPI_MakeBox(10, 2, 3)
+
+        part = Part(mkbox.Shape(), {
+            "front_face": [mkbox.FrontFace()],
+            "faces/top": [mkbox.TopFace()],
+            "faces/all": [mkbox.FrontFace(), mkbox.TopFace()]
+        })
+
+        self.assertEqual(part.labels_of(mkbox.FrontFace()), {"front_face", "faces/all"})
+        self.assertEqual(part.labels_of(mkbox.FrontFace().Reversed()), {"front_face", "faces/all"})
+        self.assertEqual(part.labels_of(mkbox.BackFace()), set())
+
+        renamed = part.rename_subshape("front_face", "front")
+        self.assertEqual(renamed.labels_of(mkbox.FrontFace()), {"front", "faces/all"})
+
+        subpart = part.subpart("faces/")
+        self.assertEqual(subpart.labels_of(mkbox.TopFace()), {"top", "all"})
+
+        added = part.add(Part(mkbox.Shape(), {"back_face": [mkbox.BackFace()]}), sublabel="other/")
+        self.assertEqual(added.labels_of(mkbox.BackFace()), {"other/back_face"})
+        self.assertEqual(added.labels_of(mkbox.TopFace()), {"faces/top", "faces/all"})
+
+    def test_subshape_map_shared(self):
+        mkbox = OCC.Core.BRepPrimAPI.BRepPrimAPI_MakeBox(10, 2, 3)
+
+        part = Part(mkbox.Shape(), {"front_face": [mkbox.FrontFace()], "top_face": [mkbox.TopFace()]})
+
+        self.assertIs(Part(mkbox.Shape(), part.subshape_map).subshape_map, part.subshape_map)
+        self.assertIs(part.rename_subshape("top_face", "top").subshape_map["front_face"],
+                      part.subshape_map["front_face"])
+
+        # the copies handed out must not alias the internal map
+        part.subshapes["front_face"].clear()
+        part.get("front_face").clear()
+        self.assertEqual(part.get_single("front_face"), mkbox.FrontFace())
+
+        merged = Part.merge_subshape_lists(part.subshape_map, {"front_face": [mkbox.BackFace()]})
+        self.assertEqual(len(merged["front_face"]), 2)
+        self.assertIs(merged["top_face"], part.subshape_map["top_face"])
+
+    def test_bool_options(self):
+        box = PartFactory.box(10, 10, 10)
+        tools = [PartFactory.box(1, 1, 20).transform.translate(dx=2 * i + 1, dy=1, dz=-5) for i in range(4)]
+
+        default_result = box.bool.cut(*tools)
+        parallel_result = box.bool.cut(*tools, options=op.BoolOptions(run_parallel=True, fuzzy_value=1e-5))
+
+        self.assertAlmostEqual(op.InterrogateUtils.volume_properties(default_result.shape).Mass(), 1000 - 4 * 10)
+        self.assertAlmostEqual(op.InterrogateUtils.volume_properties(parallel_result.shape).Mass(), 1000 - 4 * 10)
+
+        with self.assertRaises(ValueError):
+            op.BoolOptions().updated(not_an_option=True)
+
+    def test_bool_prefilter(self):
+        options = op.BoolOptions(prefilter=True)
+
+        box = PartFactory.box(10, 10, 10)
+        near = PartFactory.box(1, 1, 20).transform.translate(dx=1, dy=1, dz=-5).name("near")
+        far = PartFactory.box(1, 1, 1).transform.translate(dx=100).name("far")
+
+        cut = box.bool.cut(near, far, options=options)
+        self.assertAlmostEqual(op.InterrogateUtils.volume_properties(cut.shape).Mass(), 1000 - 10)
+        self.assertEqual(len(cut.get("far")), 0)
+
+        fused = box.bool.union(near, far, options=options)
+        self.assertAlmostEqual(op.InterrogateUtils.volume_properties(fused.shape).Mass(), 1000 + 10 + 1)
+        self.assertTrue(fused.get_single("far").IsSame(far.shape))
+
+        common = box.bool.common(far, options=options)
+        self.assertAlmostEqual(op.InterrogateUtils.volume_properties(common.shape).Mass(), 0)
+
+    def test_extents_index(self):
+        extents = [PartFactory.box(1, 1, 1).transform.translate(dx=x).extents for x in [0, 0.5, 3, 10]]
+
+        index = op.ExtentsIndex(extents)
+
+        self.assertEqual(index.query(PartFactory.box(1, 1, 1).transform.translate(dx=2.5).extents), [2])
+        self.assertEqual(index.isolated(), [2, 3])
+
+    def test_explorer_streaming(self):
+        box = PartFactory.box(1, 2, 3)
+
+        visited = []
+
+        def record(p):
+            visited.append(p)
+            return True
+
+        self.assertTrue(box.explore.face.filter_by(record).any())
+        self.assertEqual(len(visited), 1)
+
+        self.assertEqual(box.explore.face.count(), 6)
+        self.assertIsNone(box.explore.face.filter_by(lambda p: False).first())
+
+        top = box.explore.face.order_by(lambda p: -p.extents.z_mid).first()
+        self.assertAlmostEqual(top.extents.z_mid, 3)
+
+        with self.assertRaises(ValueError):
+            box.explore.face.get_single()
+
+        self.assertEqual(op.Explorer.face_explorer(box.shape).count(), 6)
+        self.assertIsNotNone(op.Explorer.edge_explorer(box.shape).filter_by(op.Explorer.is_z_line_filter(0.1)).first())
+
+    def test_explorer_unique(self):
+        box = PartFactory.box(1, 2, 3)
+
+        self.assertEqual(op.Explorer.edge_explorer(box.shape).count(), 24)
+        self.assertEqual(op.Explorer.edge_explorer(box.shape, unique=True).count(), 12)
+        self.assertEqual(op.Explorer.vertex_explorer(box.shape).deduplicated().count(), 8)
+        self.assertEqual(box.explore.edge.deduplicated().count(), 12)
+
+        edges = op.Explorer.edge_explorer(box.shape, unique=True).get()
+        index = op.ShapeIndex.of_subshapes(box.shape, TopAbs_EDGE)
+        self.assertEqual([index.index_of(e) for e in edges], list(range(1, 13)))
+
+    def test_topology(self):
+        box = PartFactory.box(1, 2, 3)
+        other = PartFactory.box(1, 1, 1)
+
+        vertex = op.Explorer.vertex_explorer(box.shape).first()
+        edge = op.Explorer.edge_explorer(box.shape).first()
+        face = op.Explorer.face_explorer(box.shape).first()
+
+        self.assertEqual(len(box.topology.vertex_edges(vertex)), 3)
+        self.assertEqual(len(box.topology.edge_faces(edge)), 2)
+        self.assertEqual(len(box.topology.face_solids(face)), 1)
+        self.assertIs(box.topology, box.topology)
+
+        self.assertTrue(box.topology.contains(face))
+        self.assertFalse(other.topology.contains(face))
+        self.assertEqual(other.topology.edge_faces(edge), [])
+
+        self.assertTrue(op.InterrogateUtils.is_parent_shape(box.shape, edge))
+        self.assertFalse(op.InterrogateUtils.is_parent_shape(other.shape, edge))
+
+    def test_transform_instance(self):
+        box = PartFactory.box(1, 2, 3, z_max_face_name="top")
+
+        instance = box.transform.translate_instance(dx=10, sublabel="a/")
+
+        self.assertTrue(instance.shape.IsPartner(box.shape))
+        self.assertFalse(instance.shape.IsSame(box.shape))
+        self.assertEqual(instance.extents.xyz_mid, [10.5, 1, 1.5])
+
+        top = instance.get_single("a/top")
+        self.assertTrue(top.IsPartner(box.get_single("top")))
+        self.assertAlmostEqual(op.Extents(top).z_min, 3)
+        self.assertAlmostEqual(op.Extents(top).x_min, 10)
+        self.assertEqual(instance.labels_of(top), {"a/top"})
+
+        with self.assertRaises(ValueError):
+            box.transform.instance(lambda t: t.SetScale(gp.gp_Origin(), 2))
+
+        with self.assertRaises(ValueError):
+            box.transform.instance(lambda t: t.SetMirror(gp.gp_YOZ()))
+
+        lattice = PartFactory.hex_lattice(3, 3, instance=True)
+        self.assertEqual(lattice.explore.face.count(), 9)
+
+    def test_compound_flat(self):
+        boxes = [PartFactory.box(1, 1, 1, z_max_face_name="top").transform.translate(dx=2 * i) for i in range(5)]
+
+        compound = PartFactory.compound(*boxes)
+
+        self.assertEqual(len([s for s in op.InterrogateUtils.traverse_direct_subshapes(compound.shape)]), 5)
+        self.assertEqual(len(compound.get("top")), 5)
+        self.assertIs(PartFactory.compound(boxes[0]), boxes[0])
+
+        pattern = boxes[0].pattern(range(0, 4), lambda i, p: p.transform.translate(dy=2 * i))
+        self.assertEqual(len([s for s in op.InterrogateUtils.traverse_direct_subshapes(pattern.shape)]), 4)
+
+        merged = Part.merge_all_subshape_lists(*[b.subshape_map for b in boxes])
+        self.assertEqual(merged["top"], tuple(b.get_single("top") for b in boxes))
+
+    def test_deferred_transform(self):
+        box = PartFactory.box(1, 2, 3, z_max_face_name="top")
+        box_extents = box.extents
+
+        moved = box.transform.translate(dx=1).transform.scale(2).transform.translate(dz=-1)
+
+        # extents are derived from the source without applying the transform
+        self.assertIsNotNone(moved._deferred_transform)
+        self.assertEqual(moved.extents.xyz_min, [2, 0, -1])
+        self.assertEqual(moved.extents.xyz_max, [4, 4, 5])
+        self.assertIsNotNone(moved._deferred_transform)
+        self.assertIs(moved._deferred_transform[0], box)
+
+        self.assertAlmostEqual(op.Extents(moved.get_single("top")).z_min, 5)
+        self.assertIsNone(moved._deferred_transform)
+        self.assertAlmostEqual(op.Extents(moved.shape).x_max, 4)
+
+        rotated = box.transform.rotate(gp.gp_Ax1(gp.gp_Origin(), gp.gp_DZ()), math.pi / 2)
+        self.assertAlmostEqual(rotated.extents.x_min, -2)
+        self.assertEqual(box.extents, box_extents)
+
     def test_partfactory_loft(self):
         wires_or_faces = [
             PartFactory.right_angle_triangle(10, math.pi / 3),
@@ -0,0 +1,97 @@
+import unittest
+
+import OCC.Core.BRep
+import OCC.Core.BRepPrimAPI
+import OCC.Core.TopLoc
+import OCC.Core.gp as gp
+
+import pythonoccutils.occutils_python as op
+
+
+class PropertyCacheTest(unittest.TestCase):
+
+    def test_lru_eviction(self):
+        cache = op.PropertyCache(max_size=2)
+        boxes = [OCC.Core.BRepPrimAPI.BRepPrimAPI_MakeBox(1, 1, 1).Shape() for _ in range(3)]
+
+        for b in boxes:
+            cache.get("p", b, lambda: 1)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.misses, 3)
+
+        cache.get("p", boxes[2], lambda: 1)
+        self.assertEqual(cache.hits, 1)
+
+        # evicted
+        cache.get("p", boxes[0], lambda: 1)
+        self.assertEqual(cache.misses, 4)
+
+    def test_keyed_by_identity(self):
+        cache = op.PropertyCache()
+        box = OCC.Core.BRepPrimAPI.BRepPrimAPI_MakeBox(1, 1, 1).Shape()
+
+        self.assertEqual(cache.get("p", box, lambda: 1), 1)
+        self.assertEqual(cache.get("p", box, lambda: 2), 1)
+        self.assertEqual(cache.get("q", box, lambda: 3), 3)
+        self.assertEqual(cache.get("p", box.Reversed(), lambda: 4), 4)
+
+        translation = gp.gp_Trsf()
+        translation.SetTranslation(gp.gp_Vec(1, 0, 0))
+        self.assertEqual(cache.get("p", box.Moved(OCC.Core.TopLoc.TopLoc_Location(translation)), lambda: 5), 5)
+
+    def test_properties_cached(self):
+        box = OCC.Core.BRepPrimAPI.BRepPrimAPI_MakeBox(1, 2, 3).Shape()
+        cache = op.PropertyCache.instance()
+        cache.clear()
+
+        self.assertAlmostEqual(op.InterrogateUtils.volume_properties(box).Mass(), 6)
+        self.assertAlmostEqual(op.InterrogateUtils.volume_properties(box).Mass(), 6)
+        self.assertEqual(cache.hits, 1)
+
+        face = op.Explorer.face_explorer(box).get()[0]
+        p0, n0 = op.InterrogateUtils.face_normal(face)
+        n0.Reverse()
+        p1, n1 = op.InterrogateUtils.face_normal(face)
+
+        self.assertFalse(n0.IsEqual(n1, 1e-6))
+
+    def test_mesh_cache(self):
+        cache = op.MeshCache()
+        box = OCC.Core.BRepPrimAPI.BRepPrimAPI_MakeBox(1, 1, 1).Shape()
+
+        cache.mesh(box, 0.1, 0.5)
+        self.assertEqual(cache.misses, 1)
+
+        # same parameters, and located copies or subshapes share the faces' mesh
+        translation = gp.gp_Trsf()
+        translation.SetTranslation(gp.gp_Vec(1, 0, 0))
+        cache.mesh(box, 0.1, 0.5)
+        cache.mesh(box.Moved(OCC.Core.TopLoc.TopLoc_Location(translation)), 0.1, 0.5)
+        cache.mesh(op.Explorer.face_explorer(box).get()[0], 0.1, 0.5)
+        self.assertEqual(cache.hits, 3)
+
+        cache.mesh(box, 0.2, 0.5)
+        self.assertEqual(cache.misses, 2)
+
+        face = op.Explorer.face_explorer(box).get()[0]
+        self.assertIsNotNone(OCC.Core.BRep.BRep_Tool_Triangulation(face, OCC.Core.TopLoc.TopLoc_Location()))
+
+    def test_mesh_cache_stale_faces(self):
+        cache = op.MeshCache()
+        box = OCC.Core.BRepPrimAPI.BRepPrimAPI_MakeBox(1, 1, 1).Shape()
+        other = OCC.Core.BRepPrimAPI.BRepPrimAPI_MakeBox(gp.gp_Pnt(2, 0, 0), 1, 1, 1).Shape()
+
+        cache.mesh(box, 0.1, 0.5)
+
+        # only the faces of the added box are meshed, the box keeps its mesh
+        cache.mesh(op.GeomUtils.make_compound(box, other), 0.1, 0.5)
+        self.assertEqual(cache.misses, 2)
+        self.assertEqual(len(cache), 12)
+
+        cache.mesh(box, 0.1, 0.5)
+        cache.mesh(other, 0.1, 0.5)
+        self.assertEqual(cache.hits, 2)
+
+        for f in op.Explorer.face_explorer(other).get():
+            self.assertIsNotNone(OCC.Core.BRep.BRep_Tool_Triangulation(f, OCC.Core.TopLoc.TopLoc_Location()))
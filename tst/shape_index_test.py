@@ -0,0 +1,43 @@
+import unittest
+
+import OCC
+import OCC.Core.BRepPrimAPI
+import OCC.Core.TopAbs
+import OCC.Core.gp as gp
+
+import pythonoccutils.occutils_python as op
+
+
+class ShapeIndexTest(unittest.TestCase):
+
+    def test_of_subshapes_is_unique(self):
+        box = OCC.Core.BRepPrimAPI.BRepPrimAPI_MakeBox(10, 10, 10).Shape()
+
+        self.assertEqual(len(op.ShapeIndex.of_subshapes(box, OCC.Core.TopAbs.TopAbs_FACE)), 6)
+        self.assertEqual(len(op.ShapeIndex.of_subshapes(box, OCC.Core.TopAbs.TopAbs_EDGE)), 12)
+        self.assertEqual(len(op.ShapeIndex.of_subshapes(box, OCC.Core.TopAbs.TopAbs_VERTEX)), 8)
+
+    def test_index_lookup(self):
+        mkbox = OCC.Core.BRepPrimAPI.BRepPrimAPI_MakeBox(10, 10, 10)
+        other_box = OCC.Core.BRepPrimAPI.BRepPrimAPI_MakeBox(10, 10, 10)
+
+        index = op.ShapeIndex.of_subshapes(mkbox.Shape())
+
+        self.assertTrue(mkbox.FrontFace() in index)
+        self.assertFalse(other_box.FrontFace() in index)
+        self.assertIsNone(index.index_of(other_box.FrontFace()))
+
+        front_face_index = index.index_of(mkbox.FrontFace())
+        self.assertTrue(index.shape(front_face_index).IsSame(mkbox.FrontFace()))
+
+        # re-adding an existing shape keeps its index
+        self.assertEqual(index.add(mkbox.FrontFace()), front_face_index)
+
+    def test_set_placeable_shape(self):
+        mkbox = OCC.Core.BRepPrimAPI.BRepPrimAPI_MakeBox(gp.gp_Pnt(0, 0, 0), gp.gp_Pnt(1, 1, 1))
+
+        faces = {op.SetPlaceableShape(f) for f in op.Explorer.face_explorer(mkbox.Shape()).get()}
+        self.assertEqual(len(faces), 6)
+
+        self.assertTrue(op.SetPlaceableShape(mkbox.TopFace()) in faces)
+        self.assertTrue(op.SetPlaceableShape(mkbox.TopFace().Reversed()) in faces)